@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from festivals.live import STREAM_PATH, comment_stream  # noqa: E402  (needs the app registry)
+
+
+async def application(scope, receive, send):
+    # Long-lived comment streams skip Django's request/middleware stack.
+    if scope["type"] == "http":
+        match = STREAM_PATH.match(scope["path"])
+        if match:
+            return await comment_stream(scope, receive, send, int(match["pk"]))
+    return await django_application(scope, receive, send)
@@ -27,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'festivals.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,10 +49,20 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'festivals.context_processors.public_page',
             ],
         },
     },
 ]
+if not DEBUG:
+    # Compile each template once per process; DEBUG keeps Django's reloading default.
+    TEMPLATES[0]["APP_DIRS"] = False
+    TEMPLATES[0]["OPTIONS"]["loaders"] = [
+        (
+            "django.template.loaders.cached.Loader",
+            ["django.template.loaders.filesystem.Loader", "django.template.loaders.app_directories.Loader"],
+        )
+    ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
@@ -107,3 +118,93 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    # Comment rate-limit buckets, shared by the web workers of this host. FileBasedCache
+    # unpickles what it finds, so the directory must belong to the app (Django creates it
+    # with mode 0700); never point it at a world-writable place such as /tmp. Buckets
+    # expire after a minute, and the high MAX_ENTRIES keeps culling from resetting live
+    # ones. Use Redis/Memcached when several hosts serve the site.
+    "ratelimit": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("FESTIVAL_RATE_LIMIT_CACHE_DIR", str(BASE_DIR / "var" / "ratelimit")),
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+
+
+# Festival app
+# Detail page views are buffered per process and written in one bulk update.
+FESTIVAL_VIEW_FLUSH_INTERVAL = int(os.environ.get("FESTIVAL_VIEW_FLUSH_INTERVAL", 30))  # seconds
+FESTIVAL_VIEW_FLUSH_SIZE = int(os.environ.get("FESTIVAL_VIEW_FLUSH_SIZE", 500))  # buffered hits
+FESTIVAL_POPULARITY_HALF_LIFE_DAYS = 7
+
+# Anonymous list/detail pages are cacheable by nginx or a CDN and tagged with
+# surrogate keys; write paths send a PURGE for those keys when FESTIVAL_PURGE_URL is set.
+FESTIVAL_PUBLIC_MAX_AGE = 0  # browsers always revalidate
+FESTIVAL_PUBLIC_S_MAXAGE = int(os.environ.get("FESTIVAL_PUBLIC_S_MAXAGE", 300))  # seconds
+FESTIVAL_SURROGATE_KEY_HEADER = "Surrogate-Key"
+FESTIVAL_PURGE_URL = os.environ.get("FESTIVAL_PURGE_URL", "")
+
+# Comment POSTs are rate limited per IP and nickname (token buckets in the cache) and
+# written by a background thread in bulk batches. An interval of 0 writes inline.
+FESTIVAL_COMMENT_RATE = (5, 60)  # comments per seconds, per IP and per nickname
+FESTIVAL_COMMENT_FLUSH_INTERVAL = float(os.environ.get("FESTIVAL_COMMENT_FLUSH_INTERVAL", 1.0))  # seconds
+FESTIVAL_COMMENT_BATCH_SIZE = 50
+# Buckets must be shared by every web worker, so they live in a file cache on this host
+# (point CACHES["ratelimit"] at Redis/Memcached when several hosts serve the site).
+FESTIVAL_RATE_LIMIT_CACHE = "ratelimit"
+# Proxies in front of Django that append to X-Forwarded-For (0: use REMOTE_ADDR). The
+# client address is the entry this many hops from the right; entries left of it are
+# client-controlled.
+FESTIVAL_TRUSTED_PROXY_HOPS = int(os.environ.get("FESTIVAL_TRUSTED_PROXY_HOPS", 0))
+
+# Live comment stream (SSE, only when served through config.asgi).
+# Turn on when serving through config.asgi: detail pages then load live-comments.js.
+FESTIVAL_LIVE_COMMENTS = os.environ.get("FESTIVAL_LIVE_COMMENTS", "False") == "True"
+FESTIVAL_LIVE_POLL_INTERVAL = 1.0  # seconds between the hub's comment queries
+FESTIVAL_LIVE_KEEPALIVE = 15  # seconds between keepalive comments on idle streams
+
+# Festivals that ended this long ago are moved to the archive tables by archive_festivals.
+FESTIVAL_ARCHIVE_HORIZON_DAYS = 730
+
+# Runtime metrics served at /metrics. With a directory every web worker and ingest
+# command writes its values there and the endpoint aggregates all of them.
+FESTIVAL_METRICS_DIR = os.environ.get("FESTIVAL_METRICS_DIR", "")
+FESTIVAL_METRICS_FLUSH_INTERVAL = 5  # seconds
+# Who may scrape it besides staff: the Prometheus server's own socket address (REMOTE_ADDR,
+# never X-Forwarded-For; leave empty behind a local proxy) or a request carrying
+# "Authorization: Bearer <FESTIVAL_METRICS_TOKEN>".
+FESTIVAL_METRICS_SCRAPER_IPS = tuple(filter(None, os.environ.get("FESTIVAL_METRICS_SCRAPER_IPS", "").split(",")))
+FESTIVAL_METRICS_TOKEN = os.environ.get("FESTIVAL_METRICS_TOKEN", "")
+
+# Pre-rendered anonymous pages (export_static, kept current by the static_pages
+# outbox consumer) for nginx to serve before falling back to Django.
+FESTIVAL_STATIC_EXPORT_DIR = os.environ.get("FESTIVAL_STATIC_EXPORT_DIR", "")
+FESTIVAL_STATIC_LIST_PAGES = 5  # list pages rendered besides every detail page
+
+# Import jobs queued from the staff page (/imports/) and run by run_import_jobs.
+FESTIVAL_IMPORT_UPLOAD_DIR = os.environ.get("FESTIVAL_IMPORT_UPLOAD_DIR", str(BASE_DIR / "imports"))
+FESTIVAL_IMPORT_STALE_SECONDS = 1800  # running jobs without progress this long are marked failed
+FESTIVAL_IMPORT_UPLOAD_RETENTION_DAYS = 7  # failed jobs' uploads (and stray files) are deleted after this
+
+# /sitemap.xml lists child sitemaps of fixed festival id ranges; a rendered child is
+# cached until a festival in its range changes.
+FESTIVAL_SITEMAP_SIZE = 50000  # ids per child sitemap (the protocol allows 50,000 URLs)
+FESTIVAL_SITEMAP_CACHE = "default"
+FESTIVAL_SITEMAP_CACHE_TIMEOUT = 86400  # seconds; also how long superseded renders linger
+
+# Optional Jinja2 rendering of the list and detail pages (jinja2/, same HTML as
+# templates/; Jinja2 is pinned in requirements.txt). Other templates stay on the Django engine.
+FESTIVAL_JINJA2_TEMPLATES = {
+    "BACKEND": "django.template.backends.jinja2.Jinja2",
+    "DIRS": [BASE_DIR / "jinja2"],
+    "APP_DIRS": False,
+    "OPTIONS": {
+        "environment": "festivals.jinja_env.environment",
+        "context_processors": TEMPLATES[0]["OPTIONS"]["context_processors"],
+    },
+}
+if os.environ.get("FESTIVAL_JINJA2", "False") == "True":
+    TEMPLATES = [FESTIVAL_JINJA2_TEMPLATES, *TEMPLATES]
@@ -1,6 +1,17 @@
 from django.contrib import admin
 
-from .models import Comment, Festival, FestivalOrganization, Location, Organization
+from .models import (
+    ArchivedFestival,
+    BackfillProgress,
+    Comment,
+    Festival,
+    FestivalOrganization,
+    ImportJob,
+    IngestError,
+    IngestRun,
+    Location,
+    Organization,
+)
 
 
 class FestivalOrganizationInline(admin.TabularInline):
@@ -22,9 +33,11 @@ class OrganizationAdmin(admin.ModelAdmin):
 
 @admin.register(Festival)
 class FestivalAdmin(admin.ModelAdmin):
-    list_display = ("title", "place", "start_date", "organizer", "host", "data_reference_date")
+    list_display = ("title", "place", "start_date", "organizer", "host", "data_reference_date", "source", "is_active")
+    list_filter = ("source", "is_active")
     search_fields = ("title", "organizations__organization__name", "external_id")
     ordering = ("start_date", "title")
+    raw_id_fields = ("merged_into",)
     inlines = [FestivalOrganizationInline]
 
 
@@ -33,3 +46,39 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ("nickname", "festival", "created_at")
     search_fields = ("nickname", "content")
     ordering = ("-created_at",)
+
+
+class IngestErrorInline(admin.TabularInline):
+    model = IngestError
+    extra = 0
+    readonly_fields = ("offset", "item_key", "message", "payload", "created_at")
+    can_delete = False
+
+
+@admin.register(IngestRun)
+class IngestRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "source", "status", "last_offset", "started_at", "finished_at")
+    list_filter = ("source", "status")
+    readonly_fields = ("params", "params_key", "error", "started_at", "updated_at", "finished_at")
+    inlines = [IngestErrorInline]
+
+
+@admin.register(ArchivedFestival)
+class ArchivedFestivalAdmin(admin.ModelAdmin):
+    list_display = ("title", "place", "start_date", "end_date", "source", "archived_at")
+    list_filter = ("source",)
+    search_fields = ("title", "external_id")
+
+
+@admin.register(BackfillProgress)
+class BackfillProgressAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "last_pk", "processed", "started_at", "updated_at", "finished_at")
+    list_filter = ("status",)
+    readonly_fields = ("error", "started_at", "updated_at", "finished_at")
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "source", "status", "progress", "total", "requested_by", "created_at", "finished_at")
+    list_filter = ("source", "status")
+    readonly_fields = ("options", "upload_path", "progress", "total", "output", "error", "created_at", "started_at", "updated_at", "finished_at")
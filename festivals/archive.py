@@ -0,0 +1,127 @@
+"""Cold tier for festivals that ended long ago.
+
+Festivals whose end date (or start date, when there is none) is older than
+``FESTIVAL_ARCHIVE_HORIZON_DAYS`` are copied with their comments and roles into
+``ArchivedFestival``/``ArchivedComment`` under the same ids and removed from the
+hot tables, so list queries and their indexes only cover current festivals.
+Detail URLs keep working because ids are never reused (SQLite AUTOINCREMENT).
+A festival recreated through the form after its external id was archived is
+archived under ``<external_id>#<id>`` with a warning instead of failing the run.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import Iterable, List, Set
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .edge_cache import DETAIL_KEY, LIST_KEY, request_purge
+from .facets import remove_festival_facets
+from .models import ArchivedComment, ArchivedFestival, Comment, Festival, FestivalOrganization
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def archive_cutoff(horizon_days=None):
+    if horizon_days is None:
+        horizon_days = getattr(settings, "FESTIVAL_ARCHIVE_HORIZON_DAYS", 730)
+    return timezone.localdate() - timedelta(days=horizon_days)
+
+
+def archivable(cutoff):
+    return Festival.objects.filter(Q(end_date__lt=cutoff) | Q(end_date__isnull=True, start_date__lt=cutoff))
+
+
+def archived_external_ids(keys: Iterable[str]) -> Set[str]:
+    """The subset of ``keys`` that already lives in the archive (loaders must not recreate them)."""
+    keys = [key for key in keys if key]
+    found = set()
+    for start in range(0, len(keys), BATCH_SIZE):
+        found.update(
+            ArchivedFestival.objects.filter(external_id__in=keys[start : start + BATCH_SIZE]).values_list(
+                "external_id", flat=True
+            )
+        )
+    return found
+
+
+def _snapshot(festival: Festival, roles) -> ArchivedFestival:
+    location = festival.location
+    return ArchivedFestival(
+        id=festival.pk,
+        external_id=festival.external_id,
+        title=festival.title,
+        start_date=festival.start_date,
+        end_date=festival.end_date,
+        description=festival.description,
+        telephone=festival.telephone,
+        homepage=festival.homepage,
+        extra_info=festival.extra_info,
+        data_reference_date=festival.data_reference_date,
+        source=festival.source,
+        place=location.name if location else "",
+        address=(location.address_road or location.address_lot) if location else "",
+        sido=location.sido if location else "",
+        sigungu=location.sigungu if location else "",
+        latitude=location.latitude if location else None,
+        longitude=location.longitude if location else None,
+        roles=roles.get(festival.pk, {}),
+        view_count=festival.view_count,
+        created_at=festival.created_at,
+        updated_at=festival.updated_at,
+    )
+
+
+def archive_batch(festival_ids: List[int]) -> int:
+    """Move one batch of festivals with their comments and roles; returns festivals moved."""
+    with transaction.atomic():
+        festivals = list(Festival.objects.filter(pk__in=festival_ids).select_related("location"))
+        ids = [festival.pk for festival in festivals]
+        roles = {}
+        for festival_id, role, name in FestivalOrganization.objects.filter(festival_id__in=ids).values_list(
+            "festival_id", "role", "organization__name"
+        ):
+            roles.setdefault(festival_id, {})[role] = name
+        snapshots = [_snapshot(f, roles) for f in festivals]
+        taken = archived_external_ids(snapshot.external_id for snapshot in snapshots)
+        for snapshot in snapshots:
+            if snapshot.external_id in taken:
+                suffix = f"#{snapshot.pk}"
+                renamed = snapshot.external_id[: 255 - len(suffix)] + suffix
+                logger.warning(
+                    "Festival #%s reuses archived external id %r; archiving it as %r", snapshot.pk, snapshot.external_id, renamed
+                )
+                snapshot.external_id = renamed
+        ArchivedFestival.objects.bulk_create(snapshots, batch_size=BATCH_SIZE)
+        ArchivedComment.objects.bulk_create(
+            [
+                ArchivedComment(id=c.pk, festival_id=c.festival_id, nickname=c.nickname, content=c.content, created_at=c.created_at)
+                for c in Comment.objects.filter(festival_id__in=ids).order_by()
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        # Facet counts are decremented once for the batch; the per-festival delete
+        # signals then find nothing left to remove.
+        remove_festival_facets(ids)
+        Festival.objects.filter(pk__in=ids).delete()
+        if ids:
+            request_purge([LIST_KEY, DETAIL_KEY])
+    return len(ids)
+
+
+def archive_finished(cutoff, batch_size: int = BATCH_SIZE, limit=None) -> int:
+    """Archive everything that ended before ``cutoff``, one committed batch at a time."""
+    moved = 0
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        ids = list(archivable(cutoff).order_by("pk").values_list("pk", flat=True)[:size])
+        if not ids:
+            break
+        moved += archive_batch(ids)
+    return moved
@@ -0,0 +1,148 @@
+"""Chunked, resumable backfills for data migrations and management commands.
+
+A backfill walks a queryset in primary-key order, ``chunk_size`` rows at a time.
+Each chunk is handled and its checkpoint (``BackfillProgress``) written in one
+short transaction, so the write lock is held for one chunk instead of the whole
+table and an interrupted run continues after the last committed chunk.
+``pause`` sleeps between chunks to leave room for the site's own writes.
+
+Inside a migration, declare ``atomic = False`` on the ``Migration`` (otherwise
+every chunk joins the migration's transaction) and pass the historical progress
+model::
+
+    def fill(apps, schema_editor):
+        Location = apps.get_model("festivals", "Location")
+        Progress = apps.get_model("festivals", "BackfillProgress")
+        run_backfill("0012_fill_regions", Location.objects.all(), fill_chunk, progress_model=Progress)
+
+Only queryset methods are used on the progress model, so historical models work.
+"""
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from .edge_cache import DETAIL_KEY, LIST_KEY, request_purge
+from .facets import sync_festival_facets
+from .models import BackfillProgress, ChangeLog, Festival, Location
+from .outbox import record
+from .services import split_region
+
+CHUNK_SIZE = 1000
+
+
+def run_backfill(
+    name: str,
+    queryset,
+    handler: Callable,
+    chunk_size: int = CHUNK_SIZE,
+    pause: float = 0.0,
+    restart: bool = False,
+    max_chunks: Optional[int] = None,
+    progress_model=None,
+    on_chunk: Optional[Callable] = None,
+):
+    """Run ``handler(chunk_queryset)`` over ``queryset`` in pk order; returns the progress row.
+
+    ``handler`` may return the number of rows it changed (default: rows in the
+    chunk). A completed backfill is not run again unless ``restart`` is given.
+    """
+    Progress = progress_model or BackfillProgress
+    progress, _ = Progress.objects.get_or_create(name=name)
+    if restart:
+        progress.last_pk, progress.processed = 0, 0
+    elif progress.status == BackfillProgress.Status.COMPLETED:
+        return progress
+    Progress.objects.filter(pk=progress.pk).update(
+        last_pk=progress.last_pk,
+        processed=progress.processed,
+        status=BackfillProgress.Status.RUNNING,
+        error="",
+        finished_at=None,
+        updated_at=timezone.now(),
+    )
+    progress.status = BackfillProgress.Status.RUNNING
+
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        pks = list(queryset.filter(pk__gt=progress.last_pk).order_by("pk").values_list("pk", flat=True)[:chunk_size])
+        if pks:
+            try:
+                with transaction.atomic():
+                    done = handler(queryset.filter(pk__gte=pks[0], pk__lte=pks[-1]))
+                    processed = progress.processed + (len(pks) if done is None else done)
+                    Progress.objects.filter(pk=progress.pk).update(
+                        last_pk=pks[-1], processed=processed, updated_at=timezone.now()
+                    )
+            except Exception as exc:
+                Progress.objects.filter(pk=progress.pk).update(
+                    status=BackfillProgress.Status.FAILED,
+                    error=f"{type(exc).__name__}: {exc}",
+                    updated_at=timezone.now(),
+                )
+                raise
+            progress.last_pk, progress.processed = pks[-1], processed
+            chunks += 1
+            if on_chunk:
+                on_chunk(progress)
+        if len(pks) < chunk_size:
+            progress.status = BackfillProgress.Status.COMPLETED
+            progress.finished_at = timezone.now()
+            Progress.objects.filter(pk=progress.pk).update(
+                status=progress.status, finished_at=progress.finished_at, updated_at=progress.finished_at
+            )
+            break
+        if pause:
+            time.sleep(pause)
+    return progress
+
+
+class Backfill:
+    def __init__(self, name: str, queryset, handler: Callable, help: str = ""):
+        self.name = name
+        self.queryset = queryset
+        self.handler = handler
+        self.help = help
+
+    def run(self, **kwargs):
+        return run_backfill(self.name, self.queryset.all(), self.handler, **kwargs)
+
+
+BACKFILLS: Dict[str, Backfill] = {}
+
+
+def register(name: str, queryset, help: str = ""):
+    """Register ``handler(chunk_queryset)`` as a backfill runnable with ``manage.py backfill <name>``."""
+
+    def decorator(handler):
+        BACKFILLS[name] = Backfill(name, queryset, handler, help)
+        return handler
+
+    return decorator
+
+
+@register("location_regions", Location.objects.all(), "Re-derive Location.sido/sigungu from the address.")
+def fill_location_regions(chunk) -> int:
+    stale = []
+    for location in chunk.only("pk", "address_road", "address_lot", "sido", "sigungu"):
+        region = split_region(location.address_road or location.address_lot)
+        if region != (location.sido, location.sigungu):
+            location.sido, location.sigungu = region
+            stale.append(location)
+    Location.objects.bulk_update(stale, ["sido", "sigungu"])
+    # bulk_update skips the Location signals: sync facets, purge shared-cache pages
+    # (after commit) and log the change here.
+    users = list(Festival.objects.filter(location__in=stale).values_list("location_id", "pk"))
+    sync_festival_facets(pk for _, pk in users)
+    if stale:
+        request_purge([LIST_KEY, DETAIL_KEY])
+    record(ChangeLog.Kind.LOCATION, ChangeLog.Action.SAVE, users)
+    return len(stale)
+
+
+@register("festival_facets", Festival.objects.all(), "Recompute facet memberships and counts of every festival.")
+def sync_facets(chunk):
+    sync_festival_facets(list(chunk.values_list("pk", flat=True)))
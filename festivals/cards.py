@@ -0,0 +1,51 @@
+"""Compact read-only festival rows for card lists.
+
+Cards expose the same attribute names the templates already use on
+``Festival`` (``pk``, ``title``, dates, ``place``, ``organizer``, ``host``) but
+are built from a narrow ``values_list`` plus one role query per page instead
+of full model instances with per-card role lookups.
+"""
+from __future__ import annotations
+
+from typing import Iterable, List
+
+from .models import FestivalOrganization
+
+CARD_COLUMNS = ("pk", "title", "start_date", "end_date", "location__name")
+ROLE_ATTRIBUTES = {
+    FestivalOrganization.Role.ORGANIZER: "organizer",
+    FestivalOrganization.Role.HOST: "host",
+}
+
+
+class FestivalCard:
+    __slots__ = ("pk", "title", "start_date", "end_date", "place", "organizer", "host")
+
+    def __init__(self, pk, title, start_date, end_date, place):
+        self.pk = pk
+        self.title = title
+        self.start_date = start_date
+        self.end_date = end_date
+        self.place = place or ""
+        self.organizer = ""
+        self.host = ""
+
+    def __repr__(self):
+        return f"<FestivalCard {self.pk}: {self.title}>"
+
+
+def card_rows(queryset):
+    """Narrow a festival queryset to the columns a card needs."""
+    return queryset.values_list(*CARD_COLUMNS)
+
+
+def to_cards(rows: Iterable[tuple]) -> List[FestivalCard]:
+    cards = [FestivalCard(*row) for row in rows]
+    by_pk = {card.pk: card for card in cards}
+    if by_pk:
+        roles = FestivalOrganization.objects.filter(
+            festival_id__in=list(by_pk), role__in=list(ROLE_ATTRIBUTES)
+        ).values_list("festival_id", "role", "organization__name")
+        for festival_id, role, name in roles:
+            setattr(by_pk[festival_id], ROLE_ATTRIBUTES[role], name)
+    return cards
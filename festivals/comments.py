@@ -0,0 +1,159 @@
+"""Rate-limited, write-coalescing comment submission.
+
+Accepted comments are queued in process memory and written by a background
+thread in small ``bulk_create`` batches, so a burst of comments takes SQLite's
+writer lock once per batch instead of once per POST. Queued comments of this
+process are merged into the detail page until they are written.
+
+Rate limits are token buckets kept in the ``FESTIVAL_RATE_LIMIT_CACHE`` backend,
+one per client IP and one per nickname. Every worker must see the same buckets,
+so that cache has to be shared (a file cache on one host, Redis/Memcached across
+hosts). A bucket is read and written without a lock, so simultaneous requests of
+one client may each take the same last token; the overdraw is bounded by the
+number of requests in flight.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from typing import List
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .edge_cache import festival_key, request_purge
+from .metrics import comment_batches, comments_rejected, comments_submitted, comments_written
+from .models import ChangeLog, Comment
+from .outbox import record
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """``capacity`` requests at once, refilled at ``capacity / period`` per second."""
+
+    def __init__(self, prefix: str, capacity: int, period: float):
+        self.prefix = prefix
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.period = period
+
+    def take(self, key: str, now=None) -> bool:
+        cache = caches[getattr(settings, "FESTIVAL_RATE_LIMIT_CACHE", "default")]
+        now = time.time() if now is None else now
+        cache_key = f"{self.prefix}:{key}"
+        tokens, updated = cache.get(cache_key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        cache.set(cache_key, (tokens, now), timeout=int(self.period) + 1)
+        return allowed
+
+
+def client_ip(request) -> str:
+    """Client address as recorded by the outermost of ``FESTIVAL_TRUSTED_PROXY_HOPS`` proxies.
+
+    Each trusted proxy appends the address it received the request from to
+    X-Forwarded-For; anything further left was sent by the client and is ignored.
+    """
+    hops = getattr(settings, "FESTIVAL_TRUSTED_PROXY_HOPS", 0)
+    if hops:
+        forwarded = [a.strip() for a in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if a.strip()]
+        if forwarded:
+            return forwarded[-min(hops, len(forwarded))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def comment_allowed(request, nickname: str) -> bool:
+    """Consume one token from both the client's IP and nickname buckets."""
+    capacity, period = getattr(settings, "FESTIVAL_COMMENT_RATE", (5, 60))
+    by_ip = TokenBucket("comment-ip", capacity, period).take(client_ip(request))
+    by_nickname = TokenBucket("comment-nick", capacity, period).take(nickname.casefold())
+    if not (by_ip and by_nickname):
+        comments_rejected.inc()
+        return False
+    return True
+
+
+class CommentBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._queue: List[Comment] = []
+        self._worker = None
+
+    def submit(self, comment: Comment):
+        """Queue an unsaved comment; with a zero interval it is written right away.
+
+        ``created_at`` is shown while queued and restamped when the batch is written.
+        """
+        comment.created_at = timezone.now()
+        with self._lock:
+            self._queue.append(comment)
+            size = len(self._queue)
+        comments_submitted.inc()
+        interval = getattr(settings, "FESTIVAL_COMMENT_FLUSH_INTERVAL", 1.0)
+        if not interval:
+            self.flush()
+            return
+        self._ensure_worker()
+        if size >= getattr(settings, "FESTIVAL_COMMENT_BATCH_SIZE", 50):
+            self._wakeup.set()
+
+    def pending_for(self, festival_id: int) -> List[Comment]:
+        """Queued comments of one festival, newest first like ``Comment.Meta.ordering``."""
+        with self._lock:
+            return [c for c in reversed(self._queue) if c.festival_id == festival_id]
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def flush(self) -> int:
+        with self._lock:
+            batch, self._queue = self._queue, []
+        if not batch:
+            return 0
+        try:
+            with transaction.atomic():
+                Comment.objects.bulk_create(batch, batch_size=getattr(settings, "FESTIVAL_COMMENT_BATCH_SIZE", 50))
+                # bulk_create skips signals, so cached detail pages are purged here.
+                request_purge(festival_key(pk) for pk in {c.festival_id for c in batch})
+                record(ChangeLog.Kind.COMMENT, ChangeLog.Action.SAVE, [(c.pk, c.festival_id) for c in batch])
+        except Exception:
+            with self._lock:
+                self._queue[:0] = batch
+            raise
+        comments_written.inc(len(batch))
+        comment_batches.observe(len(batch))
+        return len(batch)
+
+    def discard(self):
+        with self._lock:
+            self._queue.clear()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name="comment-writer", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(getattr(settings, "FESTIVAL_COMMENT_FLUSH_INTERVAL", 1.0) or 1.0)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Comment flush failed; %d comments stay queued", self.pending())
+                time.sleep(1)
+
+
+comment_buffer = CommentBuffer()
+atexit.register(comment_buffer.flush)
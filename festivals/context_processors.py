@@ -0,0 +1,6 @@
+from .edge_cache import is_public_request
+
+
+def public_page(request):
+    """Templates skip per-user state (user, messages, CSRF) when this is true."""
+    return {"public_page": is_public_request(request)}
@@ -0,0 +1,85 @@
+"""Parallel decoding and normalization of large CSV files.
+
+The file is split into byte ranges that end on record boundaries (a newline
+outside quotes, found by quote parity, so quoted multi-line fields stay whole).
+A process pool decodes and normalizes the ranges while the caller consumes the
+results strictly in file order, so upserts stay deterministic. Only a few
+ranges per worker are in flight at a time to bound memory when the writer is
+slower than the parsers.
+
+Ranges are parsed in ``workers.spawn_pool`` processes, so models are imported
+lazily.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+from .workers import spawn_pool
+
+CHUNK_BYTES = 4 << 20
+IN_FLIGHT_PER_WORKER = 2
+
+
+def read_header(path) -> Tuple[List[str], int]:
+    """Column names and the byte offset where the first record starts."""
+    with open(path, "rb") as f:
+        line = f.readline()
+        return next(csv.reader([line.decode("utf-8-sig")])), f.tell()
+
+
+def record_ranges(path, start: int, chunk_bytes: Optional[int] = None) -> List[Tuple[int, int]]:
+    """``(start, end)`` byte ranges of about ``chunk_bytes`` ending on record boundaries."""
+    chunk_bytes = chunk_bytes or CHUNK_BYTES
+    ranges = []
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        while start < size:
+            f.seek(start)
+            data = f.read(chunk_bytes)
+            end = start + len(data)
+            quotes = data.count(b'"')
+            # Extend to the end of the line, and further while inside a quoted field.
+            if end < size and (quotes % 2 or not data.endswith(b"\n")):
+                for line in iter(f.readline, b""):
+                    end += len(line)
+                    quotes += line.count(b'"')
+                    if quotes % 2 == 0:
+                        break
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_range(path, fieldnames: List[str], start: int, end: int, keep_rows: bool = True):
+    """Decode and normalize one byte range; returns ``(rows or None, records)``."""
+    from .normalize import normalize_rows
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    rows = list(csv.DictReader(io.StringIO(text, newline=""), fieldnames=fieldnames))
+    return (rows if keep_rows else None), normalize_rows(rows)
+
+
+def parse_parallel(
+    path, workers: int, chunk_bytes: Optional[int] = None, keep_rows: bool = True
+) -> Iterator[Tuple[Optional[List[dict]], List[Optional[dict]]]]:
+    """Yield ``(rows, records)`` per byte range in file order, parsed by ``workers`` processes."""
+    fieldnames, start = read_header(path)
+    ranges = deque(record_ranges(path, start, chunk_bytes))
+    path = os.fspath(path)
+    with spawn_pool(workers) as pool:
+        pending = deque()
+        try:
+            while ranges or pending:
+                while ranges and len(pending) < workers * IN_FLIGHT_PER_WORKER:
+                    begin, end = ranges.popleft()
+                    pending.append(pool.submit(parse_range, path, fieldnames, begin, end, keep_rows))
+                yield pending.popleft().result()
+        finally:
+            for future in pending:  # the caller stopped early (--limit) or failed
+                future.cancel()
@@ -0,0 +1,216 @@
+"""Cross-source duplicate festival detection and merging.
+
+CSV rows are keyed on ``title-start_date`` and API rows on the IFAC ``idx``, so
+the same festival can exist once per source. Candidates are found by blocking
+instead of comparing every pair: each festival is put into the LSH buckets of
+a small MinHash over its normalized title bigrams, oversized buckets are cut
+into date-ordered windows, and only festivals sharing a block are scored. A pair
+is a duplicate when its title Jaccard similarity reaches the threshold and its
+dates and regions (where both sides know them) agree.
+"""
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import combinations
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .edge_cache import DETAIL_KEY, LIST_KEY, request_purge
+from .facets import sync_festival_facets
+from .models import Comment, Festival, FestivalOrganization
+from .outbox import Action, Kind, record, record_festivals
+from .popularity import merge_scores
+from .similarity import minhash, normalize_text, shingles
+
+NUM_PERM = 12
+BANDS = 4
+ROWS = NUM_PERM // BANDS
+MAX_BLOCK = 100
+WINDOW = 20
+DATE_TOLERANCE = timedelta(days=31)
+THRESHOLD = 0.75
+CHUNK_SIZE = 5000
+# Fields copied from a merged duplicate when the surviving row has no value.
+FILL_FIELDS = ("description", "telephone", "homepage", "extra_info", "start_date", "end_date", "location_id")
+# CSV rows carry dates and locations, API rows only text, so CSV rows survive first.
+SURVIVOR_ORDER = {Festival.Source.CSV: 0, Festival.Source.API: 1, Festival.Source.MANUAL: 2}
+
+_TITLE_NOISE = re.compile(r"제\s*\d+\s*회|\d+\s*(?:년|회|th|st|nd|rd)?", re.IGNORECASE)
+_TEXT_DATE = re.compile(r"(\d{4})\s*[.\-/년]\s*(\d{1,2})\s*[.\-/월]\s*(\d{1,2})")
+
+
+class Entry:
+    __slots__ = ("pk", "source", "title", "shingles", "start", "sido")
+
+    def __init__(self, pk, source, title, start, sido):
+        self.pk = pk
+        self.source = source
+        self.title = title
+        self.shingles = shingles(normalize_title(title), sizes=(2,))
+        self.start = start
+        self.sido = sido or ""
+
+    def __repr__(self):
+        return f"<Entry {self.pk} {self.source}: {self.title}>"
+
+
+def normalize_title(title: str) -> str:
+    """Drop years and edition numbers ("제10회", "2025") that differ between sources."""
+    return normalize_text(_TITLE_NOISE.sub(" ", title or ""))
+
+
+def _first_text_date(text: str) -> Optional[date]:
+    match = _TEXT_DATE.search(text or "")
+    if not match:
+        return None
+    try:
+        return date(*(int(part) for part in match.groups()))
+    except ValueError:
+        return None
+
+
+def load_entries(queryset=None) -> List[Entry]:
+    """Active, unmerged festivals; API rows without dates use the first date in their period text."""
+    queryset = queryset if queryset is not None else Festival.objects.all()
+    rows = (
+        queryset.filter(is_active=True, merged_into__isnull=True)
+        .order_by("pk")
+        .values_list("pk", "source", "title", "start_date", "location__sido", "extra_info")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    return [Entry(pk, source, title, start or _first_text_date(extra), sido) for pk, source, title, start, sido, extra in rows]
+
+
+def blocks(entries: Iterable[Entry]) -> Iterator[List[Entry]]:
+    buckets: Dict[Tuple, List[Entry]] = defaultdict(list)
+    for entry in entries:
+        if not entry.shingles:
+            continue
+        signature = minhash(entry.shingles, num_perm=NUM_PERM)
+        for band in range(BANDS):
+            buckets[(band, signature[band * ROWS : (band + 1) * ROWS])].append(entry)
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        if len(members) <= MAX_BLOCK:
+            yield members
+            continue
+        # Sorted neighbourhood: overlapping windows over the block ordered by start date,
+        # so generic titles only meet festivals held around the same time. Region is not
+        # used here because API rows have none.
+        members.sort(key=lambda e: (e.start or date.max, e.title))
+        for start in range(0, len(members) - 1, WINDOW // 2):
+            yield members[start : start + WINDOW]
+
+
+def score_pair(a: Entry, b: Entry, threshold: float = THRESHOLD) -> Optional[float]:
+    if a.start and b.start and abs(a.start - b.start) > DATE_TOLERANCE:
+        return None
+    if a.sido and b.sido and a.sido != b.sido:
+        return None
+    similarity = len(a.shingles & b.shingles) / len(a.shingles | b.shingles)
+    return similarity if similarity >= threshold else None
+
+
+class DuplicateReport:
+    def __init__(self):
+        self.entries = 0
+        self.compared = 0
+        self.clusters: List[List[Entry]] = []
+        self.scores: Dict[Tuple[int, int], float] = {}
+
+
+def find_duplicates(entries: List[Entry], threshold: float = THRESHOLD, any_source: bool = False) -> DuplicateReport:
+    """Cluster duplicate candidates; without ``any_source`` a cluster holds at most one row per source."""
+    report = DuplicateReport()
+    report.entries = len(entries)
+    seen: Set[Tuple[int, int]] = set()
+    matches = []
+    for block in blocks(entries):
+        for a, b in combinations(block, 2):
+            if not any_source and a.source == b.source:
+                continue
+            key = (a.pk, b.pk) if a.pk < b.pk else (b.pk, a.pk)
+            if key in seen:
+                continue
+            seen.add(key)
+            score = score_pair(a, b, threshold)
+            if score is not None:
+                matches.append((score, a, b))
+    report.compared = len(seen)
+
+    # Greedy union-find from the best pairs down. Two rows from one source never
+    # join a cluster (the same title in different years is not a duplicate).
+    parent: Dict[int, int] = {}
+    members: Dict[int, List[Entry]] = {}
+
+    def find(pk):
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    for score, a, b in sorted(matches, key=lambda m: (-m[0], m[1].pk, m[2].pk)):
+        for entry in (a, b):
+            if entry.pk not in parent:
+                parent[entry.pk] = entry.pk
+                members[entry.pk] = [entry]
+        root_a, root_b = find(a.pk), find(b.pk)
+        if root_a == root_b:
+            continue
+        if not any_source and {e.source for e in members[root_a]} & {e.source for e in members[root_b]}:
+            continue
+        parent[root_b] = root_a
+        members[root_a].extend(members.pop(root_b))
+        report.scores[(a.pk, b.pk)] = score
+    clusters = (sorted(group, key=lambda e: e.pk) for group in members.values() if len(group) > 1)
+    report.clusters = sorted(clusters, key=lambda group: group[0].pk)
+    return report
+
+
+def choose_survivor(cluster: List[Entry]) -> Entry:
+    return min(cluster, key=lambda e: (SURVIVOR_ORDER.get(e.source, 9), e.pk))
+
+
+def merge_cluster(cluster: List[Entry]) -> int:
+    """Fold duplicates into the survivor: fill blanks, move comments, copy missing roles, hide the rest."""
+    survivor_entry = choose_survivor(cluster)
+    loser_ids = [e.pk for e in cluster if e.pk != survivor_entry.pk]
+    now = timezone.now()
+    with transaction.atomic():
+        survivor = Festival.objects.select_for_update().get(pk=survivor_entry.pk)
+        losers = list(Festival.objects.filter(pk__in=loser_ids).order_by("pk"))
+        for loser in losers:
+            for field in FILL_FIELDS:
+                if not getattr(survivor, field) and getattr(loser, field):
+                    setattr(survivor, field, getattr(loser, field))
+            survivor.view_count += loser.view_count
+            survivor.popularity = merge_scores(survivor.popularity, loser.popularity)
+        survivor.save()
+
+        moved = list(Comment.objects.filter(festival_id__in=loser_ids).values_list("pk", flat=True))
+        Comment.objects.filter(pk__in=moved).update(festival=survivor)
+        roles = set(FestivalOrganization.objects.filter(festival=survivor).values_list("role", flat=True))
+        copies = []
+        for link in FestivalOrganization.objects.filter(festival_id__in=loser_ids).order_by("festival_id", "pk"):
+            if link.role not in roles:
+                roles.add(link.role)
+                copies.append(FestivalOrganization(festival=survivor, organization_id=link.organization_id, role=link.role))
+        FestivalOrganization.objects.bulk_create(copies)
+
+        repointed = list(Festival.objects.filter(merged_into_id__in=loser_ids).values_list("pk", flat=True))
+        Festival.objects.filter(Q(pk__in=loser_ids) | Q(merged_into_id__in=loser_ids)).update(
+            is_active=False, merged_into=survivor, updated_at=now
+        )
+        # Queryset updates skip signals; keep derived data and shared caches in step.
+        sync_festival_facets([survivor.pk, *loser_ids])
+        record_festivals([*loser_ids, *repointed])
+        record(Kind.COMMENT, Action.SAVE, [(pk, survivor.pk) for pk in moved])
+        record(Kind.ROLE, Action.SAVE, [(copy.pk, survivor.pk) for copy in copies])
+        request_purge([LIST_KEY, DETAIL_KEY])
+    return len(loser_ids)
@@ -0,0 +1,101 @@
+"""Shared-cache (nginx/CDN) support for anonymous read pages.
+
+A GET without a session cookie is rendered without any per-user state: no
+CSRF token, no flash messages and no ``request.user`` lookups. Such responses
+get ``Cache-Control: public, s-maxage=...`` plus surrogate keys, and write
+paths purge those keys once their transaction commits.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from functools import partial, wraps
+from typing import Iterable
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+
+logger = logging.getLogger(__name__)
+
+LIST_KEY = "festival-list"
+DETAIL_KEY = "festival-detail"
+
+_pending = threading.local()
+
+
+def festival_key(pk) -> str:
+    return f"festival-{pk}"
+
+
+def is_public_request(request) -> bool:
+    """Anonymous read that can be served from a shared cache."""
+    return request.method in ("GET", "HEAD") and settings.SESSION_COOKIE_NAME not in request.COOKIES
+
+
+def _touched_user_state(request, response) -> bool:
+    session = getattr(request, "session", None)
+    return bool(
+        response.cookies
+        or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        or (session is not None and session.accessed)
+    )
+
+
+def public_cache(surrogate_keys):
+    """Mark anonymous responses of a view as shared-cacheable under the given keys.
+
+    ``surrogate_keys(request, *args, **kwargs)`` returns the keys to tag the page with.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or not is_public_request(request) or _touched_user_state(request, response):
+                patch_cache_control(response, private=True)
+                return response
+            patch_cache_control(
+                response,
+                public=True,
+                max_age=getattr(settings, "FESTIVAL_PUBLIC_MAX_AGE", 0),
+                s_maxage=getattr(settings, "FESTIVAL_PUBLIC_S_MAXAGE", 300),
+            )
+            header = getattr(settings, "FESTIVAL_SURROGATE_KEY_HEADER", "Surrogate-Key")
+            response[header] = " ".join(surrogate_keys(request, *args, **kwargs))
+            return response
+
+        return wrapped
+
+    return decorator
+
+
+def purge_surrogate_keys(keys: Iterable[str]):
+    """Ask the shared cache to drop every page tagged with ``keys``."""
+    keys = sorted(set(keys))
+    url = getattr(settings, "FESTIVAL_PURGE_URL", "")
+    if not keys or not url:
+        return
+    header = getattr(settings, "FESTIVAL_SURROGATE_KEY_HEADER", "Surrogate-Key")
+    try:
+        requests.request("PURGE", url, headers={header: " ".join(keys)}, timeout=2)
+    except requests.RequestException:
+        logger.warning("Surrogate key purge failed for %s", keys, exc_info=True)
+
+
+def request_purge(keys: Iterable[str]):
+    """Queue keys for purging after the current transaction commits.
+
+    All requests made inside one transaction share a single purge call; outside
+    a transaction the purge happens immediately.
+    """
+    connection = transaction.get_connection()
+    batch = getattr(_pending, "batch", None)
+    if batch is not None and any(entry[1] is batch[1] for entry in connection.run_on_commit):
+        batch[0].update(keys)
+        return
+    pending = set(keys)
+    callback = partial(purge_surrogate_keys, pending)
+    _pending.batch = (pending, callback)
+    transaction.on_commit(callback)
@@ -0,0 +1,218 @@
+"""Festival list facets backed by incrementally maintained counts.
+
+Every festival owns a set of ``FestivalFacet`` rows. Whenever a festival, its
+location or its roles change, the new set is diffed against the stored one and
+only the difference is applied to ``FacetCount``, so the list page reads counts
+without any ``GROUP BY``.
+"""
+from __future__ import annotations
+
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .maptiles import remove_map_points, sync_map_points
+from .models import FacetCount, Festival, FestivalFacet, FestivalOrganization
+
+FACETS = ("sido", "sigungu", "organizer", "month", "status")
+STATUS_LABELS = {"ongoing": "진행 중", "upcoming": "예정", "past": "종료"}
+ORGANIZER_FACET_LIMIT = 10
+MONTH_FACET_LIMIT = 12
+BATCH_SIZE = 500
+
+_state = threading.local()
+
+
+def festival_status(start: Optional[date], end: Optional[date], today: date) -> str:
+    if not start:
+        return ""
+    if start > today:
+        return "upcoming"
+    if (end or start) < today:
+        return "past"
+    return "ongoing"
+
+
+def _facet_keys(festival_ids) -> Dict[int, Set[Tuple[str, str]]]:
+    today = timezone.localdate()
+    keys: Dict[int, Set[Tuple[str, str]]] = {pk: set() for pk in festival_ids}
+    rows = Festival.objects.filter(pk__in=festival_ids, is_active=True).values_list(
+        "pk", "start_date", "end_date", "location__sido", "location__sigungu"
+    )
+    active = set()
+    for pk, start, end, sido, sigungu in rows:
+        active.add(pk)
+        if sido:
+            keys[pk].add(("sido", sido))
+            if sigungu:
+                keys[pk].add(("sigungu", f"{sido} {sigungu}"))
+        if start:
+            keys[pk].add(("month", start.strftime("%Y-%m")))
+            keys[pk].add(("status", festival_status(start, end, today)))
+    organizers = FestivalOrganization.objects.filter(
+        festival_id__in=active, role=FestivalOrganization.Role.ORGANIZER
+    ).values_list("festival_id", "organization__name")
+    for pk, name in organizers:
+        keys[pk].add(("organizer", name))
+    return keys
+
+
+def _apply_deltas(deltas: Counter):
+    for (facet, value), delta in deltas.items():
+        if not delta:
+            continue
+        updated = FacetCount.objects.filter(facet=facet, value=value).update(count=F("count") + delta)
+        if not updated and delta > 0:
+            FacetCount.objects.create(facet=facet, value=value, count=delta)
+    if any(delta < 0 for delta in deltas.values()):
+        FacetCount.objects.filter(count__lte=0).delete()
+
+
+def sync_festival_facets(festival_ids: Iterable[int]):
+    """Bring facet memberships and counts of the given festivals up to date."""
+    ids = sorted({pk for pk in festival_ids if pk is not None})
+    for start in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[start : start + BATCH_SIZE]
+        wanted = _facet_keys(chunk)
+        current = defaultdict(set)
+        stored = {}
+        for row_id, pk, facet, value in FestivalFacet.objects.filter(festival_id__in=chunk).values_list(
+            "id", "festival_id", "facet", "value"
+        ):
+            current[pk].add((facet, value))
+            stored[(pk, facet, value)] = row_id
+
+        deltas = Counter()
+        stale_rows = []
+        new_rows = []
+        for pk in chunk:
+            for key in current[pk] - wanted[pk]:
+                deltas[key] -= 1
+                stale_rows.append(stored[(pk, *key)])
+            for key in wanted[pk] - current[pk]:
+                deltas[key] += 1
+                new_rows.append(FestivalFacet(festival_id=pk, facet=key[0], value=key[1]))
+        if stale_rows:
+            FestivalFacet.objects.filter(pk__in=stale_rows).delete()
+        FestivalFacet.objects.bulk_create(new_rows, batch_size=BATCH_SIZE)
+        _apply_deltas(deltas)
+    # Map clusters derive from the same festival/location rows; keep them in step.
+    sync_map_points(ids)
+
+
+def remove_festival_facets(festival_ids: Iterable[int]):
+    """Drop the contribution of festivals that are about to be deleted."""
+    festival_ids = list(festival_ids)
+    rows = FestivalFacet.objects.filter(festival_id__in=festival_ids)
+    deltas = Counter({key: -n for key, n in Counter(rows.values_list("facet", "value")).items()})
+    rows.delete()
+    _apply_deltas(deltas)
+    remove_map_points(festival_ids)
+
+
+def rebuild_facets():
+    """Recompute every membership and count from scratch (also refreshes time-based status)."""
+    FestivalFacet.objects.all().delete()
+    FacetCount.objects.all().delete()
+    totals = Counter()
+    ids = list(Festival.objects.filter(is_active=True).values_list("pk", flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        keys = _facet_keys(ids[start : start + BATCH_SIZE])
+        rows = [FestivalFacet(festival_id=pk, facet=f, value=v) for pk, pairs in keys.items() for f, v in pairs]
+        FestivalFacet.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        totals.update((row.facet, row.value) for row in rows)
+    FacetCount.objects.bulk_create(
+        [FacetCount(facet=f, value=v, count=n) for (f, v), n in totals.items()], batch_size=BATCH_SIZE
+    )
+
+
+@contextmanager
+def deferred_facet_sync():
+    """Collect festival ids touched inside the block and sync them once on exit."""
+    outer = getattr(_state, "pending", None)
+    if outer is not None:
+        yield
+        return
+    _state.pending = set()
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+    sync_festival_facets(pending)
+
+
+def request_facet_sync(festival_ids: Iterable[int]):
+    pending = getattr(_state, "pending", None)
+    if pending is not None:
+        pending.update(festival_ids)
+    else:
+        sync_festival_facets(festival_ids)
+
+
+def facet_counts(selected_sido: str = "") -> Dict[str, list]:
+    counts = {}
+    for facet in ("sido", "status"):
+        counts[facet] = list(FacetCount.objects.filter(facet=facet).order_by("-count", "value").values_list("value", "count"))
+    counts["status"] = [(value, STATUS_LABELS.get(value, value), n) for value, n in counts["status"]]
+    counts["sigungu"] = []
+    if selected_sido:
+        prefix = f"{selected_sido} "
+        counts["sigungu"] = [
+            (value[len(prefix) :], n)
+            for value, n in FacetCount.objects.filter(facet="sigungu", value__startswith=prefix)
+            .order_by("-count", "value")
+            .values_list("value", "count")
+        ]
+    counts["organizer"] = list(
+        FacetCount.objects.filter(facet="organizer").order_by("-count", "value").values_list("value", "count")[
+            :ORGANIZER_FACET_LIMIT
+        ]
+    )
+    counts["month"] = list(
+        FacetCount.objects.filter(facet="month").order_by("-value").values_list("value", "count")[:MONTH_FACET_LIMIT]
+    )
+    return counts
+
+
+def apply_facet_filters(queryset, params):
+    """Filter a festival queryset by the facet parameters; returns (queryset, selected)."""
+    selected = {name: (params.get(name) or "").strip() for name in FACETS}
+    if selected["sido"]:
+        queryset = queryset.filter(location__sido=selected["sido"])
+        if selected["sigungu"]:
+            queryset = queryset.filter(location__sigungu=selected["sigungu"])
+    else:
+        selected["sigungu"] = ""
+    if selected["organizer"]:
+        queryset = queryset.filter(
+            organizations__role=FestivalOrganization.Role.ORGANIZER,
+            organizations__organization__name=selected["organizer"],
+        )
+    if selected["month"]:
+        try:
+            first = date(int(selected["month"][:4]), int(selected["month"][5:7]), 1)
+        except ValueError:
+            selected["month"] = ""
+        else:
+            following = (first + timedelta(days=31)).replace(day=1)
+            queryset = queryset.filter(start_date__gte=first, start_date__lt=following)
+    status = selected["status"]
+    today = timezone.localdate()
+    # Same rules as festival_status(); a missing end date means a one-day festival.
+    if status == "upcoming":
+        queryset = queryset.filter(start_date__gt=today)
+    elif status == "past":
+        queryset = queryset.filter(Q(end_date__lt=today) | Q(end_date__isnull=True, start_date__lt=today))
+    elif status == "ongoing":
+        queryset = queryset.filter(
+            Q(start_date__lte=today), Q(end_date__gte=today) | Q(end_date__isnull=True, start_date=today)
+        )
+    else:
+        selected["status"] = ""
+    return queryset, selected
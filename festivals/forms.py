@@ -1,6 +1,6 @@
 from django import forms
 
-from .models import Comment, Festival, FestivalOrganization, Location, Organization
+from .models import Comment, Festival, FestivalOrganization, IngestRun, Location, Organization
 
 
 class CommentForm(forms.ModelForm):
@@ -122,3 +122,31 @@ class FestivalForm(forms.ModelForm):
         self._set_org_role(festival, FestivalOrganization.Role.HOST, self.cleaned_data.get("host", ""))
         self._set_org_role(festival, FestivalOrganization.Role.SPONSOR, self.cleaned_data.get("sponsor", ""))
         return festival
+
+
+class ImportJobForm(forms.Form):
+    source = forms.ChoiceField(choices=IngestRun.Source.choices, label="가져올 데이터")
+    csv_file = forms.FileField(required=False, label="CSV 파일")
+    reconcile = forms.BooleanField(
+        required=False, label="전체 스냅샷으로 동기화", help_text="파일에 없는 축제는 비활성화합니다."
+    )
+    pages = forms.IntegerField(required=False, min_value=1, label="API 페이지 수", help_text="비워 두면 전체 페이지")
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get("source") != IngestRun.Source.CSV:
+            cleaned["csv_file"] = None  # a file picked before switching to the API is not stored
+        else:
+            upload = cleaned.get("csv_file")
+            if upload is None:
+                self.add_error("csv_file", "CSV 파일을 선택해 주세요.")
+            elif not upload.name.lower().endswith(".csv"):
+                self.add_error("csv_file", "CSV(.csv) 파일만 올릴 수 있습니다.")
+        return cleaned
+
+    def job_options(self) -> dict:
+        """Command options of the job; passed to call_command by the worker."""
+        if self.cleaned_data["source"] == IngestRun.Source.CSV:
+            return {"reconcile": self.cleaned_data.get("reconcile", False)}
+        pages = self.cleaned_data.get("pages")
+        return {"pages": pages} if pages else {}
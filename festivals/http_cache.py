@@ -0,0 +1,60 @@
+"""On-disk cache of API pages keyed by request parameters (never the API key)."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from django.utils import timezone
+
+SECRET_PARAMS = {"apiKey"}
+
+
+class ResponseCache:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    @staticmethod
+    def cache_params(params) -> Dict[str, str]:
+        return {k: str(v) for k, v in sorted(params.items()) if k not in SECRET_PARAMS}
+
+    def key(self, params) -> str:
+        payload = json.dumps(self.cache_params(params), sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, params) -> Path:
+        return self.directory / f"{self.key(params)}.json"
+
+    def load(self, params) -> Optional[dict]:
+        try:
+            with open(self.path(params), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def store(self, params, response):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "params": self.cache_params(params),
+            "text": response.text,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": timezone.now().isoformat(),
+        }
+        target = self.path(params)
+        tmp = target.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, target)
+
+    @staticmethod
+    def validators(entry) -> Dict[str, str]:
+        """Conditional request headers for revalidating a cached entry."""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
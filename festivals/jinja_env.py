@@ -0,0 +1,47 @@
+"""Environment of the optional Jinja2 backend (``FESTIVAL_JINJA2``).
+
+``jinja2/`` holds Jinja2 versions of the list and detail pages (with the base
+layout and card they use) that render byte-for-byte the same HTML as
+``templates/``: printed values are localized the way Django's ``{{ }}`` does,
+and the Django filters and tags those pages use are exposed under the same
+names. Every other template is still found by the Django engine.
+"""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from django.template import defaultfilters, defaulttags
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.timezone import template_localtime
+from jinja2 import Environment, pass_context
+
+
+def _finalize(value):
+    return localize(template_localtime(value))
+
+
+def url(name, *args):
+    return reverse(name, args=args)
+
+
+@pass_context
+def querystring(context, **kwargs):
+    """``{% querystring %}`` on the request's GET parameters."""
+    return defaulttags.querystring(SimpleNamespace(request=context["request"]), **kwargs)
+
+
+def date(value, arg=None):
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+def linebreaksbr(value):
+    return defaultfilters.linebreaksbr(value, autoescape=True)
+
+
+def environment(**options):
+    env = Environment(finalize=_finalize, keep_trailing_newline=True, **options)
+    env.globals.update(url=url, static=static, querystring=querystring)
+    env.filters.update(date=date, linebreaksbr=linebreaksbr)
+    return env
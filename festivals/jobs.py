@@ -0,0 +1,164 @@
+"""DB-backed queue of ingest jobs started from the staff import page.
+
+Web requests only store the upload and insert a queued ``ImportJob``; a
+``run_import_jobs`` worker claims jobs oldest first and runs the existing ingest
+command for them. The partial unique constraint on running jobs is the
+per-source lock: claiming a second CSV (or API) job while one runs violates it,
+so concurrent workers never run two imports of the same source. The commands
+report progress after every committed batch through ``on_progress``, which
+also raises ``ImportCancelled`` once staff asked to cancel; the batches written
+so far stay committed.
+
+Uploads are removed when their job completes or is cancelled; failed jobs keep
+theirs for inspection until ``sweep_uploads`` (run by the worker whenever the
+queue is empty) removes them after ``FESTIVAL_IMPORT_UPLOAD_RETENTION_DAYS``,
+together with stray files no job refers to.
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ImportJob, IngestRun
+
+logger = logging.getLogger(__name__)
+
+COMMANDS = {
+    IngestRun.Source.CSV: "load_festivals_from_csv",
+    IngestRun.Source.API: "fetch_festivals",
+}
+OUTPUT_LIMIT = 4000  # characters of command output kept on the job
+
+Status = ImportJob.Status
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+def upload_dir() -> Path:
+    return Path(getattr(settings, "FESTIVAL_IMPORT_UPLOAD_DIR", "imports"))
+
+
+def store_upload(uploaded) -> str:
+    """Write an uploaded CSV file to the import directory in chunks; returns its path."""
+    directory = upload_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{uuid.uuid4().hex}.csv"
+    with open(path, "wb") as f:
+        for chunk in uploaded.chunks():
+            f.write(chunk)
+    return str(path)
+
+
+def enqueue(source: str, options: Optional[dict] = None, upload_path: str = "", user=None) -> ImportJob:
+    return ImportJob.objects.create(
+        source=source, options=options or {}, upload_path=upload_path, requested_by=user if user and user.pk else None
+    )
+
+
+def cancel(job: ImportJob) -> bool:
+    """Cancel a queued job right away, or ask the worker to stop a running one after its current batch."""
+    now = timezone.now()
+    if ImportJob.objects.filter(pk=job.pk, status=Status.QUEUED).update(
+        status=Status.CANCELLED, finished_at=now, updated_at=now
+    ):
+        if job.upload_path:
+            Path(job.upload_path).unlink(missing_ok=True)
+        return True
+    return bool(ImportJob.objects.filter(pk=job.pk, status=Status.RUNNING).update(cancel_requested=True))
+
+
+def sweep_uploads(now=None) -> int:
+    """Delete uploads older than the retention period that no queued or running job needs; returns files removed."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=getattr(settings, "FESTIVAL_IMPORT_UPLOAD_RETENTION_DAYS", 7))
+    directory = upload_dir()
+    if not directory.is_dir():
+        return 0
+    needed = {
+        Path(path).resolve()
+        for path in ImportJob.objects.filter(status__in=[Status.QUEUED, Status.RUNNING])
+        .exclude(upload_path="")
+        .values_list("upload_path", flat=True)
+    }
+    removed = 0
+    for path in directory.glob("*.csv"):
+        try:
+            expired = path.stat().st_mtime < cutoff.timestamp()
+        except FileNotFoundError:
+            continue
+        if expired and path.resolve() not in needed:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def fail_stale(now=None) -> int:
+    """Release the lock of running jobs whose worker stopped reporting (crash, kill)."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=getattr(settings, "FESTIVAL_IMPORT_STALE_SECONDS", 1800))
+    return ImportJob.objects.filter(status=Status.RUNNING, updated_at__lt=cutoff).update(
+        status=Status.FAILED, error="작업자가 응답하지 않아 중단된 것으로 처리했습니다.", finished_at=now, updated_at=now
+    )
+
+
+def claim(sources: Optional[Iterable[str]] = None) -> Optional[ImportJob]:
+    """Mark the oldest runnable queued job as running and return it."""
+    fail_stale()
+    queued = ImportJob.objects.filter(status=Status.QUEUED).order_by("pk")
+    if sources:
+        queued = queued.filter(source__in=list(sources))
+    busy = ImportJob.objects.filter(status=Status.RUNNING).values_list("source", flat=True)
+    for job in queued.exclude(source__in=list(busy)):
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                claimed = ImportJob.objects.filter(pk=job.pk, status=Status.QUEUED).update(
+                    status=Status.RUNNING, started_at=now, updated_at=now
+                )
+        except IntegrityError:
+            continue  # another worker just started a job of this source
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run_job(job: ImportJob) -> ImportJob:
+    """Run the ingest command of a claimed job and record its outcome."""
+
+    def on_progress(done, total=None):
+        ImportJob.objects.filter(pk=job.pk).update(progress=done, total=total, updated_at=timezone.now())
+        if ImportJob.objects.filter(pk=job.pk, cancel_requested=True).exists():
+            raise ImportCancelled()
+
+    output = StringIO()
+    options = dict(job.options)
+    if job.upload_path:
+        options["path"] = job.upload_path
+    status, error = Status.COMPLETED, ""
+    try:
+        call_command(COMMANDS[job.source], stdout=output, stderr=output, on_progress=on_progress, **options)
+    except ImportCancelled:
+        status = Status.CANCELLED
+    except Exception as exc:
+        logger.exception("Import job #%s failed", job.pk)
+        status, error = Status.FAILED, f"{type(exc).__name__}: {exc}"
+    now = timezone.now()
+    ImportJob.objects.filter(pk=job.pk).update(
+        status=status, error=error, output=output.getvalue()[-OUTPUT_LIMIT:], finished_at=now, updated_at=now
+    )
+    if job.upload_path and status != Status.FAILED:
+        Path(job.upload_path).unlink(missing_ok=True)  # failed uploads stay for inspection
+    job.refresh_from_db()
+    return job
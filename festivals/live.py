@@ -0,0 +1,169 @@
+"""Live comment stream over Server-Sent Events, served straight from ASGI.
+
+Every process runs one ``CommentHub``. While anyone is listening it polls for
+comments with ``id > cursor`` once per interval, a single indexed query no
+matter how many festivals or connections are subscribed, and fans the rows out
+to per-connection queues. An idle listener is just a queue and a parked
+coroutine; the stream bypasses Django's middleware and holds no thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Comment, Festival
+
+STREAM_PATH = re.compile(r"^/festival/(?P<pk>\d+)/comments/stream/$")
+CATCH_UP_LIMIT = 50
+POLL_LIMIT = 500
+QUEUE_SIZE = 100
+
+
+def stream_url(pk: int) -> str:
+    return f"/festival/{pk}/comments/stream/"
+
+
+def comment_event(row: dict) -> bytes:
+    data = {
+        "id": row["id"],
+        "nickname": row["nickname"],
+        "content": row["content"],
+        "created_at": timezone.localtime(row["created_at"]).strftime("%Y-%m-%d %H:%M"),
+    }
+    return f"id: {row['id']}\nevent: comment\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def _comment_rows(queryset, limit: int) -> List[dict]:
+    return list(queryset.order_by("id").values("id", "festival_id", "nickname", "content", "created_at")[:limit])
+
+
+class CommentHub:
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._cursor: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, festival_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers[festival_id].add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, festival_id: int, queue: asyncio.Queue):
+        listeners = self._subscribers.get(festival_id)
+        if listeners is not None:
+            listeners.discard(queue)
+            if not listeners:
+                del self._subscribers[festival_id]
+
+    def listeners(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def _fetch(self, cursor: Optional[int]) -> Tuple[int, List[dict]]:
+        if cursor is None:
+            return Comment.objects.order_by("-id").values_list("id", flat=True).first() or 0, []
+        rows = _comment_rows(Comment.objects.filter(id__gt=cursor), POLL_LIMIT)
+        return (rows[-1]["id"] if rows else cursor), rows
+
+    async def poll_once(self) -> int:
+        """Fetch comments newer than the cursor and hand them to listeners; returns rows sent."""
+        self._cursor, rows = await sync_to_async(self._fetch)(self._cursor)
+        sent = 0
+        for row in rows:
+            for queue in self._subscribers.get(row["festival_id"], ()):
+                try:
+                    queue.put_nowait(row)
+                    sent += 1
+                except asyncio.QueueFull:
+                    pass  # a stalled client misses events and catches up via Last-Event-ID
+        return sent
+
+    async def _run(self):
+        # The cursor starts at the newest comment; earlier ones come from each stream's catch-up.
+        self._cursor = None
+        await self.poll_once()
+        while self._subscribers:
+            await asyncio.sleep(getattr(settings, "FESTIVAL_LIVE_POLL_INTERVAL", 1.0))
+            await self.poll_once()
+
+
+hub = CommentHub()
+
+
+def _last_seen(scope) -> Optional[int]:
+    headers = dict(scope.get("headers") or [])
+    value = headers.get(b"last-event-id", b"").decode("latin-1")
+    if not value:
+        value = (parse_qs(scope.get("query_string", b"").decode("latin-1")).get("after") or [""])[0]
+    return int(value) if value.isdigit() else None
+
+
+async def _disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def comment_stream(scope, receive, send, festival_id: int):
+    """ASGI handler for ``STREAM_PATH``."""
+    exists = await sync_to_async(Festival.objects.filter(pk=festival_id).exists)()
+    if scope["method"] != "GET" or not exists:
+        status = 405 if exists else 404
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        }
+    )
+    queue = hub.subscribe(festival_id)
+    disconnected = asyncio.ensure_future(_disconnect(receive))
+    try:
+        await send({"type": "http.response.body", "body": b": connected\n\n", "more_body": True})
+        last_seen = _last_seen(scope)
+        if last_seen is not None:
+            missed = await sync_to_async(_comment_rows)(
+                Comment.objects.filter(festival_id=festival_id, id__gt=last_seen), CATCH_UP_LIMIT
+            )
+            for row in missed:
+                await send({"type": "http.response.body", "body": comment_event(row), "more_body": True})
+                last_seen = row["id"]
+        else:
+            last_seen = 0
+
+        keepalive = getattr(settings, "FESTIVAL_LIVE_KEEPALIVE", 15)
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, disconnected}, timeout=keepalive, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                getter.cancel()
+                break
+            if getter in done:
+                row = getter.result()
+                if row["id"] <= last_seen:
+                    continue
+                last_seen = row["id"]
+                body = comment_event(row)
+            else:
+                getter.cancel()
+                body = b": keepalive\n\n"
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+    finally:
+        hub.unsubscribe(festival_id, queue)
+        disconnected.cancel()
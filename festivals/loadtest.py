@@ -0,0 +1,301 @@
+"""Concurrent virtual-user load generator for the festival pages.
+
+Each virtual user is a thread with its own cookie jar and client address that
+repeatedly picks a scenario by weight: browsing list pages, searching, opening
+a detail page or posting a comment (``/csrf/`` token, then POST). Requests go
+either straight into the project's WSGI application in this process or, with a
+base URL, over HTTP to a running server. Every request's latency and outcome is
+recorded per scenario; SQLite "database is locked" errors are told apart from
+other failures (in process through ``got_request_exception``, over HTTP from the
+error page text).
+"""
+from __future__ import annotations
+
+import io
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from http.cookies import SimpleCookie
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.signals import got_request_exception
+from django.db import OperationalError, connections
+from django.urls import reverse
+
+DEFAULT_MIX = {"browse": 50, "search": 15, "detail": 30, "comment": 5}
+SEARCH_TERMS = ("축제", "불꽃", "벚꽃", "음악", "먹거리", "문화", "바다", "겨울")
+LOCKED = "database is locked"
+
+_state = threading.local()
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """``"browse=50,detail=30"`` -> weights; unknown scenarios raise ValueError."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"unknown scenario: {name}")
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise ValueError("the mix needs at least one positive weight")
+    return mix
+
+
+def _record_exception(sender, request=None, **kwargs):
+    exc = sys.exc_info()[1]
+    if exc is not None and getattr(_state, "collecting", False):
+        _state.exception = exc
+
+
+class WsgiClient:
+    """Calls the WSGI application directly, keeping cookies like a browser."""
+
+    def __init__(self, application, remote_addr: str):
+        self.application = application
+        self.remote_addr = remote_addr
+        self.cookies: Dict[str, str] = {}
+        hosts = [h.lstrip(".") for h in settings.ALLOWED_HOSTS if h and h != "*"]
+        self.host = hosts[0] if hosts else "localhost"
+
+    def request(self, method: str, path: str, data=None, headers=None) -> Tuple[int, bytes, Optional[str]]:
+        body = urlencode(data).encode("utf-8") if data else b""
+        path, _, query = path.partition("?")
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": "80",
+            "HTTP_HOST": self.host,
+            "REMOTE_ADDR": self.remote_addr,
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "CONTENT_LENGTH": str(len(body)),
+            "CONTENT_TYPE": "application/x-www-form-urlencoded",
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": io.StringIO(),
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        if self.cookies:
+            environ["HTTP_COOKIE"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        for name, value in (headers or {}).items():
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+
+        response = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = response_headers
+
+        _state.collecting, _state.exception = True, None
+        try:
+            result = self.application(environ, start_response)
+            try:
+                content = b"".join(result)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        finally:
+            _state.collecting = False
+        for name, value in response["headers"]:
+            if name.lower() == "set-cookie":
+                for morsel in SimpleCookie(value).values():
+                    self.cookies[morsel.key] = morsel.value
+        exception = _state.exception
+        return response["status"], content, f"{type(exception).__name__}: {exception}" if exception else None
+
+    def close(self):
+        # Each virtual user thread opened its own database connection.
+        connections.close_all()
+
+
+class HttpClient:
+    """Same interface over HTTP against a running server."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        self.timeout = timeout
+        self.errors = (requests.RequestException,)
+
+    def request(self, method, path, data=None, headers=None):
+        try:
+            response = self.session.request(
+                method, self.base_url + path, data=data, headers=headers, timeout=self.timeout, allow_redirects=False
+            )
+        except self.errors as exc:
+            return 0, b"", f"{type(exc).__name__}: {exc}"
+        error = LOCKED if response.status_code >= 500 and LOCKED.encode() in response.content else None
+        return response.status_code, response.content, error
+
+    def close(self):
+        self.session.close()
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+        self.rate_limited = 0
+
+    def add(self, scenario: str, seconds: float, status: int, error: Optional[str]):
+        kind = None
+        if error and LOCKED in error:
+            kind = LOCKED
+        elif error or status == 0:
+            kind = (error or "connection error").split(":", 1)[0]
+        elif status >= 400 and status != 429:  # 429 is the comment rate limit working
+            kind = f"HTTP {status}"
+        with self.lock:
+            self.latencies[scenario].append(seconds)
+            if kind:
+                self.errors[scenario][kind] += 1
+            if status == 429:
+                self.rate_limited += 1
+
+    def summary(self, elapsed: float) -> dict:
+        rows = []
+        every = []
+        for scenario in sorted(self.latencies):
+            values = sorted(self.latencies[scenario])
+            every.extend(values)
+            rows.append(self._row(scenario, values, sum(self.errors[scenario].values())))
+        errors = Counter()
+        for counter in self.errors.values():
+            errors.update(counter)
+        total = self._row("total", sorted(every), sum(errors.values()))
+        return {
+            "scenarios": rows,
+            "total": total,
+            "throughput": len(every) / elapsed if elapsed else 0.0,
+            "errors": dict(errors),
+            "rate_limited": self.rate_limited,
+            "elapsed": elapsed,
+        }
+
+    @staticmethod
+    def _row(name, values, errors):
+        return {
+            "name": name,
+            "requests": len(values),
+            "errors": errors,
+            "error_rate": errors / len(values) if values else 0.0,
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+
+
+class VirtualUser:
+    def __init__(self, number: int, client, festival_ids: Sequence[int], mix: Dict[str, int], rng: random.Random):
+        self.number = number
+        self.client = client
+        self.festival_ids = festival_ids
+        self.scenarios = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.scenarios]
+        self.rng = rng
+        self.csrf = ""
+        self.pages = 1
+
+    def step(self, stats: Stats):
+        scenario = self.rng.choices(self.scenarios, self.weights)[0]
+        if scenario in ("detail", "comment") and not self.festival_ids:
+            scenario = "browse"
+        getattr(self, scenario)(stats)
+
+    def _timed(self, stats, scenario, method, path, data=None, headers=None):
+        started = time.perf_counter()
+        status, content, error = self.client.request(method, path, data, headers)
+        stats.add(scenario, time.perf_counter() - started, status, error)
+        return status, content
+
+    def browse(self, stats):
+        self._timed(stats, "browse", "GET", f"{reverse('festival_list')}?page={self.rng.randint(1, self.pages)}")
+
+    def search(self, stats):
+        query = urlencode({"q": self.rng.choice(SEARCH_TERMS)})
+        self._timed(stats, "search", "GET", f"{reverse('festival_list')}?{query}")
+
+    def detail(self, stats):
+        self._timed(stats, "detail", "GET", reverse("festival_detail", args=[self.rng.choice(self.festival_ids)]))
+
+    def comment(self, stats):
+        if not self.csrf:
+            status, content = self._timed(stats, "comment", "GET", reverse("csrf_token"))
+            if status != 200:
+                return
+            self.csrf = json.loads(content)["token"]
+        url = reverse("festival_detail", args=[self.rng.choice(self.festival_ids)])
+        data = {"nickname": f"부하{self.number}", "content": "부하 테스트 댓글입니다.", "csrfmiddlewaretoken": self.csrf}
+        self._timed(stats, "comment", "POST", url, data, headers={"Referer": url, "X-CSRFToken": self.csrf})
+
+
+def run(
+    make_client,
+    festival_ids: Sequence[int],
+    users: int,
+    duration: Optional[float] = None,
+    requests_per_user: Optional[int] = None,
+    mix: Optional[Dict[str, int]] = None,
+    think_time: float = 0.0,
+    list_pages: int = 1,
+    seed: int = 0,
+) -> dict:
+    """Run ``users`` threads until ``duration`` seconds or ``requests_per_user`` steps each."""
+    stats = Stats()
+    mix = mix or DEFAULT_MIX
+    deadline = None if duration is None else time.perf_counter() + duration
+    got_request_exception.connect(_record_exception, dispatch_uid="festival-loadtest")
+
+    def worker(number):
+        client = make_client(number)
+        user = VirtualUser(number, client, festival_ids, mix, random.Random(seed * 1000 + number))
+        user.pages = max(1, list_pages)
+        steps = 0
+        try:
+            while True:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if requests_per_user is not None and steps >= requests_per_user:
+                    break
+                try:
+                    user.step(stats)
+                except OperationalError as exc:  # raised outside the request cycle
+                    stats.add("error", 0.0, 500, f"{type(exc).__name__}: {exc}")
+                steps += 1
+                if think_time:
+                    time.sleep(user.rng.uniform(0, 2 * think_time))
+        finally:
+            client.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,), name=f"vu-{n}") for n in range(users)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        got_request_exception.disconnect(dispatch_uid="festival-loadtest")
+    return stats.summary(time.perf_counter() - started)
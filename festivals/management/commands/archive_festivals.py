@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from festivals.archive import BATCH_SIZE, archivable, archive_cutoff, archive_finished
+
+
+class Command(BaseCommand):
+    help = "Move festivals that ended before the archive horizon (with comments and roles) to the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--horizon-days",
+            type=int,
+            default=None,
+            help="Archive festivals that ended more than this many days ago (default: FESTIVAL_ARCHIVE_HORIZON_DAYS)",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Festivals per transaction (default: {BATCH_SIZE})")
+        parser.add_argument("--limit", type=int, default=None, help="Stop after this many festivals")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the festivals that would be archived")
+
+    def handle(self, *args, **options):
+        horizon = options.get("horizon_days")
+        if horizon is not None and horizon < 0:
+            raise CommandError("--horizon-days는 0 이상이어야 합니다.")
+        cutoff = archive_cutoff(horizon)
+        if options.get("dry_run"):
+            self.stdout.write(f"보관 대상: {archivable(cutoff).count()}건 ({cutoff} 이전 종료)")
+            return
+        moved = archive_finished(cutoff, batch_size=options.get("batch_size") or BATCH_SIZE, limit=options.get("limit"))
+        self.stdout.write(self.style.SUCCESS(f"완료: {moved}건을 보관했습니다 ({cutoff} 이전 종료)"))
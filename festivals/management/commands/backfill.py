@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from festivals.backfill import BACKFILLS, CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Run a registered backfill in committed pk-range chunks; resumes from its last checkpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", nargs="?", help="Backfill to run (omit with --list).")
+        parser.add_argument("--list", action="store_true", help="List registered backfills.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"Rows per transaction (default: {CHUNK_SIZE})")
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between chunks (throttle).")
+        parser.add_argument("--max-chunks", type=int, default=None, help="Stop after this many chunks (resume later).")
+        parser.add_argument("--restart", action="store_true", help="Start over from the first row.")
+
+    def handle(self, *args, **options):
+        if options.get("list"):
+            for backfill in BACKFILLS.values():
+                self.stdout.write(f"{backfill.name:<20} {backfill.help}")
+            return
+        name = options.get("name")
+        if name not in BACKFILLS:
+            raise CommandError(f"알 수 없는 backfill입니다: {name} (--list로 목록 확인)")
+        chunk_size = options.get("chunk_size") or CHUNK_SIZE
+        if chunk_size < 1:
+            raise CommandError("--chunk-size는 1 이상이어야 합니다.")
+
+        def report(progress):
+            if options.get("verbosity", 1) > 1:
+                self.stdout.write(f"  pk {progress.last_pk}까지 처리 ({progress.processed}건 변경)")
+
+        progress = BACKFILLS[name].run(
+            chunk_size=chunk_size,
+            pause=options.get("pause") or 0.0,
+            restart=options.get("restart", False),
+            max_chunks=options.get("max_chunks"),
+            on_chunk=report,
+        )
+        if progress.status == progress.Status.COMPLETED:
+            self.stdout.write(self.style.SUCCESS(f"완료: {name} ({progress.processed}건 변경)"))
+        else:
+            self.stdout.write(f"중단: {name}은 pk {progress.last_pk}까지 처리했습니다. 같은 명령으로 이어서 실행합니다.")
@@ -0,0 +1,211 @@
+import csv
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from festivals.cards import card_rows, to_cards
+from festivals.csv_parallel import parse_parallel
+from festivals.dedupe import Entry, find_duplicates
+from festivals.forms import CommentForm
+from festivals.models import Festival
+from festivals.normalize import normalize_row, normalize_rows
+from festivals.reconcile import apply_plan, plan_reconcile
+from festivals.synthetic import synthetic_rows, write_synthetic_csv
+from festivals.views import detail_context, detail_queryset, list_context
+
+
+def best_of(repeat, fn):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = "Run micro-benchmarks against synthetic data (targets: normalize, list_rows, dedupe, csv_parallel, render)."
+
+    TARGETS = ("normalize", "list_rows", "dedupe", "csv_parallel", "render")
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", choices=self.TARGETS, help="Benchmark to run.")
+        parser.add_argument("--rows", dest="rows", type=int, default=50000, help="Synthetic rows (default: 50000)")
+        parser.add_argument("--repeat", dest="repeat", type=int, default=3, help="Repetitions; best time wins.")
+        parser.add_argument("--pages", dest="pages", type=int, default=50, help="List pages per run (default: 50); also renders for render")
+        parser.add_argument(
+            "--workers",
+            dest="workers",
+            default="1,2,4",
+            help="Comma-separated process counts for csv_parallel (default: 1,2,4)",
+        )
+
+    def handle(self, *args, **options):
+        getattr(self, f"bench_{options['target']}")(options)
+
+    @contextmanager
+    def scratch_database(self, rows: int):
+        """Run against a throwaway test database seeded with synthetic festivals."""
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            records = [r for r in normalize_rows(synthetic_rows(rows)) if r is not None]
+            apply_plan(plan_reconcile(records))
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def measure(self, label, repeat, fn):
+        """Report best wall time, queries and peak traced allocation of ``fn``."""
+        seconds, _ = best_of(repeat, fn)
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            tracemalloc.start()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        self.stdout.write(f"{label:<24} {seconds:>9.3f}s {len(queries):>7} queries {peak / 1024:>10.1f} KiB peak")
+        return seconds
+
+    def report(self, label, seconds, count, baseline=None):
+        line = f"{label:<24} {seconds:>9.3f}s {count / seconds:>12.0f} rows/s"
+        if baseline:
+            line += f"  x{baseline / seconds:.2f}"
+        self.stdout.write(line)
+
+    def bench_normalize(self, options):
+        rows = synthetic_rows(options["rows"])
+        repeat = options["repeat"]
+        per_row, expected = best_of(repeat, lambda: [normalize_row(row) for row in rows])
+        columnar, actual = best_of(repeat, lambda: normalize_rows(rows))
+        if actual != expected:
+            raise CommandError("columnar normalization differs from the per-row reference")
+        self.report("per-row (reference)", per_row, len(rows))
+        self.report("columnar", columnar, len(rows), baseline=per_row)
+
+    def bench_list_rows(self, options):
+        pages = options["pages"]
+
+        def render_fields(objects):
+            return [(f.pk, f.title, f.start_date, f.end_date, f.place, f.organizer, f.host) for f in objects]
+
+        def model_pages():
+            paginator = Paginator(Festival.objects.filter(is_active=True).order_by("start_date", "title"), 12)
+            for number in range(1, pages + 1):
+                render_fields(paginator.get_page(number).object_list)
+
+        def card_pages():
+            paginator = Paginator(card_rows(Festival.objects.filter(is_active=True).order_by("start_date", "title")), 12)
+            for number in range(1, pages + 1):
+                render_fields(to_cards(paginator.get_page(number).object_list))
+
+        with self.scratch_database(options["rows"]):
+            self.stdout.write(f"{pages} list pages over {Festival.objects.count()} festivals")
+            baseline = self.measure("model instances", options["repeat"], model_pages)
+            cards = self.measure("card rows", options["repeat"], card_pages)
+            self.stdout.write(f"speedup x{baseline / cards:.2f}")
+
+    def bench_dedupe(self, options):
+        """Blocking + scoring over CSV-like rows plus API-like copies of every tenth one."""
+        entries = []
+        for i, record in enumerate(r for r in normalize_rows(synthetic_rows(options["rows"])) if r is not None):
+            defaults = record["defaults"]
+            sido = record["location"]["address_road"].split(" ")[0]
+            entries.append(Entry(len(entries) + 1, Festival.Source.CSV, defaults["title"], defaults["start_date"], sido))
+            if i % 10 == 0:
+                title = f"제{i % 30 + 1}회 {defaults['title']}"
+                entries.append(Entry(len(entries) + 1, Festival.Source.API, title, defaults["start_date"], ""))
+        seconds, report = best_of(options["repeat"], lambda: find_duplicates(entries))
+        self.report("find_duplicates", seconds, len(entries))
+        self.stdout.write(f"compared {report.compared} pairs, {len(report.clusters)} duplicate groups")
+
+    def bench_csv_parallel(self, options):
+        """Decode + normalize a synthetic CSV file in one process versus byte ranges in a process pool."""
+
+        def sequential():
+            with open(path, "r", encoding="utf-8-sig") as f:
+                return normalize_rows(list(csv.DictReader(f)))
+
+        def parallel(workers):
+            return [record for _, records in parse_parallel(path, workers, keep_rows=False) for record in records]
+
+        counts = [int(n) for n in options["workers"].split(",") if n.strip()]
+        with TemporaryDirectory() as tmp:
+            path = write_synthetic_csv(Path(tmp) / "festivals.csv", options["rows"])
+            self.stdout.write(f"{options['rows']} rows, {path.stat().st_size / 1024 / 1024:.1f} MiB, {os.cpu_count()} CPUs")
+            baseline, expected = best_of(options["repeat"], sequential)
+            self.report("sequential", baseline, options["rows"])
+            for workers in counts:
+                seconds, actual = best_of(options["repeat"], lambda: parallel(workers))
+                if actual != expected:
+                    raise CommandError("parallel parsing differs from the sequential reader")
+                self.report(f"{workers} worker(s)", seconds, options["rows"], baseline=baseline)
+
+    def bench_render(self, options):
+        """Template time only: list and detail contexts are loaded first, then rendered ``--pages`` times per engine."""
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()  # the anonymous (shared-cache) variant of the pages
+        renders = options["pages"]
+        django_engine = {k: v for k, v in settings.TEMPLATES[-1].items() if k != "BACKEND"}  # FESTIVAL_JINJA2 goes first
+        loaders = ["django.template.loaders.filesystem.Loader", "django.template.loaders.app_directories.Loader"]
+
+        def django_templates(name, loaders):
+            return DjangoTemplates(
+                {**django_engine, "NAME": name, "APP_DIRS": False, "OPTIONS": {**django_engine["OPTIONS"], "loaders": loaders}}
+            )
+
+        engines = {
+            "django": django_templates("uncached", loaders),
+            "django cached": django_templates("cached", [("django.template.loaders.cached.Loader", loaders)]),
+        }
+        try:
+            from django.template.backends.jinja2 import Jinja2
+
+            params = {k: v for k, v in settings.FESTIVAL_JINJA2_TEMPLATES.items() if k != "BACKEND"}
+            engines["jinja2"] = Jinja2({**params, "NAME": "jinja2"})
+        except ImportError:
+            self.stdout.write("jinja2 is not installed; comparing Django loaders only")
+
+        with self.scratch_database(options["rows"]):
+            listing = list_context(request)
+            cards = [{"festival": card} for card in listing["page_obj"].object_list]
+            detail = detail_context(detail_queryset().filter(is_active=True).first(), CommentForm())
+            # (template, contexts rendered per iteration, request); cards render without a request
+            # so context processors don't count towards the per-card cost.
+            pages = {
+                "list page": ("festival_list.html", [listing], request),
+                "detail page": ("festival_detail.html", [detail], request),
+                f"{len(cards)} cards": ("_festival_card.html", cards, None),
+            }
+            for title, (name, contexts, page_request) in pages.items():
+                self.stdout.write(f"{title} x{renders}")
+                expected = None
+                for label, engine in engines.items():
+                    template_name = f"festivals/{name}"
+
+                    def render_pages():
+                        for _ in range(renders):
+                            html = [engine.get_template(template_name).render(c, page_request) for c in contexts]
+                        return html
+
+                    seconds = self.measure(label, options["repeat"], render_pages)
+                    html = render_pages()
+                    if expected is None:
+                        expected = html
+                    elif html != expected:
+                        raise CommandError(f"{label} renders {name} differently")
+                    self.stdout.write(f"{'':<24} {seconds / renders / len(contexts) * 1e6:>9.1f} us per template render")
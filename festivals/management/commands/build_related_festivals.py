@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from festivals.edge_cache import DETAIL_KEY, request_purge
+from festivals.similarity import (
+    TOP_K,
+    affected_festivals,
+    drop_signatures,
+    index_signatures,
+    refresh_related,
+    stale_festival_ids,
+)
+
+
+class Command(BaseCommand):
+    help = "Precompute related festivals (MinHash/LSH over title, description and organizations)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Recompute every festival instead of only changed ones")
+        parser.add_argument("--top", type=int, default=TOP_K, help="Related festivals kept per festival")
+
+    def handle(self, *args, **options):
+        stale, gone = stale_festival_ids(full=options.get("full", False))
+        # Festivals that listed a now inactive one must be refreshed; find them before dropping it.
+        orphaned = set(affected_festivals(gone)) - set(gone)
+        drop_signatures(gone)
+        index_signatures(stale)
+        affected = sorted(set(affected_festivals(stale)) | orphaned)
+        written = refresh_related(affected, top_k=options.get("top") or TOP_K)
+        if affected:
+            request_purge([DETAIL_KEY])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"완료: 서명 {len(stale)}건 갱신, 제외 {len(gone)}건, 관련 목록 {len(affected)}건 재계산 ({written}행)"
+            )
+        )
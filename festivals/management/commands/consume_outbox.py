@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from festivals.outbox import CONSUMERS, backlog, consume, prune
+
+
+class Command(BaseCommand):
+    help = "Feed pending change-log rows to outbox consumers in batches (all consumers by default)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("consumers", nargs="*", help=f"Consumers to run (default: all of {', '.join(CONSUMERS)})")
+        parser.add_argument("--max-batches", type=int, default=None, help="Stop each consumer after this many batches.")
+        parser.add_argument("--follow", action="store_true", help="Keep polling for new changes.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --follow (default: 5)")
+        parser.add_argument("--prune", action="store_true", help="Delete change-log rows every consumer has processed.")
+        parser.add_argument("--status", action="store_true", help="Only print each consumer's backlog.")
+
+    def handle(self, *args, **options):
+        names = options.get("consumers") or list(CONSUMERS)
+        unknown = [name for name in names if name not in CONSUMERS]
+        if unknown:
+            raise CommandError(f"알 수 없는 consumer입니다: {', '.join(unknown)} (등록됨: {', '.join(CONSUMERS)})")
+        if options.get("status"):
+            for name in names:
+                self.stdout.write(f"{name:<24} 대기 {backlog(CONSUMERS[name])}건")
+            return
+
+        while True:
+            for name in names:
+                consumed = consume(CONSUMERS[name], max_batches=options.get("max_batches"))
+                if consumed or not options.get("follow"):
+                    self.stdout.write(self.style.SUCCESS(f"{name}: 변경 {consumed}건 처리"))
+            if options.get("prune"):
+                pruned = prune()
+                if pruned or not options.get("follow"):
+                    self.stdout.write(f"처리 완료된 변경 기록 {pruned}건 삭제")
+            if not options.get("follow"):
+                return
+            time.sleep(options.get("interval") or 5.0)
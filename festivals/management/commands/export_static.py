@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from festivals.models import ChangeLog, OutboxCursor
+from festivals.outbox import StaticPagesConsumer
+from festivals.static_export import StaticSite, export_root
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render festival detail pages and the first list pages to FESTIVAL_STATIC_EXPORT_DIR. "
+        "After the first build only pages whose festival, location, roles or comments changed are rendered."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Render every page instead of only changed ones.")
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1, help="Rendering processes (default: CPU count)"
+        )
+        parser.add_argument("--list-pages", type=int, default=None, help="List pages to render (default: FESTIVAL_STATIC_LIST_PAGES)")
+
+    def handle(self, *args, **options):
+        root = export_root()
+        if root is None:
+            raise CommandError("FESTIVAL_STATIC_EXPORT_DIR를 설정해 주세요.")
+        site = StaticSite(root, workers=options.get("workers") or 1, list_pages=options.get("list_pages"))
+        started = time.perf_counter()
+        with transaction.atomic():
+            cursor, _ = OutboxCursor.objects.get_or_create(name=StaticPagesConsumer.name)
+        last = ChangeLog.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+
+        if options.get("full") or not site.exists():
+            # Changes logged while rendering are rendered again by the next run.
+            counts = site.build_all()
+            mode = "전체"
+        else:
+            changes = ChangeLog.objects.filter(pk__gt=cursor.position, pk__lte=last).values_list("kind", "festival_id")
+            counts = site.update(changes.iterator())
+            mode = f"변경 기록 {changes.count()}건 반영"
+        OutboxCursor.objects.filter(pk=cursor.pk).update(position=max(last, cursor.position), updated_at=timezone.now())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"완료({mode}): 페이지 {counts['written']}개 기록, {counts['unchanged']}개 변경 없음, "
+                f"{counts['removed']}개 삭제 ({time.perf_counter() - started:.1f}초)"
+            )
+        )
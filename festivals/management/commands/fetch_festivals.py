@@ -1,11 +1,18 @@
 import math
 import os
+import time
 from typing import Tuple
 
 import requests
 from django.core.management.base import BaseCommand, CommandError
-
-from festivals.models import Festival, FestivalOrganization, Organization
+from django.db import OperationalError, transaction
+
+from festivals.archive import archived_external_ids
+from festivals.facets import deferred_facet_sync
+from festivals.http_cache import ResponseCache
+from festivals.metrics import api_cache, record_ingest
+from festivals.models import Festival, FestivalOrganization, IngestRun, Organization
+from festivals.profiling import IngestProfiler
 from festivals.services import parse_festivals_xml
 
 API_URL = "http://iq.ifac.or.kr/openAPI/real/search.do"
@@ -14,6 +21,8 @@ SERVICE_ID = "festival"
 
 class Command(BaseCommand):
     help = "Fetch and store festival data from the IFAC open API."
+    # on_progress(done_pages, total_pages) is called after every committed page (see import jobs).
+    stealth_options = ("on_progress",)
 
     def add_arguments(self, parser):
         parser.add_argument("--api-key", dest="api_key", help="API key (fallback: FESTIVAL_API_KEY env)")
@@ -27,20 +36,91 @@ class Command(BaseCommand):
             default=None,
             help="Number of pages to fetch. Default is all available pages.",
         )
+        parser.add_argument(
+            "--profile",
+            dest="profile",
+            action="store_true",
+            help="Print per-stage timing, query counts, HTTP bytes and items/sec.",
+        )
+        parser.add_argument(
+            "--profile-output",
+            dest="profile_output",
+            default=None,
+            help="Also dump cProfile stats to this file (implies --profile).",
+        )
+        parser.add_argument(
+            "--resume",
+            dest="resume",
+            action="store_true",
+            help="Continue the last unfinished run with the same options after its last committed page.",
+        )
+        parser.add_argument(
+            "--cache-dir",
+            dest="cache_dir",
+            default=None,
+            help="Serve pages from this on-disk cache and store fetched pages in it.",
+        )
+        parser.add_argument(
+            "--revalidate",
+            dest="revalidate",
+            action="store_true",
+            help="With --cache-dir, revalidate cached pages with conditional requests (ETag/Last-Modified).",
+        )
+        parser.add_argument(
+            "--replay",
+            dest="replay",
+            default=None,
+            metavar="DIR",
+            help="Ingest pages recorded with --cache-dir DIR without any network access.",
+        )
 
     def handle(self, *args, **options):
+        self.replay = bool(options.get("replay"))
+        self.revalidate = options.get("revalidate", False)
+        cache_dir = options.get("replay") or options.get("cache_dir")
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.on_progress = options.get("on_progress")
+
         api_key = options["api_key"] or os.environ.get("FESTIVAL_API_KEY")
-        if not api_key:
+        if not api_key and not self.replay:
             raise CommandError("FESTIVAL_API_KEY 환경변수 또는 --api-key 옵션이 필요합니다.")
 
         page_size = options["page_size"]
         requested_pages = options["pages"]
 
         self.stdout.write(self.style.MIGRATE_HEADING("Fetching festival data..."))
+        profiler = IngestProfiler(options.get("profile", False), options.get("profile_output"))
+        run = IngestRun.start(
+            IngestRun.Source.API,
+            {"page_size": page_size, "pages": requested_pages, "replay": self.replay},
+            resume=options.get("resume", False),
+        )
+        if run.last_offset:
+            self.stdout.write(f"이전 실행(#{run.pk})을 {run.last_offset + 1}페이지부터 이어서 진행합니다.")
+        started = time.perf_counter()
+        try:
+            with profiler.session():
+                created_total, updated_total = self._fetch_pages(api_key, page_size, requested_pages, run, profiler)
+        except Exception as exc:
+            run.mark_failed(exc)
+            raise
+        run.mark_completed()
+        record_ingest("api", created_total + updated_total, time.perf_counter() - started)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"완료: {created_total}개 생성, {updated_total}개 업데이트 (총 {created_total + updated_total}건 처리)"
+            )
+        )
+        quarantined = run.errors.count()
+        if quarantined:
+            self.stdout.write(self.style.WARNING(f"오류로 건너뛴 항목: {quarantined}건 (실행 #{run.pk})"))
+        profiler.report(self.stdout.write, rows_counter="items")
+
+    def _fetch_pages(self, api_key, page_size, requested_pages, run, profiler) -> Tuple[int, int]:
         created_total = 0
         updated_total = 0
-
-        page = 1
+        page = run.last_offset + 1
         total_count = None
         while True:
             params = {
@@ -50,13 +130,15 @@ class Command(BaseCommand):
                 "pSize": page_size,
                 "cPage": page,
             }
-            response = requests.get(API_URL, params=params, timeout=10)
-            if response.status_code != 200:
-                raise CommandError(f"API 요청 실패 (status={response.status_code})")
+            text, fresh_response = self._get_page(params, profiler)
+            profiler.count("pages")
 
-            parsed = parse_festivals_xml(response.text)
+            with profiler.stage("parse"):
+                parsed = parse_festivals_xml(text)
             if parsed["result_code"] != "0000":
                 raise CommandError(f"API 오류: {parsed['result_code']} {parsed['result_msg']}")
+            if self.cache and fresh_response is not None:
+                self.cache.store(params, fresh_response)
 
             items = parsed["items"]
             if total_count is None:
@@ -65,46 +147,85 @@ class Command(BaseCommand):
             if not items:
                 break
 
-            created, updated = self._upsert_items(items)
+            profiler.count("items", len(items))
+            with profiler.stage("write"), transaction.atomic(), deferred_facet_sync():
+                created, updated = self._upsert_items(items, run, page, profiler)
+                run.checkpoint(page)
             created_total += created
             updated_total += updated
 
             max_pages = requested_pages or math.ceil(total_count / page_size) if total_count else page
+            if self.on_progress:
+                self.on_progress(page, max_pages)
             if page >= max_pages:
                 break
             page += 1
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"완료: {created_total}개 생성, {updated_total}개 업데이트 (총 {created_total + updated_total}건 처리)"
-            )
-        )
-
-    def _upsert_items(self, items) -> Tuple[int, int]:
+        return created_total, updated_total
+
+    def _get_page(self, params, profiler):
+        """Return the page XML and, when it came from the network, the response to cache."""
+        cached = self.cache.load(params) if self.cache else None
+        if cached and (self.replay or not self.revalidate):
+            profiler.count("cache_hits")
+            api_cache.inc(result="hit")
+            return cached["text"], None
+        if self.replay:
+            raise CommandError(f"기록된 페이지가 없습니다: cPage={params['cPage']} ({self.cache.directory})")
+
+        headers = ResponseCache.validators(cached) if cached else {}
+        with profiler.stage("http"):
+            response = requests.get(API_URL, params=params, headers=headers, timeout=10)
+        if cached and response.status_code == 304:
+            profiler.count("cache_revalidated")
+            api_cache.inc(result="revalidated")
+            return cached["text"], None
+        if response.status_code != 200:
+            raise CommandError(f"API 요청 실패 (status={response.status_code})")
+        profiler.count("http_bytes", len(response.content))
+        if self.cache:
+            profiler.count("cache_misses")
+            api_cache.inc(result="miss")
+        return response.text, response
+
+    def _upsert_items(self, items, run, page, profiler) -> Tuple[int, int]:
         created = 0
         updated = 0
+        archived = archived_external_ids(item.get("external_id") for item in items)
         for item in items:
             external_id = item.get("external_id")
-            if not external_id:
+            if not external_id or external_id in archived:
+                continue
+            try:
+                with transaction.atomic():
+                    was_created = self._upsert_item(external_id, item)
+            except OperationalError:
+                raise
+            except Exception as exc:
+                run.quarantine(page, external_id, item, exc)
+                profiler.count("quarantined")
                 continue
-            obj, was_created = Festival.objects.update_or_create(
-                external_id=external_id,
-                defaults={
-                    "title": item.get("title", ""),
-                    "description": item.get("description", ""),
-                    "telephone": item.get("telephone", ""),
-                    "extra_info": item.get("period", ""),
-                    "homepage": item.get("link", ""),
-                    "pub_date": item.get("pub_date"),
-                },
-            )
-            self._set_role(obj, FestivalOrganization.Role.ORGANIZER, item.get("organizer", ""))
             if was_created:
                 created += 1
             else:
                 updated += 1
         return created, updated
 
+    def _upsert_item(self, external_id, item) -> bool:
+        obj, was_created = Festival.objects.update_or_create(
+            external_id=external_id,
+            defaults={
+                "title": item.get("title", ""),
+                "description": item.get("description", ""),
+                "telephone": item.get("telephone", ""),
+                "extra_info": item.get("period", ""),
+                "homepage": item.get("link", ""),
+                "pub_date": item.get("pub_date"),
+                "source": Festival.Source.API,
+            },
+        )
+        self._set_role(obj, FestivalOrganization.Role.ORGANIZER, item.get("organizer", ""))
+        return was_created
+
     def _set_role(self, festival: Festival, role: str, name: str):
         FestivalOrganization.objects.filter(festival=festival, role=role).delete()
         cleaned = (name or "").strip()
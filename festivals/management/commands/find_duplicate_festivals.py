@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from festivals.dedupe import THRESHOLD, choose_survivor, find_duplicates, load_entries, merge_cluster
+
+
+class Command(BaseCommand):
+    help = "Find festivals imported twice (e.g. from CSV and API) and report or merge them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, default=THRESHOLD, help=f"Title similarity (default: {THRESHOLD})")
+        parser.add_argument("--any-source", action="store_true", help="Also pair festivals from the same source")
+        parser.add_argument("--merge", action="store_true", help="Merge each group into its surviving festival")
+        parser.add_argument("--show", type=int, default=50, help="Groups listed in the report (default: 50)")
+
+    def handle(self, *args, **options):
+        threshold = options.get("threshold") or THRESHOLD
+        if not 0 < threshold <= 1:
+            raise CommandError("--threshold는 0보다 크고 1 이하여야 합니다.")
+        started = time.perf_counter()
+        entries = load_entries()
+        report = find_duplicates(entries, threshold=threshold, any_source=options.get("any_source", False))
+        elapsed = time.perf_counter() - started
+
+        show = options.get("show", 50)
+        for cluster in report.clusters[:show]:
+            survivor = choose_survivor(cluster)
+            for entry in cluster:
+                mark = "*" if entry is survivor else " "
+                self.stdout.write(f"  {mark} #{entry.pk} [{entry.source}] {entry.title} {entry.start or ''} {entry.sido}")
+            self.stdout.write("")
+        if len(report.clusters) > show:
+            self.stdout.write(f"  ... 외 {len(report.clusters) - show}개 묶음")
+
+        self.stdout.write(
+            f"축제 {report.entries}건, 비교 {report.compared}쌍, 중복 묶음 {len(report.clusters)}개 ({elapsed:.1f}s)"
+        )
+        if not options.get("merge"):
+            return
+        merged = sum(merge_cluster(cluster) for cluster in report.clusters)
+        self.stdout.write(self.style.SUCCESS(f"병합 완료: {merged}건을 {len(report.clusters)}개 축제로 합쳤습니다."))
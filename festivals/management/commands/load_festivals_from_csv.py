@@ -1,14 +1,26 @@
 import csv
+import time
+from collections import Counter
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, transaction
 
-from festivals.models import Festival, FestivalOrganization, Location, Organization
-from festivals.services import parse_date, parse_decimal
+from festivals.archive import archived_external_ids
+from festivals.csv_parallel import parse_parallel
+from festivals.facets import deferred_facet_sync
+from festivals.metrics import record_ingest
+from festivals.models import Festival, FestivalOrganization, IngestRun, Location, Organization
+from festivals.normalize import normalize_rows
+from festivals.profiling import IngestProfiler
+from festivals.reconcile import apply_plan, plan_reconcile
 
 
 class Command(BaseCommand):
     help = "Load festival data from a local CSV file (utf-8-sig)."
+    # on_progress(done_rows, total_rows_or_None) is called after every committed batch; import
+    # jobs pass it through call_command and raise from it to cancel the run.
+    stealth_options = ("on_progress",)
 
     def add_arguments(self, parser):
         parser.add_argument("--path", dest="path", default="data.csv", help="CSV file path (default: data.csv)")
@@ -19,6 +31,50 @@ class Command(BaseCommand):
             default=None,
             help="Limit number of rows to import (for quick testing).",
         )
+        parser.add_argument(
+            "--profile",
+            dest="profile",
+            action="store_true",
+            help="Print per-stage timing, query counts and rows/sec.",
+        )
+        parser.add_argument(
+            "--profile-output",
+            dest="profile_output",
+            default=None,
+            help="Also dump cProfile stats to this file (implies --profile).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=500,
+            help="Rows committed per transaction/checkpoint (default: 500).",
+        )
+        parser.add_argument(
+            "--workers",
+            dest="workers",
+            type=int,
+            default=1,
+            help="Decode and normalize the file in this many processes, in file order (default: 1).",
+        )
+        parser.add_argument(
+            "--resume",
+            dest="resume",
+            action="store_true",
+            help="Continue the last unfinished run for the same file from its checkpoint.",
+        )
+        parser.add_argument(
+            "--reconcile",
+            dest="reconcile",
+            action="store_true",
+            help="Treat the file as the full snapshot: bulk insert/update changed rows and deactivate missing ones.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            dest="dry_run",
+            action="store_true",
+            help="With --reconcile, only print the diff summary without writing.",
+        )
 
     def handle(self, *args, **options):
         path = Path(options["path"])
@@ -26,59 +82,203 @@ class Command(BaseCommand):
         if not path.exists():
             raise CommandError(f"CSV 파일을 찾을 수 없습니다: {path}")
 
+        if options.get("dry_run") and not options.get("reconcile"):
+            raise CommandError("--dry-run은 --reconcile과 함께 사용해야 합니다.")
+        if options.get("reconcile") and limit is not None:
+            # The file is a full snapshot: rows past the limit would look deleted.
+            raise CommandError("--reconcile은 파일 전체를 비교하므로 --limit과 함께 사용할 수 없습니다.")
+        batch_size = options.get("batch_size") or 500
+        workers = options.get("workers") or 1
+        if workers < 1:
+            raise CommandError("--workers는 1 이상이어야 합니다.")
+        profiler = IngestProfiler(options.get("profile", False), options.get("profile_output"))
+        started = time.perf_counter()
+        on_progress = options.get("on_progress")
+        if options.get("reconcile"):
+            rows = self._reconcile(path, limit, options.get("dry_run", False), profiler, workers, on_progress)
+            record_ingest("csv", rows, time.perf_counter() - started)
+            profiler.report(self.stdout.write)
+            return
+
+        run = IngestRun.start(IngestRun.Source.CSV, self._run_params(path, limit), resume=options.get("resume", False))
+        if run.last_offset:
+            self.stdout.write(f"이전 실행(#{run.pk})을 {run.last_offset}행부터 이어서 진행합니다.")
+
+        outcomes = Counter()
+        try:
+            with profiler.session():
+                for start, batch, records in self._batches(path, limit, run.last_offset, batch_size, workers, profiler):
+                    profiler.count("rows", len(batch))
+                    archived = archived_external_ids(r["external_id"] for r in records if r is not None)
+                    if archived:
+                        # Already moved to the archive; re-importing would resurrect it as a hot row.
+                        records = [None if r is not None and r["external_id"] in archived else r for r in records]
+                    with transaction.atomic(), deferred_facet_sync():
+                        for offset, (row, record) in enumerate(zip(batch, records), start=start):
+                            outcomes[self._import_row(run, offset, row, record, profiler)] += 1
+                        run.checkpoint(start + len(batch))
+                    if on_progress:
+                        on_progress(start + len(batch), self.total_rows)
+        except Exception as exc:
+            run.mark_failed(exc)
+            raise
+        run.mark_completed()
+        record_ingest("csv", sum(outcomes.values()), time.perf_counter() - started)
+
+        created, updated = outcomes["created"], outcomes["updated"]
+        self.stdout.write(self.style.SUCCESS(f"완료: {created}개 생성, {updated}개 업데이트 (총 {created + updated}건)"))
+        if outcomes["quarantined"]:
+            self.stdout.write(self.style.WARNING(f"오류로 건너뛴 행: {outcomes['quarantined']}건 (실행 #{run.pk})"))
+        profiler.report(self.stdout.write)
+
+    def _reconcile(self, path: Path, limit, dry_run: bool, profiler, workers: int = 1, on_progress=None):
+        params = {**self._run_params(path, limit), "reconcile": True}
+        run = None if dry_run else IngestRun.start(IngestRun.Source.CSV, params)
+        try:
+            with profiler.session():
+                if workers > 1:
+                    records = []
+                    for _, chunk in self._parse_parallel(path, limit, workers, profiler, keep_rows=False):
+                        records.extend(chunk)
+                    rows = records  # one record (None when skipped) per row
+                else:
+                    with profiler.stage("read"):
+                        rows = self._read_rows(path, limit)
+                    with profiler.stage("normalize"):
+                        records = normalize_rows(rows)
+                profiler.count("rows", len(rows))
+                records = [record for record in records if record is not None]
+                with profiler.stage("diff"):
+                    plan = plan_reconcile(records)
+                if on_progress:
+                    on_progress(len(rows), len(rows))  # last chance to cancel before writing
+                if not dry_run:
+                    with profiler.stage("write"):
+                        apply_plan(plan)
+        except Exception as exc:
+            if run:
+                run.mark_failed(exc)
+            raise
+        if run:
+            run.checkpoint(len(rows))
+            run.mark_completed()
+
+        summary = plan.summary()
+        label = "변경 예정(dry-run)" if dry_run else "동기화 완료"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{label}: 추가 {summary['insert']}건, 수정 {summary['update']}건, "
+                f"비활성화 {summary['deactivate']}건, 변경 없음 {summary['unchanged']}건"
+            )
+        )
+        if summary["archived"]:
+            self.stdout.write(f"보관된 축제라 건너뜀: {summary['archived']}건")
+        if dry_run:
+            for record in plan.inserts[:10]:
+                self.stdout.write(f"  + {record['external_id']}")
+            for _, record, changed in plan.updates[:10]:
+                self.stdout.write(f"  ~ {record['external_id']} ({', '.join(changed)})")
+            for _, external_id in plan.deactivations[:10]:
+                self.stdout.write(f"  - {external_id}")
+        return len(rows)
+
+    def _run_params(self, path: Path, limit):
+        stat = path.stat()
+        return {"path": str(path.resolve()), "size": stat.st_size, "mtime": stat.st_mtime, "limit": limit}
+
+    def _import_row(self, run, offset, row, record, profiler):
+        """Write one normalized row inside a savepoint; bad rows are quarantined instead of aborting the run."""
+        if record is None:
+            profiler.count("skipped")
+            return "skipped"
+        try:
+            with transaction.atomic(), profiler.stage("write"):
+                return "created" if self._write_record(record) else "updated"
+        except OperationalError:
+            raise
+        except Exception as exc:
+            run.quarantine(offset, row.get("축제명") or "", row, exc)
+            profiler.count("quarantined")
+            return "quarantined"
+
+    def _batches(self, path: Path, limit, skip: int, batch_size: int, workers: int, profiler):
+        """Yield ``(offset, rows, records)`` batches of normalized rows from ``skip`` on, in file order."""
+        self.total_rows = None  # unknown until the end when streaming from the pool
+        if workers <= 1:
+            with profiler.stage("read"):
+                rows = self._read_rows(path, limit)
+            self.total_rows = len(rows)
+            date_cache = {}
+            for start in range(skip, len(rows), batch_size):
+                batch = rows[start : start + batch_size]
+                with profiler.stage("normalize"):
+                    records = normalize_rows(batch, date_cache)
+                yield start, batch, records
+            return
+
+        offset = 0
+        pending_rows, pending_records = [], []
+        for rows, records in self._parse_parallel(path, limit, workers, profiler):
+            if offset + len(rows) <= skip:
+                offset += len(rows)
+                continue
+            cut = max(skip - offset, 0)
+            pending_rows.extend(rows[cut:])
+            pending_records.extend(records[cut:])
+            offset += len(rows)
+            while len(pending_rows) >= batch_size:
+                start = offset - len(pending_rows)
+                yield start, pending_rows[:batch_size], pending_records[:batch_size]
+                del pending_rows[:batch_size], pending_records[:batch_size]
+        if pending_rows:
+            yield offset - len(pending_rows), pending_rows, pending_records
+
+    def _parse_parallel(self, path: Path, limit, workers: int, profiler, keep_rows: bool = True):
+        """``(rows, records)`` chunks from the process pool, cut at ``limit``; waiting counts as normalize time."""
+        remaining = limit
+        chunks = parse_parallel(path, workers, keep_rows=keep_rows)
+        try:
+            while remaining is None or remaining > 0:
+                with profiler.stage("normalize"):
+                    rows, records = next(chunks, (None, None))
+                if records is None:
+                    break
+                if remaining is not None:
+                    rows, records = rows and rows[:remaining], records[:remaining]
+                    remaining -= len(records)
+                yield rows, records
+        finally:
+            chunks.close()
+
+    def _read_rows(self, path: Path, limit):
         with open(path, "r", encoding="utf-8-sig") as f:
             reader = csv.DictReader(f)
             rows = list(reader)
             if limit:
                 rows = rows[:limit]
+        return rows
 
-        created = 0
-        updated = 0
-
-        for row in rows:
-            title = (row.get("축제명") or "").strip()
-            start_date = parse_date(row.get("축제시작일자"))
-            key = f"{title}-{start_date or ''}".strip()
-            if not key:
-                continue
+    def _write_record(self, record) -> bool:
+        obj, was_created = Festival.objects.update_or_create(
+            external_id=record["external_id"],
+            defaults={**record["defaults"], "source": Festival.Source.CSV, "is_active": True},
+        )
+        if obj.merged_into_id:
+            # Merged into another festival by find_duplicate_festivals; keep it hidden.
+            obj.is_active = False
+            obj.save(update_fields=["is_active"])
 
-            defaults = {
-                "title": title,
-                "start_date": start_date,
-                "end_date": parse_date(row.get("축제종료일자")),
-                "description": (row.get("축제내용") or "").strip(),
-                "telephone": (row.get("전화번호") or "").strip(),
-                "homepage": (row.get("홈페이지주소") or "").strip(),
-                "extra_info": (row.get("관련정보") or "").strip(),
-                "data_reference_date": parse_date(row.get("데이터기준일자")),
-            }
-
-            obj, was_created = Festival.objects.update_or_create(external_id=key[:250], defaults=defaults)
-
-            # location
-            location_data = {
-                "name": (row.get("개최장소") or "").strip(),
-                "address_road": (row.get("소재지도로명주소") or "").strip(),
-                "address_lot": (row.get("소재지지번주소") or "").strip(),
-                "latitude": parse_decimal(row.get("위도")),
-                "longitude": parse_decimal(row.get("경도")),
-            }
-            if any([location_data["name"], location_data["address_road"], location_data["address_lot"], location_data["latitude"], location_data["longitude"]]):
-                location, _ = Location.objects.get_or_create(**location_data)
-                obj.location = location
-                obj.save(update_fields=["location"])
-
-            # organizations
-            self._set_role(obj, FestivalOrganization.Role.ORGANIZER, self._first(row, ["주최기관명", "주최기관"]))
-            self._set_role(obj, FestivalOrganization.Role.HOST, self._first(row, ["주관기관명", "주관기관"]))
-            self._set_role(obj, FestivalOrganization.Role.SPONSOR, self._first(row, ["후원기관명", "후원기관"]))
-
-            if was_created:
-                created += 1
-            else:
-                updated += 1
+        # location
+        location_data = record["location"]
+        if any([location_data["name"], location_data["address_road"], location_data["address_lot"], location_data["latitude"], location_data["longitude"]]):
+            location, _ = Location.objects.get_or_create(**location_data)
+            obj.location = location
+            obj.save(update_fields=["location"])
 
-        self.stdout.write(self.style.SUCCESS(f"완료: {created}개 생성, {updated}개 업데이트 (총 {created + updated}건)"))
+        # organizations
+        for role, name in record["roles"].items():
+            self._set_role(obj, role, name)
+        return was_created
 
     def _set_role(self, festival: Festival, role: str, name):
         FestivalOrganization.objects.filter(festival=festival, role=role).delete()
@@ -87,9 +287,3 @@ class Command(BaseCommand):
             return
         org, _ = Organization.objects.get_or_create(name=cleaned)
         FestivalOrganization.objects.create(festival=festival, organization=org, role=role)
-
-    def _first(self, row, keys):
-        for k in keys:
-            if k in row and row[k]:
-                return row[k]
-        return ""
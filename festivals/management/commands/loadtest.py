@@ -0,0 +1,158 @@
+import math
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from festivals.comments import comment_buffer
+from festivals.loadtest import DEFAULT_MIX, HttpClient, WsgiClient, parse_mix, run
+from festivals.models import Festival
+from festivals.normalize import normalize_rows
+from festivals.popularity import view_counter
+from festivals.reconcile import apply_plan, plan_reconcile
+from festivals.synthetic import synthetic_rows
+
+PAGE_SIZE = 12
+BROWSE_PAGES = 20  # visitors rarely page past the first screens
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the site with concurrent virtual users (list browsing, search, detail, comments) and report "
+        "throughput, p50/p95/p99 latency and error rates. Runs the WSGI app in process against a scratch "
+        "database unless --url or --use-current-db is given. Against a real site comments are left out of the "
+        "mix unless --allow-writes is given."
+    )
+
+    def add_arguments(self, parser):
+        mix = ",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items())
+        parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users (default: 10)")
+        parser.add_argument("--duration", type=float, default=None, help="Seconds to run (default: 10 unless --requests)")
+        parser.add_argument("--requests", type=int, default=None, help="Requests per user instead of a duration")
+        parser.add_argument("--mix", default=mix, help=f"Scenario weights (default: {mix})")
+        parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a user's requests in seconds")
+        parser.add_argument("--url", default=None, help="Base URL of a running server instead of the in-process app")
+        parser.add_argument("--rows", type=int, default=2000, help="Synthetic festivals in the scratch database (default: 2000)")
+        parser.add_argument("--use-current-db", action="store_true", help="Run in process against the configured database")
+        parser.add_argument(
+            "--allow-writes",
+            action="store_true",
+            help="Keep the comment scenario with --url or --use-current-db (it posts real comments)",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for the scenario choices")
+        parser.add_argument(
+            "--fail-on-error-rate",
+            type=float,
+            default=None,
+            help="Exit with an error when the overall error rate (0-1) exceeds this value",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options.get("mix") or "")
+        except ValueError as exc:
+            raise CommandError(f"--mix 형식이 올바르지 않습니다: {exc}")
+        users = options.get("users") or 0
+        if users < 1:
+            raise CommandError("--users는 1 이상이어야 합니다.")
+        url = options.get("url")
+        if url or options.get("use_current_db"):
+            if options.get("allow_writes"):
+                if mix.get("comment"):
+                    self.stderr.write(self.style.WARNING("경고: 실제 사이트에 부하 테스트 댓글을 게시합니다."))
+            elif mix.pop("comment", 0):
+                if not any(mix.values()):
+                    raise CommandError("실제 사이트에는 댓글을 쓰지 않으므로 --mix에 댓글 외 시나리오가 필요합니다.")
+                self.stdout.write("실제 사이트이므로 댓글 시나리오를 제외합니다 (--allow-writes로 포함).")
+        duration, per_user = options.get("duration"), options.get("requests")
+        if duration is None and per_user is None:
+            duration = 10.0
+        plan = dict(
+            users=users,
+            duration=duration,
+            requests_per_user=per_user,
+            mix=mix,
+            think_time=options.get("think_time") or 0.0,
+            seed=options.get("seed") or 0,
+        )
+
+        if url:
+            festival_ids = self.remote_festival_ids(url)
+            result = run(lambda number: HttpClient(url), festival_ids, list_pages=BROWSE_PAGES, **plan)
+        else:
+            from config.wsgi import application
+
+            if options.get("use_current_db"):
+                database = self.current_database()
+            else:
+                database = self.scratch_database(options.get("rows") or 0)
+            with database:
+                festival_ids = list(Festival.objects.filter(is_active=True).values_list("pk", flat=True))
+                pages = min(BROWSE_PAGES, math.ceil(len(festival_ids) / PAGE_SIZE))
+                result = run(
+                    lambda number: WsgiClient(application, f"10.0.{number // 250}.{number % 250 + 1}"),
+                    festival_ids,
+                    list_pages=pages,
+                    **plan,
+                )
+        self.report(result)
+
+        limit = options.get("fail_on_error_rate")
+        if limit is not None and result["total"]["error_rate"] > limit:
+            raise CommandError(f"오류율 {result['total']['error_rate']:.2%}가 허용치 {limit:.2%}를 넘었습니다.")
+
+    @contextmanager
+    def current_database(self):
+        try:
+            yield
+        finally:
+            comment_buffer.flush()
+            view_counter.flush()
+
+    @contextmanager
+    def scratch_database(self, rows: int):
+        """A throwaway file database (threads need a real file to contend on) seeded with synthetic festivals."""
+        handle, path = tempfile.mkstemp(prefix="festival-loadtest-", suffix=".sqlite3")
+        os.close(handle)
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        old_name, old_test_name = connection.settings_dict["NAME"], test_settings.get("NAME")
+        test_settings["NAME"] = path
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            records = [r for r in normalize_rows(synthetic_rows(rows)) if r is not None]
+            apply_plan(plan_reconcile(records))
+            yield
+            # Write what the run queued so the write path is part of the measurement.
+            comment_buffer.flush()
+            view_counter.flush()
+        finally:
+            comment_buffer.discard()
+            view_counter.discard()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings["NAME"] = old_test_name
+
+    def remote_festival_ids(self, url):
+        try:
+            response = requests.get(url.rstrip("/") + "/", timeout=30)
+        except requests.RequestException as exc:
+            raise CommandError(f"{url}에 연결할 수 없습니다: {exc}")
+        # The first list page is enough to find festivals to open and comment on.
+        return sorted({int(pk) for pk in re.findall(r'href="/festival/(\d+)/"', response.text)})
+
+    def report(self, result):
+        self.stdout.write(f"{'scenario':<10} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for row in result["scenarios"] + [result["total"]]:
+            self.stdout.write(
+                f"{row['name']:<10} {row['requests']:>9} {row['error_rate']:>7.1%} "
+                f"{row['p50'] * 1000:>9.1f} {row['p95'] * 1000:>9.1f} {row['p99'] * 1000:>9.1f}"
+            )
+        self.stdout.write(
+            f"처리량: {result['throughput']:.1f} req/s ({result['total']['requests']}건, {result['elapsed']:.1f}초), "
+            f"댓글 속도 제한 {result['rate_limited']}건"
+        )
+        for kind, count in sorted(result["errors"].items(), key=lambda item: -item[1]):
+            self.stdout.write(f"  오류 {kind}: {count}건")
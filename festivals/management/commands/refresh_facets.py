@@ -0,0 +1,39 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from festivals.edge_cache import DETAIL_KEY, LIST_KEY, request_purge
+from festivals.facets import rebuild_facets
+from festivals.maptiles import rebuild_map_clusters
+from festivals.models import FacetCount, Festival, Location, MapCluster
+from festivals.outbox import record_location
+
+
+class Command(BaseCommand):
+    help = "Rebuild festival facet counts and map clusters from scratch (run daily so ongoing/upcoming/past stay current)."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            stale = []
+            for location in Location.objects.filter(sido=""):
+                location.fill_region()
+                if location.sido:
+                    stale.append(location)
+            Location.objects.bulk_update(stale, ["sido", "sigungu"], batch_size=500)
+            # bulk_update skips signals; log the region change for outbox consumers.
+            users = defaultdict(list)
+            for location_id, pk in Festival.objects.filter(location__in=stale).values_list("location_id", "pk"):
+                users[location_id].append(pk)
+            for location in stale:
+                record_location(location.pk, users[location.pk])
+            if stale:
+                request_purge([LIST_KEY, DETAIL_KEY])
+            rebuild_facets()
+            rebuild_map_clusters()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"완료: 지역 {len(stale)}건 보정, 패싯 값 {FacetCount.objects.count()}개, "
+                f"지도 클러스터 {MapCluster.objects.count()}개 재계산"
+            )
+        )
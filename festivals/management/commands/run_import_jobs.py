@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from festivals.jobs import claim, run_job, sweep_uploads
+from festivals.models import ImportJob, IngestRun
+
+
+class Command(BaseCommand):
+    help = "Run queued import jobs from the staff import page, oldest first (one running job per source)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source", action="append", choices=IngestRun.Source.values, help="Only run jobs of this source (repeatable)."
+        )
+        parser.add_argument("--follow", action="store_true", help="Keep polling for new jobs.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --follow (default: 5)")
+
+    def handle(self, *args, **options):
+        styles = {ImportJob.Status.COMPLETED: self.style.SUCCESS, ImportJob.Status.FAILED: self.style.ERROR}
+        ran = 0
+        while True:
+            job = claim(options.get("source"))
+            if job is not None:
+                self.stdout.write(f"작업 #{job.pk} ({job.get_source_display()}) 시작")
+                job = run_job(job)
+                message = f"작업 #{job.pk}: {job.get_status_display()}" + (f" - {job.error}" if job.error else "")
+                self.stdout.write(styles.get(job.status, self.style.WARNING)(message))
+                ran += 1
+                continue
+            removed = sweep_uploads()
+            if removed:
+                self.stdout.write(f"보관 기간이 지난 업로드 파일 {removed}개 삭제")
+            if not options.get("follow"):
+                self.stdout.write(f"대기 중인 작업 없음 (이번 실행에서 {ran}건 처리)")
+                return
+            time.sleep(options.get("interval") or 5.0)
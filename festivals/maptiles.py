@@ -0,0 +1,218 @@
+"""Precomputed map clusters per zoom level and tile.
+
+Every active festival with coordinates has a ``MapPoint`` holding its Web
+Mercator position on a grid of ``CELLS x CELLS`` cells per 256px tile at
+``MAX_ZOOM``. A cell at a lower zoom is the same position shifted right by the
+zoom difference, so one point belongs to exactly one ``MapCluster`` per zoom.
+Clusters keep a count and coordinate sums; a moved, added or removed point only
+adds or subtracts itself in the cells it leaves and enters, like facet counts.
+Serving a bounding box is one range query on ``(zoom, tile_x, tile_y)``.
+"""
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.db.models import F
+
+from .models import Festival, MapCluster, MapPoint
+
+MIN_ZOOM = 5
+MAX_ZOOM = 14
+CELL_BITS = 3  # 8 x 8 cells of 32px per tile
+CELLS = 1 << CELL_BITS
+GRID_BITS = MAX_ZOOM + CELL_BITS
+MAX_LATITUDE = 85.05112878
+# Up to this many changed clusters are updated one ``F()`` expression each; larger
+# sets (ingest batches) are read per zoom and written back in bulk.
+BULK_THRESHOLD = 200
+MAX_TILES = 256
+BATCH_SIZE = 500
+
+Key = Tuple[int, int, int, int]
+
+
+def project(latitude: float, longitude: float, bits: int = GRID_BITS) -> Tuple[int, int]:
+    """Web Mercator position on a ``2**bits`` square grid."""
+    size = 1 << bits
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))
+    x = (longitude + 180.0) / 360.0
+    sin = math.sin(math.radians(latitude))
+    y = 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+    return min(size - 1, max(0, int(x * size))), min(size - 1, max(0, int(y * size)))
+
+
+def cluster_keys(px: int, py: int) -> List[Key]:
+    keys = []
+    for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+        shift = MAX_ZOOM - zoom
+        cx, cy = px >> shift, py >> shift
+        keys.append((zoom, cx >> CELL_BITS, cy >> CELL_BITS, (cy & (CELLS - 1)) << CELL_BITS | (cx & (CELLS - 1))))
+    return keys
+
+
+def tile_range(west: float, south: float, east: float, north: float, zoom: int) -> Tuple[int, int, int, int]:
+    """(x0, y0, x1, y1) of the tiles covering a bounding box at ``zoom``."""
+    x0, y0 = project(north, west, bits=zoom)
+    x1, y1 = project(south, east, bits=zoom)
+    return x0, y0, x1, y1
+
+
+def _add(deltas, point, sign: int):
+    px, py, latitude, longitude = point
+    for key in cluster_keys(px, py):
+        delta = deltas[key]
+        delta[0] += sign
+        delta[1] += sign * latitude
+        delta[2] += sign * longitude
+
+
+def _apply_deltas(deltas: Dict[Key, list]):
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if len(deltas) > BULK_THRESHOLD:
+        _apply_bulk(deltas)
+        return
+    for (zoom, tile_x, tile_y, cell), (count, latitude, longitude) in deltas.items():
+        updated = MapCluster.objects.filter(zoom=zoom, tile_x=tile_x, tile_y=tile_y, cell=cell).update(
+            count=F("count") + count,
+            latitude_sum=F("latitude_sum") + latitude,
+            longitude_sum=F("longitude_sum") + longitude,
+        )
+        if not updated and count > 0:
+            MapCluster.objects.create(
+                zoom=zoom, tile_x=tile_x, tile_y=tile_y, cell=cell, count=count,
+                latitude_sum=latitude, longitude_sum=longitude,
+            )
+    if any(count < 0 for count, _, _ in deltas.values()):
+        MapCluster.objects.filter(count__lte=0).delete()
+
+
+def _apply_bulk(deltas: Dict[Key, list]):
+    by_zoom = defaultdict(dict)
+    for (zoom, *rest), delta in deltas.items():
+        by_zoom[zoom][tuple(rest)] = delta
+    changed, created, emptied = [], [], []
+    for zoom, zoom_deltas in by_zoom.items():
+        xs = {tile_x for tile_x, _, _ in zoom_deltas}
+        ys = {tile_y for _, tile_y, _ in zoom_deltas}
+        existing = {
+            (c.tile_x, c.tile_y, c.cell): c
+            for c in MapCluster.objects.filter(zoom=zoom, tile_x__range=(min(xs), max(xs)), tile_y__range=(min(ys), max(ys)))
+        }
+        for key, (count, latitude, longitude) in zoom_deltas.items():
+            cluster = existing.get(key)
+            if cluster is None:
+                if count > 0:
+                    created.append(
+                        MapCluster(
+                            zoom=zoom, tile_x=key[0], tile_y=key[1], cell=key[2], count=count,
+                            latitude_sum=latitude, longitude_sum=longitude,
+                        )
+                    )
+                continue
+            cluster.count += count
+            cluster.latitude_sum += latitude
+            cluster.longitude_sum += longitude
+            (changed if cluster.count > 0 else emptied).append(cluster)
+    MapCluster.objects.filter(pk__in=[c.pk for c in emptied]).delete()
+    MapCluster.objects.bulk_update(changed, ["count", "latitude_sum", "longitude_sum"], batch_size=BATCH_SIZE)
+    MapCluster.objects.bulk_create(created, batch_size=BATCH_SIZE)
+
+
+def _points(festival_ids) -> Dict[int, Tuple[int, int, float, float]]:
+    rows = Festival.objects.filter(
+        pk__in=festival_ids, is_active=True, location__latitude__isnull=False, location__longitude__isnull=False
+    ).values_list("pk", "location__latitude", "location__longitude")
+    points = {}
+    for pk, latitude, longitude in rows:
+        latitude, longitude = float(latitude), float(longitude)
+        points[pk] = (*project(latitude, longitude), latitude, longitude)
+    return points
+
+
+def sync_map_points(festival_ids: Iterable[int]):
+    """Bring the map points of the given festivals, and the clusters they fall in, up to date."""
+    ids = sorted({pk for pk in festival_ids if pk is not None})
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    for start in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[start : start + BATCH_SIZE]
+        wanted = _points(chunk)
+        stored = {
+            pk: (px, py, latitude, longitude)
+            for pk, px, py, latitude, longitude in MapPoint.objects.filter(festival_id__in=chunk).values_list(
+                "festival_id", "px", "py", "latitude", "longitude"
+            )
+        }
+        stale, fresh = [], []
+        for pk in chunk:
+            old, new = stored.get(pk), wanted.get(pk)
+            if old == new:
+                continue
+            if old:
+                _add(deltas, old, -1)
+                stale.append(pk)
+            if new:
+                _add(deltas, new, 1)
+                fresh.append(MapPoint(pk, *new))
+        MapPoint.objects.filter(festival_id__in=stale).delete()
+        MapPoint.objects.bulk_create(fresh, batch_size=BATCH_SIZE)
+    _apply_deltas(deltas)
+
+
+def remove_map_points(festival_ids: Iterable[int]):
+    """Drop the points of festivals that are about to be deleted."""
+    ids = list(festival_ids)
+    deltas = defaultdict(lambda: [0, 0.0, 0.0])
+    rows = MapPoint.objects.filter(festival_id__in=ids)
+    for point in rows.values_list("px", "py", "latitude", "longitude"):
+        _add(deltas, point, -1)
+    rows.delete()
+    _apply_deltas(deltas)
+
+
+def rebuild_map_clusters():
+    """Recompute every point and cluster from scratch."""
+    MapPoint.objects.all().delete()
+    ids = list(Festival.objects.filter(is_active=True).values_list("pk", flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        rows = _points(ids[start : start + BATCH_SIZE])
+        MapPoint.objects.bulk_create([MapPoint(pk, *point) for pk, point in rows.items()], batch_size=BATCH_SIZE)
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for point in MapPoint.objects.values_list("px", "py", "latitude", "longitude").iterator(chunk_size=5000):
+        _add(totals, point, 1)
+    MapCluster.objects.all().delete()
+    MapCluster.objects.bulk_create(
+        [
+            MapCluster(
+                zoom=zoom, tile_x=tile_x, tile_y=tile_y, cell=cell, count=count,
+                latitude_sum=latitude, longitude_sum=longitude,
+            )
+            for (zoom, tile_x, tile_y, cell), (count, latitude, longitude) in totals.items()
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def clusters_in(west: float, south: float, east: float, north: float, zoom: int) -> Tuple[int, List[dict]]:
+    """(clamped zoom, clusters of the tiles covering a bounding box); ValueError for a bad or too large box."""
+    if not all(math.isfinite(value) for value in (west, south, east, north)):
+        raise ValueError("coordinates must be finite")
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= 90 and -90 <= north <= 90):
+        raise ValueError("coordinates out of range")
+    zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+    x0, y0, x1, y1 = tile_range(west, south, east, north, zoom)
+    if (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_TILES:
+        raise ValueError("bounding box spans too many tiles")
+    rows = MapCluster.objects.filter(zoom=zoom, tile_x__range=(x0, x1), tile_y__range=(y0, y1)).values_list(
+        "tile_x", "tile_y", "cell", "count", "latitude_sum", "longitude_sum"
+    )
+    return zoom, [
+        {
+            "key": f"{zoom}/{tile_x}/{tile_y}/{cell}",
+            "count": count,
+            "lat": round(latitude_sum / count, 6),
+            "lng": round(longitude_sum / count, 6),
+        }
+        for tile_x, tile_y, cell, count, latitude_sum, longitude_sum in rows
+    ]
@@ -0,0 +1,379 @@
+"""Process-aggregated runtime metrics in the Prometheus text format.
+
+Counters, gauges and fixed-bucket histograms are updated in process memory
+under one lock, which keeps hot paths to a dict update. When
+``FESTIVAL_METRICS_DIR`` is set, each process writes its values to
+``<dir>/<pid>-<start>.json`` at most every ``FESTIVAL_METRICS_FLUSH_INTERVAL``
+seconds, and ``/metrics`` sums the files of all web workers and ingest
+commands: counters and histograms add up, a gauge shows its latest write.
+Without the directory only the serving process's own values are exposed.
+
+The start time in the file name keeps a recycled pid from overwriting a dead
+process's file. At exit a process merges its values into ``aggregate.json``
+and removes its file (like prometheus_client's ``mark_process_dead``); files of
+processes that died without exiting cleanly are folded in the same way by the
+next scrape, so counters never go backwards and the directory stays small.
+Liveness is checked by pid, so the directory must not be shared between hosts.
+These merges run under an ``flock`` on ``aggregate.lock``; without ``fcntl``
+(Windows) processes only flush their file at exit and nothing is merged.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+from django.conf import settings
+from django.db import connection
+
+try:  # advisory file locks; not available on Windows
+    import fcntl
+except ImportError:  # pragma: no cover - depends on the environment
+    fcntl = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+AGGREGATE = "aggregate.json"  # values of processes that have exited
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, help: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self.values: Dict[Tuple, object] = {}
+
+    def _key(self, labels) -> Tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def dump(self):
+        return [[list(key), value] for key, value in self.values.items()]
+
+    def samples(self, values):
+        raise NotImplementedError
+
+
+class CounterMetric(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.maybe_flush()
+
+    @staticmethod
+    def merge(current, other):
+        return (current or 0) + other
+
+    def samples(self, values):
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class GaugeMetric(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = [value, time.time()]
+        self.registry.maybe_flush()
+
+    @staticmethod
+    def merge(current, other):
+        return other if current is None or other[1] >= current[1] else current
+
+    def samples(self, values):
+        for key, (value, _) in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class HistogramMetric(Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labels=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                # Per-bucket (not cumulative) counts, then +Inf, then sum.
+                state = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+        self.registry.maybe_flush()
+
+    @staticmethod
+    def merge(current, other):
+        return list(other) if current is None else [a + b for a, b in zip(current, other)]
+
+    def samples(self, values):
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(float(state[-1]))}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics: Dict[str, Metric] = {}
+        self._last_flush = time.monotonic()
+        self._pid = None
+        self._file_name = ""
+        self._retired = False
+
+    def _add(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()) -> CounterMetric:
+        return self._add(CounterMetric(self, name, help, labels))
+
+    def gauge(self, name, help, labels=()) -> GaugeMetric:
+        return self._add(GaugeMetric(self, name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS) -> HistogramMetric:
+        return self._add(HistogramMetric(self, name, help, labels, buckets))
+
+    @staticmethod
+    def directory():
+        path = getattr(settings, "FESTIVAL_METRICS_DIR", "")
+        return Path(path) if path else None
+
+    def file_name(self) -> str:
+        """``<pid>-<start>.json``, renewed in a forked child."""
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid, self._file_name = pid, f"{pid}-{time.time_ns()}.json"
+        return self._file_name
+
+    def _payload(self):
+        with self.lock:
+            return {name: metric.dump() for name, metric in self.metrics.items() if metric.values}
+
+    def maybe_flush(self):
+        if time.monotonic() - self._last_flush >= getattr(settings, "FESTIVAL_METRICS_FLUSH_INTERVAL", 5):
+            self.flush()
+
+    def flush(self):
+        """Write this process's values to its file (atomically, via rename)."""
+        self._last_flush = time.monotonic()
+        directory = self.directory()
+        if directory is None or self._retired:
+            return
+        payload = self._payload()
+        if not payload:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_json(directory / self.file_name(), payload)
+
+    def retire(self):
+        """At exit: fold this process's values into the aggregate file and remove its own file."""
+        directory = self.directory()
+        if directory is None or self._retired:
+            return
+        if fcntl is None:
+            self.flush()
+            return
+        self._retired = True  # a late flush would count these values twice
+        payload = self._payload()
+        directory.mkdir(parents=True, exist_ok=True)
+        with _locked(directory):
+            aggregate = {}
+            self._merge_into(aggregate, self._read(directory / AGGREGATE) or {})
+            self._merge_into(aggregate, payload)
+            _write_json(directory / AGGREGATE, _dump(aggregate))
+            (directory / self.file_name()).unlink(missing_ok=True)
+
+    def _compact(self, directory: Path):
+        """Fold the files of processes that are gone into the aggregate file (caller holds the lock)."""
+        dead = [path for path in directory.glob("*-*.json") if not _alive(path.stem.split("-")[0])]
+        if not dead:
+            return
+        aggregate = {}
+        self._merge_into(aggregate, self._read(directory / AGGREGATE) or {})
+        for path in dead:
+            self._merge_into(aggregate, self._read(path) or {})
+        _write_json(directory / AGGREGATE, _dump(aggregate))
+        for path in dead:
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _read(path: Path):
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None  # missing, or being replaced right now; picked up on the next scrape
+
+    def _merge_into(self, merged, payload):
+        for name, rows in payload.items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                continue
+            values = merged.setdefault(name, {})
+            for key, value in rows:
+                key = tuple(key)
+                values[key] = metric.merge(values.get(key), value)
+
+    def collect(self) -> Dict[str, Dict[Tuple, object]]:
+        directory = self.directory()
+        if directory is None:
+            with self.lock:
+                return {name: {key: value for key, value in metric.values.items()} for name, metric in self.metrics.items()}
+        self.flush()
+        merged: Dict[str, Dict[Tuple, object]] = {name: {} for name in self.metrics}
+        if not directory.exists():
+            return merged
+        with _locked(directory):
+            if fcntl is not None:
+                self._compact(directory)
+            for path in directory.glob("*.json"):
+                self._merge_into(merged, self._read(path) or {})
+        return merged
+
+    def exposition(self) -> str:
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.samples(values))
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.values.clear()
+
+
+def _dump(merged) -> dict:
+    return {name: [[list(key), value] for key, value in values.items()] for name, values in merged.items()}
+
+
+def _write_json(path: Path, payload):
+    tmp = path.with_suffix(f".tmp{os.getpid()}-{threading.get_ident()}")
+    tmp.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _alive(pid: str) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except ValueError:
+        return True  # not a process file
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+
+@contextmanager
+def _locked(directory: Path):
+    if fcntl is None:
+        yield
+        return
+    with open(directory / "aggregate.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+registry = Registry()
+atexit.register(registry.retire)
+
+http_requests = registry.counter(
+    "festival_http_requests_total", "HTTP responses by view, status and cacheability.", ("view", "method", "status", "cache")
+)
+http_latency = registry.histogram("festival_http_request_duration_seconds", "Request latency by view.", ("view",))
+http_queries = registry.histogram(
+    "festival_http_request_queries", "SQL queries per request by view.", ("view",), buckets=QUERY_BUCKETS
+)
+sql_queries = registry.counter("festival_sql_queries_total", "SQL queries run while serving requests.", ("view",))
+comments_submitted = registry.counter("festival_comments_submitted_total", "Comments accepted for writing.")
+comments_rejected = registry.counter("festival_comments_rate_limited_total", "Comment posts rejected by the rate limit.")
+comments_written = registry.counter("festival_comments_written_total", "Comments written to the database.")
+comment_batches = registry.histogram(
+    "festival_comment_batch_size", "Comments per bulk write.", buckets=(1, 2, 5, 10, 20, 50, 100)
+)
+ingest_rows = registry.counter("festival_ingest_rows_total", "Rows/items processed by ingest commands.", ("source",))
+ingest_seconds = registry.counter("festival_ingest_seconds_total", "Wall time of ingest commands.", ("source",))
+ingest_rate = registry.gauge("festival_ingest_rows_per_second", "Throughput of the latest ingest run.", ("source",))
+api_cache = registry.counter(
+    "festival_api_cache_total", "fetch_festivals response cache lookups.", ("result",)
+)
+
+
+def record_ingest(source: str, rows: int, seconds: float):
+    """Called once at the end of an ingest command; flushes because the process is about to exit."""
+    ingest_rows.inc(rows, source=source)
+    ingest_seconds.inc(seconds, source=source)
+    ingest_rate.set(rows / seconds if seconds > 0 else 0.0, source=source)
+    registry.flush()
+
+
+class MetricsMiddleware:
+    """Per-view latency, SQL query count and response cacheability (keep it first in MIDDLEWARE)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        cache = "public" if "public" in response.get("Cache-Control", "") else "private"
+        http_requests.inc(view=view, method=request.method, status=response.status_code, cache=cache)
+        http_latency.observe(elapsed, view=view)
+        http_queries.observe(queries[0], view=view)
+        sql_queries.inc(queries[0], view=view)
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:35
+
+from django.db import migrations, models
+
+
+def infer_source(apps, schema_editor):
+    # API rows are keyed on the numeric IFAC idx; only the CSV loader fills data_reference_date.
+    Festival = apps.get_model("festivals", "Festival")
+    Festival.objects.filter(external_id__regex=r"^[0-9]+$").update(source="api")
+    Festival.objects.filter(source="manual", data_reference_date__isnull=False).update(source="csv")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festivals', '0004_ingest_runs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='festival',
+            name='is_active',
+            field=models.BooleanField(db_index=True, default=True),
+        ),
+        migrations.AddField(
+            model_name='festival',
+            name='source',
+            field=models.CharField(choices=[('manual', 'Manual'), ('csv', 'CSV'), ('api', 'API')], default='manual', max_length=20),
+        ),
+        migrations.RunPython(infer_source, migrations.RunPython.noop),
+    ]
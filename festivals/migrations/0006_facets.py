@@ -0,0 +1,108 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of festivals.services.split_region as of this migration, so later
+# changes to the live helper don't change what this migration does.
+SIDO_ALIASES = {
+    "서울특별시": ["서울", "서울시"],
+    "부산광역시": ["부산", "부산시"],
+    "대구광역시": ["대구", "대구시"],
+    "인천광역시": ["인천", "인천시"],
+    "광주광역시": ["광주", "광주시"],
+    "대전광역시": ["대전", "대전시"],
+    "울산광역시": ["울산", "울산시"],
+    "세종특별자치시": ["세종", "세종시"],
+    "경기도": ["경기"],
+    "강원특별자치도": ["강원도", "강원"],
+    "충청북도": ["충북"],
+    "충청남도": ["충남"],
+    "전북특별자치도": ["전라북도", "전북"],
+    "전라남도": ["전남"],
+    "경상북도": ["경북"],
+    "경상남도": ["경남"],
+    "제주특별자치도": ["제주도", "제주"],
+}
+SIDO_LOOKUP = {alias: name for name, aliases in SIDO_ALIASES.items() for alias in [name, *aliases]}
+BATCH_SIZE = 1000
+
+
+def split_region(address):
+    tokens = str(address or "").split()
+    sido = SIDO_LOOKUP.get(tokens[0], "") if tokens else ""
+    if not sido:
+        return "", ""
+    return sido, tokens[1] if len(tokens) > 1 and tokens[1][-1] in "시군구" else ""
+
+
+def fill_regions(apps, schema_editor):
+    Location = apps.get_model("festivals", "Location")
+    last = 0
+    while True:
+        batch = list(Location.objects.filter(pk__gt=last).order_by("pk")[:BATCH_SIZE])
+        if not batch:
+            return
+        for location in batch:
+            location.sido, location.sigungu = split_region(location.address_road or location.address_lot)
+        Location.objects.bulk_update(batch, ["sido", "sigungu"])
+        last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festivals', '0005_festival_source_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=200)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FestivalFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=200)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='sido',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='sigungu',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['sido', 'sigungu'], name='festivals_l_sido_07fe65_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facetcount',
+            index=models.Index(fields=['facet', '-count'], name='festivals_f_facet_109d4b_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='facetcount',
+            unique_together={('facet', 'value')},
+        ),
+        migrations.AddField(
+            model_name='festivalfacet',
+            name='festival',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='festivals.festival'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='festivalfacet',
+            unique_together={('festival', 'facet', 'value')},
+        ),
+        migrations.RunPython(fill_regions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festivals', '0006_facets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='festival',
+            name='popularity',
+            field=models.FloatField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='festival',
+            name='view_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+    ]
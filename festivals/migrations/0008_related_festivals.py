@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festivals', '0007_view_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FestivalSignature',
+            fields=[
+                ('festival', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='festivals.festival')),
+                ('signature', models.BinaryField()),
+                ('source_updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RelatedFestival',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('festival', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related', to='festivals.festival')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_from', to='festivals.festival')),
+            ],
+            options={
+                'ordering': ['festival', 'rank'],
+                'indexes': [models.Index(fields=['festival', 'rank'], name='festivals_r_festiva_e4522a_idx')],
+                'unique_together': {('festival', 'related')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SignatureBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('festival', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signature_bands', to='festivals.festival')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket', 'band'], name='festivals_s_bucket_68c93a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festivals', '0008_related_festivals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='festival',
+            name='merged_into',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='merged_duplicates', to='festivals.festival'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-19 18:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festivals', '0009_festival_merged_into'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedFestival',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('external_id', models.CharField(max_length=255, unique=True)),
+                ('title', models.CharField(max_length=200)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('description', models.TextField(blank=True)),
+                ('telephone', models.CharField(blank=True, max_length=50)),
+                ('homepage', models.URLField(blank=True)),
+                ('extra_info', models.TextField(blank=True)),
+                ('data_reference_date', models.DateField(blank=True, null=True)),
+                ('source', models.CharField(choices=[('manual', 'Manual'), ('csv', 'CSV'), ('api', 'API')], default='manual', max_length=20)),
+                ('place', models.CharField(blank=True, max_length=200)),
+                ('address', models.CharField(blank=True, max_length=255)),
+                ('sido', models.CharField(blank=True, max_length=50)),
+                ('sigungu', models.CharField(blank=True, max_length=50)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=12, max_digits=18, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=12, max_digits=18, null=True)),
+                ('roles', models.JSONField(default=dict)),
+                ('view_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-start_date', 'title'],
+                'indexes': [models.Index(fields=['-start_date', 'title'], name='festivals_a_start_d_bc3fd5_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('nickname', models.CharField(max_length=30)),
+                ('content', models.TextField(max_length=1000)),
+                ('created_at', models.DateTimeField()),
+                ('festival', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='festivals.archivedfestival')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festivals', '0011_backfill_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapPoint',
+            fields=[
+                ('festival', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='map_point', serialize=False, to='festivals.festival')),
+                ('px', models.IntegerField()),
+                ('py', models.IntegerField()),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MapCluster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('tile_x', models.IntegerField()),
+                ('tile_y', models.IntegerField()),
+                ('cell', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('latitude_sum', models.FloatField(default=0)),
+                ('longitude_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'unique_together': {('zoom', 'tile_x', 'tile_y', 'cell')},
+            },
+        ),
+    ]
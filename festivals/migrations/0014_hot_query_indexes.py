@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festivals', '0013_outbox'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='facetcount',
+            name='festivals_f_facet_109d4b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['festival', '-created_at'], name='festivals_c_festiva_b82a06_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facetcount',
+            index=models.Index(fields=['facet', '-count', 'value'], name='festivals_f_facet_523764_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='festival',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['start_date', 'title'], name='festival_active_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='festivalorganization',
+            index=models.Index(fields=['organization', 'role'], name='festivals_f_organiz_813fd8_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festivals', '0014_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('csv', 'CSV'), ('api', 'API')], max_length=20)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('upload_path', models.CharField(blank=True, max_length=500)),
+                ('status', models.CharField(choices=[('queued', '대기'), ('running', '실행 중'), ('completed', '완료'), ('failed', '실패'), ('cancelled', '취소됨')], default='queued', max_length=20)),
+                ('cancel_requested', models.BooleanField(default=False)),
+                ('progress', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(blank=True, null=True)),
+                ('output', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'source'], name='festivals_i_status_02ff48_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'running')), fields=('source',), name='one_running_import_per_source')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-19 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festivals', '0015_import_jobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedfestival',
+            index=models.Index(fields=['id', 'updated_at'], name='archived_sitemap_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='festival',
+            index=models.Index(fields=['merged_into', 'id', 'updated_at'], name='festival_sitemap_idx'),
+        ),
+    ]
@@ -1,4 +1,13 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from .services import split_region
 
 
 class Location(models.Model):
@@ -9,14 +18,25 @@ class Location(models.Model):
     address_lot = models.CharField(max_length=255, blank=True)
     latitude = models.DecimalField(max_digits=18, decimal_places=12, null=True, blank=True)
     longitude = models.DecimalField(max_digits=18, decimal_places=12, null=True, blank=True)
+    # Derived from the address on save; used by the region facets.
+    sido = models.CharField(max_length=50, blank=True)
+    sigungu = models.CharField(max_length=50, blank=True)
 
     class Meta:
         unique_together = ("name", "address_road", "address_lot", "latitude", "longitude")
+        indexes = [models.Index(fields=["sido", "sigungu"])]
 
     def __str__(self):
         parts = [self.name or "", self.address_road or self.address_lot or ""]
         return " ".join(part for part in parts if part).strip() or "Unknown location"
 
+    def fill_region(self):
+        self.sido, self.sigungu = split_region(self.address_road or self.address_lot)
+
+    def save(self, *args, **kwargs):
+        self.fill_region()
+        super().save(*args, **kwargs)
+
 
 class Organization(models.Model):
     """Party involved with a festival (organizer/host/sponsor)."""
@@ -33,6 +53,11 @@ class Organization(models.Model):
 
 
 class Festival(models.Model):
+    class Source(models.TextChoices):
+        MANUAL = "manual", "Manual"
+        CSV = "csv", "CSV"
+        API = "api", "API"
+
     external_id = models.CharField(max_length=255, unique=True, db_index=True, blank=True)
     title = models.CharField(max_length=200)
     location = models.ForeignKey(Location, null=True, blank=True, on_delete=models.SET_NULL, related_name="festivals")
@@ -44,11 +69,29 @@ class Festival(models.Model):
     extra_info = models.TextField(blank=True)
     data_reference_date = models.DateField(null=True, blank=True)
     pub_date = models.DateTimeField(null=True, blank=True)
+    source = models.CharField(max_length=20, choices=Source.choices, default=Source.MANUAL)
+    # False once the festival disappeared from its authoritative source (soft delete).
+    is_active = models.BooleanField(default=True, db_index=True)
+    # Set when this row was merged into another as a duplicate; loaders keep such rows inactive.
+    merged_into = models.ForeignKey(
+        "self", null=True, blank=True, on_delete=models.SET_NULL, related_name="merged_duplicates"
+    )
+    view_count = models.PositiveIntegerField(default=0, db_index=True)
+    # Forward-decayed popularity (log scale); see festivals.popularity.
+    popularity = models.FloatField(default=0, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["start_date", "title"]
+        # The public list pages through active festivals in this order. Django renders
+        # is_active=True as a bare "WHERE is_active", which only a partial index matches.
+        # The sitemaps read (id, updated_at) of unmerged festivals by id range; the
+        # second index covers those reads so they never touch table rows.
+        indexes = [
+            models.Index(fields=["start_date", "title"], condition=Q(is_active=True), name="festival_active_list_idx"),
+            models.Index(fields=["merged_into", "id", "updated_at"], name="festival_sitemap_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -60,6 +103,9 @@ class Festival(models.Model):
         super().save(*args, **kwargs)
 
     def _get_org_name(self, role: str):
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("organizations")
+        if prefetched is not None:  # prefetched by the detail view; no query per role
+            return next((rel.organization.name for rel in prefetched if rel.role == role), "")
         rel = self.organizations.filter(role=role).select_related("organization").first()
         return rel.organization.name if rel else ""
 
@@ -130,7 +176,8 @@ class FestivalOrganization(models.Model):
     role = models.CharField(max_length=20, choices=Role.choices)
 
     class Meta:
-        unique_together = ("festival", "role")
+        unique_together = ("festival", "role")  # also serves (festival, role) lookups
+        indexes = [models.Index(fields=["organization", "role"])]
 
     def __str__(self):
         return f"{self.festival.title} - {self.get_role_display()}: {self.organization.name}"
@@ -144,6 +191,362 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["festival", "-created_at"])]
 
     def __str__(self):
         return f"{self.nickname}: {self.content[:20]}"
+
+
+class FestivalFacet(models.Model):
+    """Facet values a festival currently contributes to ``FacetCount``."""
+
+    festival = models.ForeignKey(Festival, on_delete=models.CASCADE, related_name="facets")
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=200)
+
+    class Meta:
+        unique_together = ("festival", "facet", "value")
+
+
+class FacetCount(models.Model):
+    """Precomputed number of active festivals per facet value, updated incrementally."""
+
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=200)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("facet", "value")
+        indexes = [models.Index(fields=["facet", "-count", "value"])]
+
+    def __str__(self):
+        return f"{self.facet}={self.value}: {self.count}"
+
+
+class IngestRun(models.Model):
+    """Checkpointed execution of an ingest command, used for --resume."""
+
+    class Source(models.TextChoices):
+        CSV = "csv", "CSV"
+        API = "api", "API"
+
+    class Status(models.TextChoices):
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    source = models.CharField(max_length=20, choices=Source.choices)
+    params = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    params_key = models.CharField(max_length=64)
+    last_offset = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.RUNNING)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        indexes = [models.Index(fields=["source", "params_key", "status"])]
+
+    def __str__(self):
+        return f"{self.get_source_display()} #{self.pk} ({self.get_status_display()}, offset {self.last_offset})"
+
+    @staticmethod
+    def make_params_key(params) -> str:
+        payload = json.dumps(params, sort_keys=True, cls=DjangoJSONEncoder)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def start(cls, source: str, params, resume: bool = False) -> "IngestRun":
+        """Return the unfinished run with the same parameters when resuming, else a new run."""
+        params_key = cls.make_params_key(params)
+        if resume:
+            run = (
+                cls.objects.filter(source=source, params_key=params_key)
+                .exclude(status=cls.Status.COMPLETED)
+                .order_by("-started_at")
+                .first()
+            )
+            if run:
+                run.status = cls.Status.RUNNING
+                run.error = ""
+                run.save(update_fields=["status", "error", "updated_at"])
+                return run
+        return cls.objects.create(source=source, params=params, params_key=params_key)
+
+    def checkpoint(self, offset: int):
+        self.last_offset = offset
+        self.save(update_fields=["last_offset", "updated_at"])
+
+    def quarantine(self, offset: int, item_key: str, payload, exc: Exception):
+        return self.errors.create(
+            offset=offset, item_key=(item_key or "")[:255], payload=payload, message=f"{type(exc).__name__}: {exc}"
+        )
+
+    def mark_completed(self):
+        self.status = self.Status.COMPLETED
+        self.finished_at = timezone.now()
+        self.save(update_fields=["status", "finished_at", "updated_at"])
+
+    def mark_failed(self, exc: Exception):
+        self.status = self.Status.FAILED
+        self.error = f"{type(exc).__name__}: {exc}"
+        self.finished_at = timezone.now()
+        self.save(update_fields=["status", "error", "finished_at", "updated_at"])
+
+
+class IngestError(models.Model):
+    """Record that failed during an ingest run and was skipped instead of aborting it."""
+
+    run = models.ForeignKey(IngestRun, related_name="errors", on_delete=models.CASCADE)
+    offset = models.PositiveIntegerField()
+    item_key = models.CharField(max_length=255, blank=True)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    message = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["run", "offset"]
+
+    def __str__(self):
+        return f"{self.run_id}@{self.offset}: {self.message[:40]}"
+
+
+class BackfillProgress(models.Model):
+    """Checkpoint of a chunked backfill (see ``festivals.backfill``), keyed by backfill name."""
+
+    class Status(models.TextChoices):
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    name = models.CharField(max_length=100, unique=True)
+    last_pk = models.BigIntegerField(default=0)
+    processed = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.RUNNING)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()}, pk > {self.last_pk})"
+
+
+class FestivalSignature(models.Model):
+    """MinHash signature of a festival's text, as of ``source_updated_at``."""
+
+    festival = models.OneToOneField(Festival, on_delete=models.CASCADE, primary_key=True, related_name="signature")
+    signature = models.BinaryField()
+    source_updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"signature of {self.festival_id}"
+
+
+class SignatureBand(models.Model):
+    """LSH bucket of one band of a signature; festivals sharing a bucket are candidates."""
+
+    festival = models.ForeignKey(Festival, on_delete=models.CASCADE, related_name="signature_bands")
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=["bucket", "band"])]
+
+    def __str__(self):
+        return f"{self.festival_id} band {self.band}"
+
+
+class RelatedFestival(models.Model):
+    """Precomputed top-k content neighbours of a festival."""
+
+    festival = models.ForeignKey(Festival, on_delete=models.CASCADE, related_name="related")
+    related = models.ForeignKey(Festival, on_delete=models.CASCADE, related_name="related_from")
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["festival", "rank"]
+        unique_together = ("festival", "related")
+        indexes = [models.Index(fields=["festival", "rank"])]
+
+    def __str__(self):
+        return f"{self.festival_id} -> {self.related_id} ({self.score:.2f})"
+
+
+class ArchivedFestival(models.Model):
+    """Festival moved out of the hot table after it ended; keeps its original id.
+
+    Location and roles are stored as a snapshot so the archive needs no joins.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    external_id = models.CharField(max_length=255, unique=True)
+    title = models.CharField(max_length=200)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    description = models.TextField(blank=True)
+    telephone = models.CharField(max_length=50, blank=True)
+    homepage = models.URLField(blank=True)
+    extra_info = models.TextField(blank=True)
+    data_reference_date = models.DateField(null=True, blank=True)
+    source = models.CharField(max_length=20, choices=Festival.Source.choices, default=Festival.Source.MANUAL)
+    place = models.CharField(max_length=200, blank=True)
+    address = models.CharField(max_length=255, blank=True)
+    sido = models.CharField(max_length=50, blank=True)
+    sigungu = models.CharField(max_length=50, blank=True)
+    latitude = models.DecimalField(max_digits=18, decimal_places=12, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=18, decimal_places=12, null=True, blank=True)
+    roles = models.JSONField(default=dict)  # role -> organization name
+    view_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-start_date", "title"]
+        indexes = [
+            models.Index(fields=["-start_date", "title"]),
+            models.Index(fields=["id", "updated_at"], name="archived_sitemap_idx"),  # covers the sitemap reads
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def organizer(self):
+        return self.roles.get(FestivalOrganization.Role.ORGANIZER, "")
+
+    @property
+    def host(self):
+        return self.roles.get(FestivalOrganization.Role.HOST, "")
+
+    @property
+    def sponsor(self):
+        return self.roles.get(FestivalOrganization.Role.SPONSOR, "")
+
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    festival = models.ForeignKey(ArchivedFestival, related_name="comments", on_delete=models.CASCADE)
+    nickname = models.CharField(max_length=30)
+    content = models.TextField(max_length=1000)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.nickname}: {self.content[:20]}"
+
+
+class MapPoint(models.Model):
+    """Map position of an active festival with coordinates, in max-zoom cell pixels."""
+
+    festival = models.OneToOneField(Festival, on_delete=models.CASCADE, primary_key=True, related_name="map_point")
+    px = models.IntegerField()
+    py = models.IntegerField()
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    def __str__(self):
+        return f"{self.festival_id} @ {self.latitude}, {self.longitude}"
+
+
+class MapCluster(models.Model):
+    """Festivals in one grid cell of one map tile at one zoom level, kept as running sums."""
+
+    zoom = models.PositiveSmallIntegerField()
+    tile_x = models.IntegerField()
+    tile_y = models.IntegerField()
+    cell = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    latitude_sum = models.FloatField(default=0)
+    longitude_sum = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ("zoom", "tile_x", "tile_y", "cell")
+
+    def __str__(self):
+        return f"z{self.zoom}/{self.tile_x}/{self.tile_y}#{self.cell}: {self.count}"
+
+
+class ChangeLog(models.Model):
+    """Outbox row written in the same transaction as a festival, location, role or comment change."""
+
+    class Kind(models.TextChoices):
+        FESTIVAL = "festival", "Festival"
+        LOCATION = "location", "Location"
+        ROLE = "role", "Festival organization"
+        COMMENT = "comment", "Comment"
+
+    class Action(models.TextChoices):
+        SAVE = "save", "Save"
+        DELETE = "delete", "Delete"
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    action = models.CharField(max_length=10, choices=Action.choices, default=Action.SAVE)
+    object_id = models.BigIntegerField()
+    # Plain column rather than a foreign key so the row outlives a deleted festival.
+    festival_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} {self.object_id} {self.action}"
+
+
+class OutboxCursor(models.Model):
+    """Last ``ChangeLog`` id processed by one consumer."""
+
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+class ImportJob(models.Model):
+    """Queued ingest command started from the staff import page (see ``festivals.jobs``)."""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "대기"
+        RUNNING = "running", "실행 중"
+        COMPLETED = "completed", "완료"
+        FAILED = "failed", "실패"
+        CANCELLED = "cancelled", "취소됨"
+
+    source = models.CharField(max_length=20, choices=IngestRun.Source.choices)
+    options = models.JSONField(default=dict, blank=True)
+    upload_path = models.CharField(max_length=500, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    cancel_requested = models.BooleanField(default=False)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    output = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "source"])]
+        constraints = [
+            # The per-source lock: a second worker cannot start another job of the same source.
+            models.UniqueConstraint(fields=["source"], condition=Q(status="running"), name="one_running_import_per_source")
+        ]
+
+    def __str__(self):
+        return f"{self.get_source_display()} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def percent(self):
+        return min(100, self.progress * 100 // self.total) if self.total else None
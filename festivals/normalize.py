@@ -0,0 +1,172 @@
+"""Normalization of public-data CSV rows into festival records.
+
+``normalize_row`` is the straightforward per-row reference. ``normalize_rows``
+produces identical records for a whole chunk but works column by column:
+repeated date strings are parsed once, ISO dates skip ``strptime`` and numeric
+columns are converted with NumPy when it is installed.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from .models import FestivalOrganization
+from .services import parse_date, parse_decimal
+
+try:  # optional accelerator
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+TEXT_COLUMNS = {
+    "description": "축제내용",
+    "telephone": "전화번호",
+    "homepage": "홈페이지주소",
+    "extra_info": "관련정보",
+}
+LOCATION_TEXT_COLUMNS = {
+    "name": "개최장소",
+    "address_road": "소재지도로명주소",
+    "address_lot": "소재지지번주소",
+}
+ROLE_COLUMNS = {
+    FestivalOrganization.Role.ORGANIZER: ["주최기관명", "주최기관"],
+    FestivalOrganization.Role.HOST: ["주관기관명", "주관기관"],
+    FestivalOrganization.Role.SPONSOR: ["후원기관명", "후원기관"],
+}
+
+_ISO_DATE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+_PLAIN_NUMBER = re.compile(r"[+-]?[0-9]+(\.[0-9]+)?")
+NUMPY_MIN_VALUES = 256
+
+
+def first_value(row, keys):
+    for k in keys:
+        if k in row and row[k]:
+            return row[k]
+    return ""
+
+
+def _build_record(title, start_date, end_date, reference_date, texts, location, roles):
+    key = f"{title}-{start_date or ''}".strip()
+    if not key:
+        return None
+    return {
+        "external_id": key[:250],
+        "defaults": {
+            "title": title,
+            "start_date": start_date,
+            "end_date": end_date,
+            **texts,
+            "data_reference_date": reference_date,
+        },
+        "location": location,
+        "roles": roles,
+    }
+
+
+def normalize_row(row) -> Optional[dict]:
+    """Normalize one CSV row (reference implementation)."""
+    location = {field: (row.get(column) or "").strip() for field, column in LOCATION_TEXT_COLUMNS.items()}
+    location["latitude"] = parse_decimal(row.get("위도"))
+    location["longitude"] = parse_decimal(row.get("경도"))
+    return _build_record(
+        (row.get("축제명") or "").strip(),
+        parse_date(row.get("축제시작일자")),
+        parse_date(row.get("축제종료일자")),
+        parse_date(row.get("데이터기준일자")),
+        {field: (row.get(column) or "").strip() for field, column in TEXT_COLUMNS.items()},
+        location,
+        {role: first_value(row, keys) for role, keys in ROLE_COLUMNS.items()},
+    )
+
+
+def parse_date_column(values: Sequence, cache: Optional[Dict] = None) -> List[Optional[date]]:
+    """``parse_date`` over a column, parsing each distinct string once."""
+    cache = {} if cache is None else cache
+    result = []
+    for value in values:
+        try:
+            result.append(cache[value])
+            continue
+        except KeyError:
+            pass
+        parsed = None
+        if value:
+            text = str(value).strip()
+            if _ISO_DATE.fullmatch(text):
+                try:
+                    parsed = date.fromisoformat(text)
+                except ValueError:
+                    parsed = parse_date(text)
+            else:
+                parsed = parse_date(text)
+        cache[value] = parsed
+        result.append(parsed)
+    return result
+
+
+def parse_decimal_column(values: Sequence) -> List[Optional[float]]:
+    """``parse_decimal`` over a column; plain numbers go through NumPy when available."""
+    distinct = {}
+    for value in values:
+        if value not in distinct:
+            distinct[value] = None
+    plain = []
+    for value in distinct:
+        if value in (None, ""):
+            continue
+        text = str(value).replace(",", "")
+        if np is not None and _PLAIN_NUMBER.fullmatch(text):
+            plain.append((value, text))
+        else:
+            distinct[value] = parse_decimal(value)
+    if plain and len(plain) >= NUMPY_MIN_VALUES:
+        converted = np.array([text for _, text in plain]).astype(np.float64).tolist()
+        for (value, _), number in zip(plain, converted):
+            distinct[value] = number
+    else:
+        for value, text in plain:
+            distinct[value] = float(text)
+    return [distinct[value] for value in values]
+
+
+def strip_column(values: Sequence) -> List[str]:
+    return [(value or "").strip() for value in values]
+
+
+def normalize_rows(rows: Sequence[dict], date_cache: Optional[Dict] = None) -> List[Optional[dict]]:
+    """Normalize a chunk of CSV rows column by column; same output as ``normalize_row``."""
+    date_cache = {} if date_cache is None else date_cache
+
+    def column(name):
+        return [row.get(name) for row in rows]
+
+    titles = strip_column(column("축제명"))
+    start_dates = parse_date_column(column("축제시작일자"), date_cache)
+    end_dates = parse_date_column(column("축제종료일자"), date_cache)
+    reference_dates = parse_date_column(column("데이터기준일자"), date_cache)
+    texts = {field: strip_column(column(name)) for field, name in TEXT_COLUMNS.items()}
+    location_texts = {field: strip_column(column(name)) for field, name in LOCATION_TEXT_COLUMNS.items()}
+    latitudes = parse_decimal_column(column("위도"))
+    longitudes = parse_decimal_column(column("경도"))
+    roles = {role: [first_value(row, keys) for row in rows] for role, keys in ROLE_COLUMNS.items()}
+
+    records = []
+    for i in range(len(rows)):
+        location = {field: values[i] for field, values in location_texts.items()}
+        location["latitude"] = latitudes[i]
+        location["longitude"] = longitudes[i]
+        records.append(
+            _build_record(
+                titles[i],
+                start_dates[i],
+                end_dates[i],
+                reference_dates[i],
+                {field: values[i] for field, values in texts.items()},
+                location,
+                {role: values[i] for role, values in roles.items()},
+            )
+        )
+    return records
@@ -0,0 +1,143 @@
+"""Transactional outbox of festival-related changes and its batch consumers.
+
+Model signals (form and admin saves, ingest upserts) and every bulk write path
+append ``ChangeLog`` rows inside the transaction that makes the change, so a
+change is logged if and only if it commits. Derived data follows the log
+instead of each write path calling it: an ``OutboxConsumer`` reads rows after
+its ``OutboxCursor`` in id order, handles a batch and advances the cursor in
+one transaction (``manage.py consume_outbox``). SQLite allows a single writer,
+so ids commit in order and a cursor never skips a row that commits later.
+
+View count flushes are not logged; they change no content.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from django.db import transaction
+
+from .edge_cache import DETAIL_KEY, request_purge
+from .models import ChangeLog, Festival, OutboxCursor
+from .similarity import affected_festivals, drop_signatures, index_signatures, refresh_related
+from .static_export import StaticSite, export_root
+
+BATCH_SIZE = 500
+
+Kind = ChangeLog.Kind
+Action = ChangeLog.Action
+
+
+def record(kind: str, action: str, rows: Iterable[Tuple[int, Optional[int]]]):
+    """Log ``(object_id, festival_id)`` pairs; call inside the transaction that made the change."""
+    entries = [ChangeLog(kind=kind, action=action, object_id=pk, festival_id=festival_id) for pk, festival_id in rows]
+    ChangeLog.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+
+
+def record_festivals(festival_ids: Iterable[int], action: str = Action.SAVE):
+    record(Kind.FESTIVAL, action, ((pk, pk) for pk in festival_ids))
+
+
+def record_location(location_id: int, festival_ids: Sequence[int], action: str = Action.SAVE):
+    """One row per festival at the location (a single row when none uses it)."""
+    record(Kind.LOCATION, action, [(location_id, pk) for pk in festival_ids] or [(location_id, None)])
+
+
+def changed_festival_ids(changes: Iterable[ChangeLog]) -> List[int]:
+    return sorted({change.festival_id for change in changes if change.festival_id is not None})
+
+
+class OutboxConsumer:
+    """Subclass, set ``name`` (and optionally ``kinds``) and implement ``handle``."""
+
+    name = ""
+    kinds: Optional[Set[str]] = None  # None: every kind
+    batch_size = BATCH_SIZE
+
+    def handle(self, changes: List[ChangeLog]):
+        raise NotImplementedError
+
+
+CONSUMERS: Dict[str, OutboxConsumer] = {}
+
+
+def register(consumer_class):
+    CONSUMERS[consumer_class.name] = consumer_class()
+    return consumer_class
+
+
+def consume(consumer: OutboxConsumer, max_batches: Optional[int] = None) -> int:
+    """Process pending changes batch by batch; returns how many log rows were consumed."""
+    consumed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            cursor, _ = OutboxCursor.objects.select_for_update().get_or_create(name=consumer.name)
+            changes = list(ChangeLog.objects.filter(pk__gt=cursor.position).order_by("pk")[: consumer.batch_size])
+            if not changes:
+                break
+            wanted = [c for c in changes if consumer.kinds is None or c.kind in consumer.kinds]
+            if wanted:
+                consumer.handle(wanted)
+            cursor.position = changes[-1].pk
+            cursor.save(update_fields=["position", "updated_at"])
+        consumed += len(changes)
+        batches += 1
+    return consumed
+
+
+def backlog(consumer: OutboxConsumer) -> int:
+    position = OutboxCursor.objects.filter(name=consumer.name).values_list("position", flat=True).first() or 0
+    return ChangeLog.objects.filter(pk__gt=position).count()
+
+
+def prune() -> int:
+    """Delete log rows every registered consumer has processed."""
+    positions = dict(OutboxCursor.objects.filter(name__in=list(CONSUMERS)).values_list("name", "position"))
+    if not positions or len(positions) < len(CONSUMERS):
+        return 0  # a consumer that never ran still needs the whole log
+    deleted, _ = ChangeLog.objects.filter(pk__lte=min(positions.values())).delete()
+    return deleted
+
+
+@register
+class RelatedFestivalsConsumer(OutboxConsumer):
+    """Keeps MinHash signatures and related-festival lists current for changed festivals."""
+
+    name = "related_festivals"
+    kinds = {Kind.FESTIVAL, Kind.LOCATION, Kind.ROLE}
+
+    def handle(self, changes):
+        ids = changed_festival_ids(changes)
+        active = set(Festival.objects.filter(pk__in=ids, is_active=True).values_list("pk", flat=True))
+        gone = [pk for pk in ids if pk not in active]
+        orphaned = set(affected_festivals(gone)) - set(gone)
+        drop_signatures(gone)
+        index_signatures(sorted(active))
+        affected = sorted(set(affected_festivals(sorted(active))) | orphaned)
+        refresh_related(affected)
+        if affected:
+            request_purge([DETAIL_KEY])
+
+
+@register
+class StaticPagesConsumer(OutboxConsumer):
+    """Re-renders the exported static pages that changed festivals and comments appear on.
+
+    A no-op until ``export_static`` has made the first full build of
+    ``FESTIVAL_STATIC_EXPORT_DIR``; that build starts from the latest log row.
+    Only the page list is worked out inside the batch's transaction; the pages
+    are rendered after the cursor commits, so rendering never holds SQLite's
+    write lock. Pages of a batch whose rendering fails stay stale until the
+    next ``export_static --full``.
+    """
+
+    name = "static_pages"
+    batch_size = 5000
+
+    def handle(self, changes):
+        root = export_root()
+        if root is not None:
+            site = StaticSite(root)
+            if site.exists():
+                urls, stale = site.plan((change.kind, change.festival_id) for change in changes)
+                transaction.on_commit(lambda: site.build(urls, stale=stale))
@@ -0,0 +1,116 @@
+"""Buffered festival view counting and time-decayed popularity.
+
+Detail page hits are accumulated in a process-local buffer and written in one
+``bulk_update`` when the buffer is old or large enough, so page views never
+take SQLite's writer lock on their own.
+
+Popularity uses forward decay: each hit at time ``t`` is worth
+``exp(λ·(t - EPOCH))`` and the column stores the log of the running sum. Older
+rows never need rewriting because ranking by this value is the same as ranking
+by the exponentially decayed score at any later moment.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Festival
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def decay_rate() -> float:
+    half_life_days = getattr(settings, "FESTIVAL_POPULARITY_HALF_LIFE_DAYS", 7)
+    return math.log(2) / (half_life_days * 86400)
+
+
+def merge_scores(a: float, b: float) -> float:
+    """Return ``log(exp(a) + exp(b))`` for two stored scores; 0 means no views yet."""
+    if not a or not b:
+        return a or b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def add_hits(score: float, hits: int, now: datetime) -> float:
+    """Return ``log(exp(score) + hits * exp(λ·(now - EPOCH)))``; 0 means no views yet."""
+    return merge_scores(score, decay_rate() * (now - EPOCH).total_seconds() + math.log(hits))
+
+
+def apply_views(hits: Dict[int, int], now=None) -> int:
+    """Write buffered hits for all festivals: two bulk updates around one read.
+
+    The view counts are written first so the transaction holds SQLite's write
+    lock before it reads ``popularity``. A deferred transaction that reads first
+    cannot upgrade its lock while another worker flushes and fails at once with
+    "database is locked" instead of waiting for the busy timeout.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        Festival.objects.bulk_update(
+            [Festival(pk=pk, view_count=F("view_count") + count) for pk, count in hits.items()],
+            ["view_count"],
+            batch_size=500,
+        )
+        scores = dict(Festival.objects.filter(pk__in=list(hits)).order_by().values_list("pk", "popularity"))
+        updates = [Festival(pk=pk, popularity=add_hits(score, hits[pk], now)) for pk, score in scores.items()]
+        Festival.objects.bulk_update(updates, ["popularity"], batch_size=500)
+    return len(updates)
+
+
+class ViewCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Counter = Counter()
+        self._last_flush = time.monotonic()
+
+    def record(self, festival_id: int):
+        interval = getattr(settings, "FESTIVAL_VIEW_FLUSH_INTERVAL", 30)
+        size = getattr(settings, "FESTIVAL_VIEW_FLUSH_SIZE", 500)
+        with self._lock:
+            self._pending[festival_id] += 1
+            due = sum(self._pending.values()) >= size or time.monotonic() - self._last_flush >= interval
+        if due:
+            try:
+                self.flush()
+            except DatabaseError:
+                # The hits are queued again; a page view must not fail because of them.
+                logger.warning("View count flush failed; %d hits stay queued", self.pending(), exc_info=True)
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(self._pending.values())
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            return apply_views(pending)
+        except Exception:
+            with self._lock:
+                self._pending.update(pending)
+            raise
+
+    def discard(self):
+        with self._lock:
+            self._pending.clear()
+
+
+view_counter = ViewCounter()
+atexit.register(view_counter.flush)
@@ -0,0 +1,28 @@
+"""Page rendering for ``static_export``, importable before Django is set up.
+
+It runs in ``workers.spawn_pool`` processes, so models are imported lazily.
+"""
+from typing import List, Tuple
+
+from django.http import Http404
+from django.urls import resolve
+
+
+def render_page(url: str) -> Tuple[int, bytes]:
+    """Render ``url`` for an anonymous visitor without touching view counts."""
+    from django.test import RequestFactory
+
+    request = RequestFactory().get(url)
+    request.prerender = True
+    match = resolve(request.path_info)
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+    except Http404:
+        return 404, b""
+    if hasattr(response, "render"):
+        response.render()
+    return response.status_code, response.content
+
+
+def render_pages(urls: List[str]) -> List[Tuple[str, int, bytes]]:
+    return [(url, *render_page(url)) for url in urls]
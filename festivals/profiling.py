@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import cProfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from django.db import connection
+
+
+class StageStats:
+    __slots__ = ("seconds", "calls", "queries")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.queries = 0
+
+
+class IngestProfiler:
+    """Per-stage wall time, query and item counters for ingest commands.
+
+    When disabled every method is a cheap no-op so the commands can call it
+    unconditionally on the hot path.
+    """
+
+    def __init__(self, enabled: bool = False, output: Optional[str] = None):
+        self.enabled = enabled or bool(output)
+        self.output = output
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Counter = Counter()
+        self.total_seconds = 0.0
+        self._current: Optional[str] = None
+
+    @contextmanager
+    def session(self):
+        """Profile the whole command: query counting and optional cProfile dump."""
+        if not self.enabled:
+            yield self
+            return
+        profile = cProfile.Profile() if self.output else None
+        started = time.perf_counter()
+        with connection.execute_wrapper(self._count_query):
+            if profile:
+                profile.enable()
+            try:
+                yield self
+            finally:
+                if profile:
+                    profile.disable()
+                    profile.dump_stats(self.output)
+                self.total_seconds = time.perf_counter() - started
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        previous = self._current
+        self._current = name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.seconds += time.perf_counter() - started
+            stats.calls += 1
+            self._current = previous
+
+    def count(self, name: str, amount: int = 1):
+        if self.enabled:
+            self.counters[name] += amount
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.counters["queries"] += 1
+        if self._current is not None:
+            self.stages[self._current].queries += 1
+        return execute(sql, params, many, context)
+
+    def report(self, write, rows_counter: str = "rows"):
+        """Write a summary table through ``write`` (e.g. ``self.stdout.write``)."""
+        if not self.enabled:
+            return
+        total = self.total_seconds or sum(s.seconds for s in self.stages.values()) or 1e-9
+        write(f"{'stage':<12} {'calls':>8} {'seconds':>10} {'share':>7} {'queries':>8}")
+        for name, stats in self.stages.items():
+            write(
+                f"{name:<12} {stats.calls:>8} {stats.seconds:>10.3f} "
+                f"{stats.seconds / total:>7.1%} {stats.queries:>8}"
+            )
+        write(f"{'total':<12} {'':>8} {total:>10.3f} {'':>7} {self.counters['queries']:>8}")
+        for name, value in sorted(self.counters.items()):
+            if name != "queries":
+                write(f"{name}: {value}")
+        rows = self.counters[rows_counter]
+        write(f"{rows_counter}/sec: {rows / total:.1f}")
+        if self.output:
+            write(f"cProfile stats: {self.output}")
@@ -0,0 +1,232 @@
+"""Snapshot reconciliation of CSV-managed festivals against a full source file."""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .archive import archived_external_ids
+from .edge_cache import DETAIL_KEY, LIST_KEY, request_purge
+from .facets import sync_festival_facets
+from .models import Festival, FestivalOrganization, Location, Organization
+from .outbox import record_festivals
+
+FESTIVAL_FIELDS = (
+    "title",
+    "start_date",
+    "end_date",
+    "description",
+    "telephone",
+    "homepage",
+    "extra_info",
+    "data_reference_date",
+)
+LOCATION_FIELDS = ("name", "address_road", "address_lot", "latitude", "longitude")
+BATCH_SIZE = 500
+_COORD_QUANTUM = Decimal(10) ** -12
+
+
+def _coord(value):
+    if value is None:
+        return None
+    return Decimal(str(value)).quantize(_COORD_QUANTUM)
+
+
+def location_key(data) -> Tuple:
+    """Hashable key of a location dict, comparable between parsed floats and stored decimals."""
+    if not data or not any(data.get(f) not in (None, "") for f in LOCATION_FIELDS):
+        return ()
+    return (data["name"], data["address_road"], data["address_lot"], _coord(data["latitude"]), _coord(data["longitude"]))
+
+
+def roles_key(roles) -> Dict[str, str]:
+    return {role: (name or "").strip() for role, name in roles.items() if (name or "").strip()}
+
+
+class ReconcilePlan:
+    def __init__(self):
+        self.inserts: List[dict] = []
+        self.updates: List[Tuple[int, dict, List[str]]] = []
+        self.deactivations: List[Tuple[int, str]] = []
+        # Rows merged into another festival as duplicates; they stay inactive.
+        self.merged: Set[int] = set()
+        # File rows whose festival has already been moved to the archive.
+        self.archived = 0
+        self.unchanged = 0
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "insert": len(self.inserts),
+            "update": len(self.updates),
+            "deactivate": len(self.deactivations),
+            "unchanged": self.unchanged,
+            "archived": self.archived,
+        }
+
+
+def _existing_snapshot(keys: Iterable[str]):
+    """Load CSV-managed festivals (plus other rows sharing a file key) with their location and roles."""
+    columns = ("id", "external_id", "is_active", "merged_into_id", *FESTIVAL_FIELDS, *(f"location__{f}" for f in LOCATION_FIELDS))
+    rows = {row["external_id"]: row for row in Festival.objects.filter(source=Festival.Source.CSV).values(*columns)}
+    missing = [key for key in keys if key not in rows]
+    for start in range(0, len(missing), BATCH_SIZE):
+        for row in Festival.objects.filter(external_id__in=missing[start : start + BATCH_SIZE]).values(*columns):
+            rows[row["external_id"]] = row
+
+    roles: Dict[int, Dict[str, str]] = {}
+    role_rows = FestivalOrganization.objects.filter(festival__source=Festival.Source.CSV).values_list(
+        "festival_id", "role", "organization__name"
+    )
+    for festival_id, role, name in role_rows:
+        roles.setdefault(festival_id, {})[role] = name
+    extra_ids = [row["id"] for row in rows.values() if row["id"] not in roles]
+    for start in range(0, len(extra_ids), BATCH_SIZE):
+        for festival_id, role, name in FestivalOrganization.objects.filter(
+            festival_id__in=extra_ids[start : start + BATCH_SIZE]
+        ).values_list("festival_id", "role", "organization__name"):
+            roles.setdefault(festival_id, {})[role] = name
+    return rows, roles
+
+
+def plan_reconcile(records: Iterable[dict]) -> ReconcilePlan:
+    """Diff normalized CSV records against the database in a single pass."""
+    by_key: Dict[str, dict] = {}
+    for record in records:
+        by_key[record["external_id"]] = record  # later rows win, like sequential upserts
+
+    plan = ReconcilePlan()
+    for key in archived_external_ids(list(by_key)):
+        del by_key[key]
+        plan.archived += 1
+    existing, existing_roles = _existing_snapshot(list(by_key))
+    for key, record in by_key.items():
+        row = existing.get(key)
+        if row is None:
+            plan.inserts.append(record)
+            continue
+        changed = [f for f in FESTIVAL_FIELDS if row[f] != record["defaults"][f]]
+        if row["merged_into_id"]:
+            plan.merged.add(row["id"])
+        elif not row["is_active"]:
+            changed.append("is_active")
+        current_location = location_key({f: row[f"location__{f}"] for f in LOCATION_FIELDS})
+        if current_location != location_key(record["location"]):
+            changed.append("location")
+        if existing_roles.get(row["id"], {}) != roles_key(record["roles"]):
+            changed.append("roles")
+        if changed:
+            plan.updates.append((row["id"], record, changed))
+        else:
+            plan.unchanged += 1
+
+    for key, row in existing.items():
+        if key not in by_key and row["is_active"]:
+            plan.deactivations.append((row["id"], key))
+    return plan
+
+
+def _resolve_locations(records) -> Dict[Tuple, int]:
+    wanted = {}
+    for record in records:
+        key = location_key(record["location"])
+        if key:
+            wanted.setdefault(key, record["location"])
+    if not wanted:
+        return {}
+    resolved = {}
+    keys = list(wanted)
+    for start in range(0, len(keys), BATCH_SIZE):
+        chunk = keys[start : start + BATCH_SIZE]
+        # Narrowed through the (name, address_road, ...) unique index; exact keys are matched below.
+        candidates = Location.objects.filter(
+            name__in={key[0] for key in chunk}, address_road__in={key[1] for key in chunk}
+        ).values_list(*LOCATION_FIELDS, "pk")
+        for *fields, pk in candidates:
+            key = location_key(dict(zip(LOCATION_FIELDS, fields)))
+            if key in wanted:
+                resolved[key] = pk
+    missing = [Location(**wanted[key]) for key in wanted if key not in resolved]
+    for location in missing:
+        location.fill_region()  # bulk_create bypasses Location.save()
+    for location in Location.objects.bulk_create(missing, batch_size=BATCH_SIZE):
+        resolved[location_key({f: getattr(location, f) for f in LOCATION_FIELDS})] = location.pk
+    return resolved
+
+
+def _resolve_organizations(records) -> Dict[str, int]:
+    names = {name for record in records for name in roles_key(record["roles"]).values()}
+    if not names:
+        return {}
+    resolved = dict(Organization.objects.filter(name__in=names).values_list("name", "pk"))
+    missing = [Organization(name=name) for name in names if name not in resolved]
+    Organization.objects.bulk_create(missing, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    if missing:
+        resolved.update(Organization.objects.filter(name__in=[o.name for o in missing]).values_list("name", "pk"))
+    return resolved
+
+
+def _replace_roles(festival_records: List[Tuple[int, dict]], organizations: Dict[str, int]):
+    ids = [pk for pk, _ in festival_records]
+    for start in range(0, len(ids), BATCH_SIZE):
+        FestivalOrganization.objects.filter(festival_id__in=ids[start : start + BATCH_SIZE]).delete()
+    links = [
+        FestivalOrganization(festival_id=pk, organization_id=organizations[name], role=role)
+        for pk, record in festival_records
+        for role, name in roles_key(record["roles"]).items()
+    ]
+    FestivalOrganization.objects.bulk_create(links, batch_size=BATCH_SIZE)
+
+
+def apply_plan(plan: ReconcilePlan):
+    """Bulk-apply inserts, changed-field updates and soft-deletes in one transaction."""
+    now = timezone.now()
+    touched = plan.inserts + [record for _, record, _ in plan.updates]
+    with transaction.atomic():
+        locations = _resolve_locations(touched)
+        organizations = _resolve_organizations(touched)
+
+        new_festivals = [
+            Festival(
+                external_id=record["external_id"],
+                source=Festival.Source.CSV,
+                location_id=locations.get(location_key(record["location"])),
+                **record["defaults"],
+            )
+            for record in plan.inserts
+        ]
+        Festival.objects.bulk_create(new_festivals, batch_size=BATCH_SIZE)
+        role_updates = [(festival.pk, record) for festival, record in zip(new_festivals, plan.inserts)]
+
+        # bulk_update writes every listed column for every object, so each object
+        # carries the full new snapshot while only the union of changed columns is sent.
+        changed_objects = []
+        update_fields = {"updated_at", "is_active", "source"}
+        for pk, record, changed in plan.updates:
+            changed_objects.append(
+                Festival(
+                    pk=pk,
+                    source=Festival.Source.CSV,
+                    is_active=pk not in plan.merged,
+                    updated_at=now,
+                    location_id=locations.get(location_key(record["location"])),
+                    **record["defaults"],
+                )
+            )
+            update_fields.update(field for field in changed if field != "roles")
+            if "roles" in changed:
+                role_updates.append((pk, record))
+        Festival.objects.bulk_update(changed_objects, sorted(update_fields), batch_size=BATCH_SIZE)
+        _replace_roles(role_updates, organizations)
+
+        ids = [pk for pk, _ in plan.deactivations]
+        for start in range(0, len(ids), BATCH_SIZE):
+            Festival.objects.filter(pk__in=ids[start : start + BATCH_SIZE]).update(is_active=False, updated_at=now)
+
+        # Bulk writes skip model signals, so derived facet counts are synced explicitly.
+        changed = [f.pk for f in new_festivals] + [pk for pk, _, _ in plan.updates] + ids
+        sync_festival_facets(changed)
+        record_festivals(changed)
+        if new_festivals or plan.updates or ids:
+            request_purge([LIST_KEY, DETAIL_KEY])
@@ -79,3 +79,37 @@ def parse_decimal(value: Any):
         return float(str(value).replace(",", ""))
     except (TypeError, ValueError):
         return None
+
+
+SIDO_ALIASES = {
+    "서울특별시": ["서울", "서울시"],
+    "부산광역시": ["부산", "부산시"],
+    "대구광역시": ["대구", "대구시"],
+    "인천광역시": ["인천", "인천시"],
+    "광주광역시": ["광주", "광주시"],
+    "대전광역시": ["대전", "대전시"],
+    "울산광역시": ["울산", "울산시"],
+    "세종특별자치시": ["세종", "세종시"],
+    "경기도": ["경기"],
+    "강원특별자치도": ["강원도", "강원"],
+    "충청북도": ["충북"],
+    "충청남도": ["충남"],
+    "전북특별자치도": ["전라북도", "전북"],
+    "전라남도": ["전남"],
+    "경상북도": ["경북"],
+    "경상남도": ["경남"],
+    "제주특별자치도": ["제주도", "제주"],
+}
+_SIDO_LOOKUP = {alias: name for name, aliases in SIDO_ALIASES.items() for alias in [name, *aliases]}
+
+
+def split_region(address: Any):
+    """Return (sido, sigungu) parsed from a Korean road or lot address."""
+    tokens = str(address or "").split()
+    if not tokens:
+        return "", ""
+    sido = _SIDO_LOOKUP.get(tokens[0], "")
+    if not sido:
+        return "", ""
+    sigungu = tokens[1] if len(tokens) > 1 and tokens[1][-1] in "시군구" else ""
+    return sido, sigungu
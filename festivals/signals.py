@@ -0,0 +1,66 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .edge_cache import DETAIL_KEY, LIST_KEY, festival_key, request_purge
+from .facets import remove_festival_facets, request_facet_sync
+from .models import ChangeLog, Comment, Festival, FestivalOrganization, Location
+from .outbox import record, record_festivals, record_location
+
+
+def _deleting_festivals(origin) -> bool:
+    """True when a delete cascades from a festival, whose facets are already removed."""
+    return isinstance(origin, Festival) or getattr(origin, "model", None) is Festival
+
+
+@receiver(post_save, sender=Festival)
+def festival_saved(sender, instance, **kwargs):
+    record_festivals([instance.pk])
+    request_facet_sync([instance.pk])
+    request_purge([festival_key(instance.pk), LIST_KEY])
+
+
+@receiver(pre_delete, sender=Festival)
+def festival_deleting(sender, instance, **kwargs):
+    record_festivals([instance.pk], ChangeLog.Action.DELETE)
+    remove_festival_facets([instance.pk])
+    request_purge([festival_key(instance.pk), LIST_KEY])
+
+
+@receiver(post_save, sender=FestivalOrganization)
+@receiver(post_delete, sender=FestivalOrganization)
+def festival_role_changed(sender, instance, origin=None, signal=None, **kwargs):
+    if not _deleting_festivals(origin):
+        action = ChangeLog.Action.DELETE if signal is post_delete else ChangeLog.Action.SAVE
+        record(ChangeLog.Kind.ROLE, action, [(instance.pk, instance.festival_id)])
+        request_facet_sync([instance.festival_id])
+        request_purge([festival_key(instance.festival_id), LIST_KEY])
+
+
+@receiver(post_save, sender=Location)
+def location_saved(sender, instance, created, **kwargs):
+    if not created:
+        festival_ids = list(instance.festivals.values_list("pk", flat=True))
+        record_location(instance.pk, festival_ids)
+        request_facet_sync(festival_ids)
+        request_purge([LIST_KEY, DETAIL_KEY])
+
+
+@receiver(pre_delete, sender=Location)
+def location_deleting(sender, instance, **kwargs):
+    instance._festival_ids = list(instance.festivals.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Location)
+def location_deleted(sender, instance, **kwargs):
+    record_location(instance.pk, getattr(instance, "_festival_ids", []), ChangeLog.Action.DELETE)
+    request_facet_sync(getattr(instance, "_festival_ids", []))
+    request_purge([LIST_KEY, DETAIL_KEY])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, origin=None, signal=None, **kwargs):
+    if not _deleting_festivals(origin):
+        action = ChangeLog.Action.DELETE if signal is post_delete else ChangeLog.Action.SAVE
+        record(ChangeLog.Kind.COMMENT, action, [(instance.pk, instance.festival_id)])
+        request_purge([festival_key(instance.festival_id)])
@@ -0,0 +1,232 @@
+"""Content similarity between festivals with MinHash and LSH banding.
+
+Festival text (title, description, organization names) is cut into Korean
+character bigrams and trigrams. A MinHash signature of ``NUM_PERM`` values
+estimates the Jaccard similarity of two shingle sets; it is built with
+one-permutation hashing (one hash per shingle, binned, empty bins densified by
+rotation). Splitting it into ``BANDS`` bands of ``ROWS`` values gives LSH
+buckets: festivals sharing at least one bucket are candidates, so neighbours
+are found without comparing every pair.
+"""
+from __future__ import annotations
+
+import hashlib
+import heapq
+import re
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Festival, FestivalOrganization, FestivalSignature, RelatedFestival, SignatureBand
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+NGRAM_SIZES = (2, 3)
+DESCRIPTION_CHARS = 1000
+TOP_K = 6
+MIN_SIMILARITY = 0.15
+# Buckets shared by more festivals than this are boilerplate, not evidence of similarity.
+MAX_BUCKET_SIZE = 200
+BATCH_SIZE = 500
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_text(text: str) -> str:
+    return _NON_WORD.sub("", (text or "").lower())
+
+
+def shingles(*texts: str, sizes: Sequence[int] = NGRAM_SIZES) -> Set[str]:
+    result = set()
+    for text in texts:
+        text = normalize_text(text)
+        for n in sizes:
+            if len(text) < n:
+                if text:
+                    result.add(text)
+                continue
+            result.update(text[i : i + n] for i in range(len(text) - n + 1))
+    return result
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash(shingle_set: Iterable[str], num_perm: int = NUM_PERM) -> Tuple[int, ...]:
+    # Bin values stay below ``rotation`` and a value borrowed from ``d < num_perm``
+    # bins away is offset by ``d * rotation``, so every component is below
+    # ``num_perm * rotation <= 2**64``. For a power-of-two ``num_perm`` (like
+    # NUM_PERM) ``h // num_perm`` is always below ``rotation``; otherwise (dedupe's
+    # 12) the few largest hashes are clamped to keep the bound.
+    rotation = (1 << 64) // num_perm
+    bins = [None] * num_perm
+    for shingle in shingle_set:
+        h = _hash64(shingle)
+        index, value = h % num_perm, min(h // num_perm, rotation - 1)
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+    if all(value is None for value in bins):
+        return tuple([rotation * num_perm - 1] * num_perm)
+    signature = list(bins)
+    for i, value in enumerate(bins):
+        if value is None:
+            distance = next(d for d in range(1, num_perm) if bins[(i + d) % num_perm] is not None)
+            signature[i] = bins[(i + distance) % num_perm] + distance * rotation
+    return tuple(signature)
+
+
+def band_buckets(signature: Sequence[int]) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs; buckets are signed 64-bit so they fit a BigIntegerField."""
+    buckets = []
+    for band in range(BANDS):
+        chunk = array("Q", signature[band * ROWS : (band + 1) * ROWS]).tobytes()
+        digest = hashlib.blake2b(chunk, digest_size=8, person=b"band%02d" % band).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def estimate_similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def pack(signature: Sequence[int]) -> bytes:
+    return array("Q", signature).tobytes()
+
+
+def unpack(data) -> Tuple[int, ...]:
+    values = array("Q")
+    values.frombytes(bytes(data))
+    return tuple(values)
+
+
+def festival_texts(festival_ids: Sequence[int]) -> Dict[int, List[str]]:
+    texts = {
+        pk: [title, (description or "")[:DESCRIPTION_CHARS]]
+        for pk, title, description in Festival.objects.filter(pk__in=festival_ids).values_list(
+            "pk", "title", "description"
+        )
+    }
+    for pk, name in FestivalOrganization.objects.filter(festival_id__in=festival_ids).values_list(
+        "festival_id", "organization__name"
+    ):
+        texts[pk].append(name)
+    return texts
+
+
+def stale_festival_ids(full: bool = False) -> Tuple[List[int], List[int]]:
+    """(active festivals whose signature is missing or older than the row, inactive ones still indexed)."""
+    active = Festival.objects.filter(is_active=True)
+    if not full:
+        active = active.filter(Q(signature__isnull=True) | ~Q(signature__source_updated_at=F("updated_at")))
+    stale = list(active.order_by("pk").values_list("pk", flat=True))
+    gone = list(FestivalSignature.objects.filter(festival__is_active=False).values_list("festival_id", flat=True))
+    return stale, gone
+
+
+def index_signatures(festival_ids: Sequence[int]):
+    """Recompute signatures and LSH buckets of the given festivals."""
+    for start in range(0, len(festival_ids), BATCH_SIZE):
+        chunk = festival_ids[start : start + BATCH_SIZE]
+        texts = festival_texts(chunk)
+        updated = dict(Festival.objects.filter(pk__in=chunk).values_list("pk", "updated_at"))
+        signatures, bands = [], []
+        for pk in chunk:
+            signature = minhash(shingles(*texts.get(pk, [])))
+            signatures.append(FestivalSignature(festival_id=pk, signature=pack(signature), source_updated_at=updated[pk]))
+            bands.extend(SignatureBand(festival_id=pk, band=band, bucket=bucket) for band, bucket in band_buckets(signature))
+        with transaction.atomic():
+            FestivalSignature.objects.filter(festival_id__in=chunk).delete()
+            SignatureBand.objects.filter(festival_id__in=chunk).delete()
+            FestivalSignature.objects.bulk_create(signatures, batch_size=BATCH_SIZE)
+            SignatureBand.objects.bulk_create(bands, batch_size=BATCH_SIZE)
+
+
+def drop_signatures(festival_ids: Sequence[int]):
+    with transaction.atomic():
+        FestivalSignature.objects.filter(festival_id__in=festival_ids).delete()
+        SignatureBand.objects.filter(festival_id__in=festival_ids).delete()
+        RelatedFestival.objects.filter(Q(festival_id__in=festival_ids) | Q(related_id__in=festival_ids)).delete()
+
+
+def candidate_map(festival_ids: Sequence[int]) -> Dict[int, Set[int]]:
+    """Festivals sharing at least one non-oversized LSH bucket with each given festival."""
+    own = defaultdict(set)
+    for pk, band, bucket in SignatureBand.objects.filter(festival_id__in=festival_ids).values_list(
+        "festival_id", "band", "bucket"
+    ):
+        own[(band, bucket)].add(pk)
+    members = defaultdict(set)
+    keys = list(own)
+    for start in range(0, len(keys), BATCH_SIZE):
+        buckets = {bucket for _, bucket in keys[start : start + BATCH_SIZE]}
+        for pk, band, bucket in SignatureBand.objects.filter(bucket__in=buckets).values_list(
+            "festival_id", "band", "bucket"
+        ):
+            if (band, bucket) in own:
+                members[(band, bucket)].add(pk)
+    candidates = defaultdict(set)
+    for key, pks in own.items():
+        if len(members[key]) > MAX_BUCKET_SIZE:
+            continue
+        for pk in pks:
+            candidates[pk].update(members[key] - {pk})
+    return candidates
+
+
+def _signatures(festival_ids: Iterable[int]) -> Dict[int, Tuple[int, ...]]:
+    ids = list(festival_ids)
+    result = {}
+    for start in range(0, len(ids), BATCH_SIZE):
+        for pk, data in FestivalSignature.objects.filter(festival_id__in=ids[start : start + BATCH_SIZE]).values_list(
+            "festival_id", "signature"
+        ):
+            result[pk] = unpack(data)
+    return result
+
+
+def refresh_related(festival_ids: Sequence[int], top_k: int = TOP_K) -> int:
+    """Recompute the neighbour lists of the given festivals; returns rows written."""
+    written = 0
+    for start in range(0, len(festival_ids), BATCH_SIZE):
+        chunk = festival_ids[start : start + BATCH_SIZE]
+        candidates = candidate_map(chunk)
+        signatures = _signatures(set(chunk).union(*candidates.values()))
+        rows = []
+        for pk in chunk:
+            own = signatures.get(pk)
+            if own is None:
+                continue
+            scored = (
+                (estimate_similarity(own, signatures[other]), other)
+                for other in candidates.get(pk, ())
+                if other in signatures
+            )
+            best = heapq.nlargest(top_k, (item for item in scored if item[0] >= MIN_SIMILARITY))
+            rows.extend(
+                RelatedFestival(festival_id=pk, related_id=other, score=score, rank=rank)
+                for rank, (score, other) in enumerate(best)
+            )
+        with transaction.atomic():
+            RelatedFestival.objects.filter(festival_id__in=chunk).delete()
+            RelatedFestival.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        written += len(rows)
+    return written
+
+
+def affected_festivals(changed: Sequence[int]) -> List[int]:
+    """Changed festivals plus every festival whose neighbour list may now include or drop one."""
+    affected = set(changed)
+    for pks in candidate_map(changed).values():
+        affected.update(pks)
+    for start in range(0, len(changed), BATCH_SIZE):
+        affected.update(
+            RelatedFestival.objects.filter(related_id__in=changed[start : start + BATCH_SIZE]).values_list(
+                "festival_id", flat=True
+            )
+        )
+    return sorted(affected)
@@ -0,0 +1,166 @@
+"""Sitemap index and child sitemaps of every festival detail page.
+
+Festivals are split into fixed id ranges of ``FESTIVAL_SITEMAP_SIZE`` ids
+(section ``n`` covers ids ``(n-1)*size+1 .. n*size``), so a festival never moves
+between child sitemaps and adding festivals only grows the last one. A child
+sitemap is streamed in keyset pages (``id > last``) of hot and archived
+festivals merged in id order, with ``lastmod`` from ``updated_at``.
+
+Rendered children are kept in the cache under a fingerprint of their range (row
+count and latest ``updated_at`` of the listed festivals in both tables). Any
+save, delete, merge or archive of a festival in the range changes the
+fingerprint, so only that child is rendered again, and every process sees the
+change without a shared cache invalidation channel. View count flushes don't
+touch ``updated_at``. The index is cached the same way under the fingerprint of
+all listed festivals, so its per-section ``GROUP BY`` only runs after a change.
+
+Every query here reads the ``(merged_into, id, updated_at)`` and
+``(id, updated_at)`` covering indexes, never table rows. A section fingerprint
+and a keyset page seek their id range; the index fingerprint still walks both
+indexes from end to end on each request, which is cheap next to the rows but
+grows with the tables.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, F, Max
+from django.urls import reverse
+from django.utils.html import escape
+
+from .models import ArchivedFestival, Festival
+
+PAGE_SIZE = 5000  # rows per keyset query
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XMLNS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def section_size() -> int:
+    return getattr(settings, "FESTIVAL_SITEMAP_SIZE", 50000)
+
+
+def section_bounds(section: int) -> Tuple[int, int]:
+    size = section_size()
+    return (section - 1) * size + 1, section * size
+
+
+def _querysets():
+    # Merged festivals redirect to their survivor and are left out.
+    return Festival.objects.filter(merged_into__isnull=True), ArchivedFestival.objects.all()
+
+
+def sections() -> List[Tuple[int, object]]:
+    """``(section, lastmod)`` of every non-empty id range, in order."""
+    size = section_size()
+    latest = {}
+    for queryset in _querysets():
+        rows = (
+            queryset.annotate(section=(F("id") - 1) / size + 1)
+            .values("section")
+            .annotate(lastmod=Max("updated_at"))
+            .order_by()
+            .values_list("section", "lastmod")
+        )
+        for section, lastmod in rows:
+            latest[section] = max(lastmod, latest.get(section, lastmod))
+    return sorted(latest.items())
+
+
+def fingerprint(section: Optional[int] = None) -> str:
+    """Row count and latest change of the listed festivals, within the section's id range if given."""
+    parts = []
+    for queryset in _querysets():
+        if section is not None:
+            low, high = section_bounds(section)
+            queryset = queryset.filter(pk__gte=low, pk__lte=high)
+        stats = queryset.aggregate(count=Count("pk"), latest=Max("updated_at"))
+        parts.append(f"{stats['count']}-{stats['latest'].timestamp() if stats['latest'] else 0}")
+    return ".".join(parts)
+
+
+def _keyset(queryset, low: int, high: int) -> Iterator[Tuple[int, object]]:
+    last = low - 1
+    while True:
+        page = list(queryset.filter(pk__gt=last, pk__lte=high).order_by("pk").values_list("pk", "updated_at")[:PAGE_SIZE])
+        yield from page
+        if len(page) < PAGE_SIZE:
+            return
+        last = page[-1][0]
+
+
+def entries(section: int) -> Iterator[Tuple[int, object]]:
+    """``(festival_id, updated_at)`` of the section's hot and archived festivals in id order."""
+    low, high = section_bounds(section)
+    return heapq.merge(*(_keyset(queryset, low, high) for queryset in _querysets()))
+
+
+def stream_section(section: int, base_url: str) -> Iterator[bytes]:
+    yield f'{XML_HEADER}<urlset {XMLNS}>\n'.encode()
+    chunk = []
+    for pk, updated_at in entries(section):
+        url = escape(base_url + reverse("festival_detail", args=[pk]))
+        chunk.append(f"<url><loc>{url}</loc><lastmod>{updated_at.date().isoformat()}</lastmod></url>\n")
+        if len(chunk) >= 1000:
+            yield "".join(chunk).encode()
+            chunk = []
+    chunk.append("</urlset>\n")
+    yield "".join(chunk).encode()
+
+
+def render_index(base_url: str) -> bytes:
+    lines = [f"{XML_HEADER}<sitemapindex {XMLNS}>\n"]
+    for section, lastmod in sections():
+        url = escape(base_url + reverse("sitemap_section", args=[section]))
+        lines.append(f"<sitemap><loc>{url}</loc><lastmod>{lastmod.date().isoformat()}</lastmod></sitemap>\n")
+    lines.append("</sitemapindex>\n")
+    return "".join(lines).encode()
+
+
+def _cache():
+    return caches[getattr(settings, "FESTIVAL_SITEMAP_CACHE", "default")]
+
+
+def _timeout() -> int:
+    return getattr(settings, "FESTIVAL_SITEMAP_CACHE_TIMEOUT", 86400)
+
+
+def cached_index(base_url: str) -> bytes:
+    cache = _cache()
+    key = f"festival-sitemap-index:{base_url}:{section_size()}:{fingerprint()}"
+    body = cache.get(key)
+    if body is None:
+        body = render_index(base_url)
+        cache.set(key, body, timeout=_timeout())
+    return body
+
+
+def cached_section(section: int, base_url: str) -> Optional[Iterator[bytes]]:
+    """Chunks of the child sitemap, from the cache or rendered and cached at the end of the stream.
+
+    Returns ``None`` when the range holds no festival.
+    """
+    cache = _cache()
+    key = f"festival-sitemap:{base_url}:{section_size()}:{section}:{fingerprint(section)}"
+    body = cache.get(key)
+    if body is not None:
+        return iter([body])
+    if not _has_entries(section):
+        return None
+
+    def render():
+        parts = []
+        for part in stream_section(section, base_url):
+            parts.append(part)
+            yield part
+        # Only a fully sent sitemap is stored; older fingerprints of the range expire by themselves.
+        cache.set(key, b"".join(parts), timeout=_timeout())
+
+    return render()
+
+
+def _has_entries(section: int) -> bool:
+    low, high = section_bounds(section)
+    return any(queryset.filter(pk__gte=low, pk__lte=high).exists() for queryset in _querysets())
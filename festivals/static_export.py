@@ -0,0 +1,169 @@
+"""Pre-rendered HTML of the anonymous festival pages for nginx to serve directly.
+
+Every detail page (hot and archived) and the first list pages are rendered the
+way a visitor without a session sees them (no CSRF token or user state, see
+``edge_cache``) and written under ``FESTIVAL_STATIC_EXPORT_DIR``::
+
+    index.html                  /
+    page/<n>/index.html         /?page=<n>
+    festival/<pk>/index.html    /festival/<pk>/
+
+``manifest.json`` records the content hash of every file, so unchanged pages are
+not rewritten and pages that disappeared are deleted. After the first full
+build only pages touched by change-log rows (``outbox``) since the last build
+are rendered again. Large builds render in a pool of processes; the parent
+process alone writes files and the manifest.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import ArchivedFestival, ChangeLog, Festival, RelatedFestival
+from .prerender import render_pages
+from .workers import spawn_pool
+
+MANIFEST = "manifest.json"
+PAGE_SIZE = 12  # festival_list paginates by 12
+CHUNK_SIZE = 50  # pages per task sent to a worker process
+
+
+def export_root() -> Optional[Path]:
+    directory = getattr(settings, "FESTIVAL_STATIC_EXPORT_DIR", "")
+    return Path(directory) if directory else None
+
+
+def list_url(page: int) -> str:
+    return reverse("festival_list") + (f"?page={page}" if page > 1 else "")
+
+
+def is_list_url(url: str) -> bool:
+    return url.partition("?")[0] == reverse("festival_list")
+
+
+def detail_url(pk: int) -> str:
+    return reverse("festival_detail", args=[pk])
+
+
+def output_name(url: str) -> str:
+    """Relative file for a page URL (see the module docstring)."""
+    path, _, query = url.partition("?")
+    if query:
+        path = f"{path}page/{query.split('=', 1)[1]}/"
+    return path.strip("/") + "/index.html" if path.strip("/") else "index.html"
+
+
+def list_urls(pages: Optional[int] = None) -> List[str]:
+    pages = getattr(settings, "FESTIVAL_STATIC_LIST_PAGES", 5) if pages is None else pages
+    count = Festival.objects.filter(is_active=True).count()
+    return [list_url(page) for page in range(1, min(pages, max(1, math.ceil(count / PAGE_SIZE))) + 1)]
+
+
+def all_urls(pages: Optional[int] = None) -> List[str]:
+    hot = Festival.objects.filter(merged_into__isnull=True).values_list("pk", flat=True)
+    archived = ArchivedFestival.objects.values_list("pk", flat=True)
+    return list_urls(pages) + [detail_url(pk) for pk in sorted(set(hot) | set(archived))]
+
+
+def affected_urls(changes: Iterable[Tuple[str, Optional[int]]], pages: Optional[int] = None) -> List[str]:
+    """Pages to render again for ``(kind, festival_id)`` change-log pairs.
+
+    Comments only show on their festival's page. Festival, location and role
+    changes also alter the list cards and the related-festival cards of other
+    detail pages.
+    """
+    festivals: Set[int] = set()
+    cards: Set[int] = set()
+    for kind, festival_id in changes:
+        if festival_id is None:
+            continue
+        festivals.add(festival_id)
+        if kind != ChangeLog.Kind.COMMENT:
+            cards.add(festival_id)
+    if cards:
+        festivals.update(RelatedFestival.objects.filter(related_id__in=cards).values_list("festival_id", flat=True))
+    urls = list_urls(pages) if cards else []
+    return urls + [detail_url(pk) for pk in sorted(festivals)]
+
+
+class StaticSite:
+    def __init__(self, root: Path, workers: int = 1, list_pages: Optional[int] = None):
+        self.root = Path(root)
+        self.workers = max(1, workers)
+        self.list_pages = list_pages
+        self.manifest: Dict[str, Dict[str, str]] = {}
+        path = self.root / MANIFEST
+        if path.exists():
+            self.manifest = json.loads(path.read_text(encoding="utf-8"))["pages"]
+
+    def exists(self) -> bool:
+        return (self.root / MANIFEST).exists()
+
+    def build_all(self) -> Dict[str, int]:
+        urls = all_urls(self.list_pages)
+        return self.build(urls, stale=set(self.manifest) - set(urls))
+
+    def plan(self, changes: Iterable[Tuple[str, Optional[int]]]) -> Tuple[List[str], Set[str]]:
+        """(pages to render, pages to delete) for change-log pairs; queries only, nothing is rendered."""
+        urls = affected_urls(changes, self.list_pages)
+        lists = {url for url in urls if is_list_url(url)}
+        # List pages past the current last page are dropped when the list changes.
+        stale = {url for url in self.manifest if is_list_url(url)} - lists if lists else set()
+        return urls, stale
+
+    def update(self, changes: Iterable[Tuple[str, Optional[int]]]) -> Dict[str, int]:
+        urls, stale = self.plan(changes)
+        return self.build(urls, stale=stale)
+
+    def build(self, urls: List[str], stale: Iterable[str] = ()) -> Dict[str, int]:
+        counts = {"written": 0, "unchanged": 0, "removed": 0}
+        for url, status, content in self._render(urls):
+            if status != 200:  # merged (redirect) or deleted festivals
+                counts["removed"] += self._remove(url)
+                continue
+            digest = hashlib.sha1(content).hexdigest()
+            name = output_name(url)
+            if self.manifest.get(url, {}).get("sha1") == digest and (self.root / name).exists():
+                counts["unchanged"] += 1
+                continue
+            self._write(name, content)
+            self.manifest[url] = {"file": name, "sha1": digest}
+            counts["written"] += 1
+        for url in stale:
+            counts["removed"] += self._remove(url)
+        self._write(MANIFEST, json.dumps({"built_at": timezone.now().isoformat(), "pages": self.manifest}).encode())
+        return counts
+
+    def _render(self, urls: List[str]) -> Iterator[Tuple[str, int, bytes]]:
+        if self.workers == 1 or len(urls) <= CHUNK_SIZE:
+            yield from render_pages(urls)
+            return
+        chunks = [urls[i : i + CHUNK_SIZE] for i in range(0, len(urls), CHUNK_SIZE)]
+        with spawn_pool(self.workers) as pool:
+            for rendered in pool.map(render_pages, chunks):
+                yield from rendered
+
+    def _write(self, name: str, content: bytes):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handle, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(handle, "wb") as f:
+            f.write(content)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+
+    def _remove(self, url: str) -> int:
+        entry = self.manifest.pop(url, None)
+        if entry is None:
+            return 0
+        (self.root / entry["file"]).unlink(missing_ok=True)
+        return 1
@@ -0,0 +1,81 @@
+"""Deterministic synthetic festival rows for benchmarks and load tests."""
+from __future__ import annotations
+
+import csv
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+CSV_COLUMNS = [
+    "축제명",
+    "개최장소",
+    "축제시작일자",
+    "축제종료일자",
+    "축제내용",
+    "주관기관명",
+    "주최기관명",
+    "후원기관명",
+    "전화번호",
+    "홈페이지주소",
+    "관련정보",
+    "소재지도로명주소",
+    "소재지지번주소",
+    "위도",
+    "경도",
+    "데이터기준일자",
+]
+REGIONS = [
+    ("서울특별시", ["종로구", "중구", "마포구", "송파구"]),
+    ("부산광역시", ["해운대구", "수영구", "중구"]),
+    ("인천광역시", ["연수구", "중구", "강화군"]),
+    ("강원특별자치도", ["강릉시", "춘천시", "평창군"]),
+    ("전라남도", ["여수시", "순천시", "보성군"]),
+    ("경상북도", ["경주시", "안동시", "포항시"]),
+]
+THEMES = ["봄꽃", "벚꽃", "불꽃", "음식", "맥주", "국화", "빛", "전통", "바다", "산천어", "재즈", "책"]
+ORGANIZERS = ["시청", "구청", "문화재단", "관광공사", "축제추진위원회"]
+
+
+def synthetic_rows(count: int, seed: int = 0) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    base = date(2020, 1, 1)
+    rows = []
+    for i in range(count):
+        sido, sigungus = rng.choice(REGIONS)
+        sigungu = rng.choice(sigungus)
+        start = base + timedelta(days=rng.randrange(0, 365 * 6))
+        end = start + timedelta(days=rng.randrange(0, 10))
+        theme = rng.choice(THEMES)
+        organizer = f"{sigungu} {rng.choice(ORGANIZERS)}"
+        has_coords = rng.random() < 0.7
+        rows.append(
+            {
+                "축제명": f"{sigungu} {theme} 축제 {i}",
+                "개최장소": f"{sigungu} {theme} 광장",
+                "축제시작일자": start.isoformat(),
+                "축제종료일자": end.isoformat(),
+                "축제내용": f"{theme} 체험, 공연, 먹거리 장터를 운영하는 {sido} 대표 축제입니다. " * 3,
+                "주관기관명": organizer,
+                "주최기관명": f"{sido}청",
+                "후원기관명": rng.choice(["", "관광공사", "문화체육관광부"]),
+                "전화번호": f"0{rng.randrange(2, 70)}-{rng.randrange(100, 999)}-{rng.randrange(1000, 9999)}",
+                "홈페이지주소": f"https://festival{i}.example.com" if rng.random() < 0.5 else "",
+                "관련정보": "",
+                "소재지도로명주소": f"{sido} {sigungu} 축제로 {rng.randrange(1, 300)}",
+                "소재지지번주소": "",
+                "위도": f"{rng.uniform(33.1, 38.6):.6f}" if has_coords else "",
+                "경도": f"{rng.uniform(124.6, 131.9):.6f}" if has_coords else "",
+                "데이터기준일자": "2024-10-31",
+            }
+        )
+    return rows
+
+
+def write_synthetic_csv(path, count: int, seed: int = 0) -> Path:
+    path = Path(path)
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(synthetic_rows(count, seed))
+    return path
@@ -1,14 +1,73 @@
+import asyncio
+import csv
+import json
+import os
+import re
+import time
+from io import StringIO
 from pathlib import Path
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from datetime import date, timedelta
+from unittest import mock
 
-from django.test import TestCase
-from django.urls import reverse
+from django.core.management import call_command
+from django.core.cache import cache, caches
+from django.core.management.base import CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.conf import settings
+from django.template.loader import get_template
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import resolve, reverse
 
 from festivals.management.commands.load_festivals_from_csv import Command as LoadCsvCommand
-from festivals.models import Comment, Festival, FestivalOrganization, Location, Organization
-from festivals.services import parse_date, parse_decimal, parse_festivals_xml
+from festivals import sitemaps
+from festivals.archive import archive_cutoff, archive_finished
+from festivals.backfill import run_backfill
+from festivals.cards import FestivalCard, card_rows, to_cards
+from festivals.comments import TokenBucket, client_ip, comment_buffer
+from festivals.csv_parallel import parse_range, read_header, record_ranges
+from festivals.dedupe import Entry, find_duplicates, merge_cluster
+from festivals.facets import rebuild_facets
+from festivals.forms import CommentForm
+from festivals.jobs import cancel, claim, enqueue, run_job, store_upload, sweep_uploads
+from festivals.maptiles import MAX_ZOOM, MIN_ZOOM, rebuild_map_clusters
+from festivals.outbox import OutboxConsumer, consume, prune
+from festivals.metrics import Registry, ingest_rows
+from festivals.live import CommentHub, hub, stream_url
+from festivals.loadtest import DEFAULT_MIX, Stats, WsgiClient, percentile, run
+from festivals.models import (
+    ArchivedFestival,
+    BackfillProgress,
+    ChangeLog,
+    Comment,
+    FacetCount,
+    Festival,
+    FestivalOrganization,
+    ImportJob,
+    IngestRun,
+    Location,
+    MapCluster,
+    Organization,
+    OutboxCursor,
+    RelatedFestival,
+)
+from festivals.normalize import normalize_row, normalize_rows
+from festivals.reconcile import apply_plan, plan_reconcile
+from festivals.popularity import ViewCounter, add_hits, apply_views, view_counter
+from festivals.similarity import estimate_similarity, minhash, shingles
+from festivals.services import parse_date, parse_decimal, parse_festivals_xml, split_region
+from festivals.synthetic import synthetic_rows
+from festivals.views import detail_context, detail_queryset
 from django.contrib.auth.models import User
 
+# Tests never touch the rate-limit buckets of a server running from this checkout.
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "ratelimit": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-ratelimit"},
+}
 
 class ParserTests(TestCase):
     def test_parse_sample_xml(self):
@@ -50,6 +109,25 @@ class ParserTests(TestCase):
         self.assertIsNone(parse_decimal(""))
 
 
+class ColumnarNormalizeTests(TestCase):
+    def test_matches_per_row_reference(self):
+        rows = synthetic_rows(300)
+        odd_dates = ["2024.01.02", "2024-1-2", "2024-02-30", " 2024-01-02 ", None, "", "bad"]
+        odd_numbers = ["37,1", "abc", "", None, "1_000", "1e3", " 12.5 ", "-0.5"]
+        for i, row in enumerate(rows):
+            row["축제시작일자"] = odd_dates[i % len(odd_dates)]
+            row["위도"] = odd_numbers[i % len(odd_numbers)]
+            if i % 5 == 0:
+                row["축제명"] = "  "
+                row["주최기관명"] = ""
+        self.assertEqual(normalize_rows(rows), [normalize_row(row) for row in rows])
+
+    def test_benchmark_command_runs(self):
+        out = StringIO()
+        call_command("benchmark", "normalize", rows=200, repeat=1, stdout=out)
+        self.assertIn("columnar", out.getvalue())
+
+
 class CsvLoadTests(TestCase):
     def test_load_from_csv_creates_records_and_relations(self):
         tmp = NamedTemporaryFile(mode="w+", newline="", encoding="utf-8", delete=False)
@@ -81,8 +159,1206 @@ class CsvLoadTests(TestCase):
         self.assertIsNotNone(f.location)
 
 
+CSV_HEADER = "축제명,개최장소,축제시작일자,축제종료일자,축제내용,주최기관,주관기관,후원기관,전화번호,홈페이지주소,관련정보,소재지도로명주소,소재지지번주소,위도,경도,데이터기준일자\n"
+
+
+def write_csv(directory, lines, name="data.csv"):
+    path = Path(directory) / name
+    path.write_text(CSV_HEADER + "".join(line + "\n" for line in lines), encoding="utf-8")
+    return path
+
+
+class IngestProfileTests(TestCase):
+    def test_csv_profile_reports_stages(self):
+        with TemporaryDirectory() as tmp:
+            path = write_csv(
+                tmp,
+                [
+                    "봄꽃축제,서울,2024-04-01,2024-04-03,내용,시청,문화재단,,,,,도로명,,37.1,127.1,2024-10-31",
+                    "가을축제,부산,2024-09-01,2024-09-02,내용,구청,,,,,,,,,,2024-10-31",
+                ],
+            )
+            out = StringIO()
+            stats_path = Path(tmp) / "ingest.pstats"
+            call_command("load_festivals_from_csv", path=str(path), profile_output=str(stats_path), stdout=out)
+            self.assertTrue(stats_path.exists())
+
+        report = out.getvalue()
+        for stage in ("read", "normalize", "write"):
+            self.assertIn(stage, report)
+        self.assertIn("rows: 2", report)
+        self.assertIn("rows/sec", report)
+
+    def test_profile_is_silent_by_default(self):
+        with TemporaryDirectory() as tmp:
+            path = write_csv(tmp, ["봄꽃축제,서울,2024-04-01,2024-04-03,,,,,,,,,,,,"])
+            out = StringIO()
+            call_command("load_festivals_from_csv", path=str(path), stdout=out)
+        self.assertNotIn("rows/sec", out.getvalue())
+
+
+def api_page(items, total, code="0000"):
+    body = "".join(f"<item><idx>{idx}</idx><title>{title}</title></item>" for idx, title in items)
+    return mock.Mock(
+        status_code=200,
+        text=f"<iq><resultCode>{code}</resultCode><resultMsg>m</resultMsg><totalCnt>{total}</totalCnt>{body}</iq>",
+        content=b"x",
+        headers={"ETag": f'"{total}-{len(items)}"'},
+    )
+
+
+class IngestResumeTests(TestCase):
+    ROWS = [
+        "첫째축제,서울,2024-04-01,,,,,,,,,,,,,",
+        "둘째축제,부산,2024-05-01,,,,,,,,,,,,,",
+        "셋째축제,대구,2024-06-01,,,,,,,,,,,,,",
+    ]
+
+    def test_csv_resume_continues_from_checkpoint(self):
+        with TemporaryDirectory() as tmp:
+            path = write_csv(tmp, self.ROWS)
+            cmd = LoadCsvCommand()
+            params = cmd._run_params(path, None)
+            IngestRun.objects.create(
+                source=IngestRun.Source.CSV,
+                params=params,
+                params_key=IngestRun.make_params_key(params),
+                last_offset=2,
+                status=IngestRun.Status.FAILED,
+            )
+            call_command("load_festivals_from_csv", path=str(path), resume=True, stdout=StringIO())
+
+        self.assertEqual(list(Festival.objects.values_list("title", flat=True)), ["셋째축제"])
+        run = IngestRun.objects.get()
+        self.assertEqual(run.status, IngestRun.Status.COMPLETED)
+        self.assertEqual(run.last_offset, 3)
+
+    def test_csv_bad_row_is_quarantined(self):
+        original = LoadCsvCommand._write_record
+
+        def flaky(cmd, record):
+            if record["defaults"]["title"] == "둘째축제":
+                raise ValueError("broken row")
+            return original(cmd, record)
+
+        with TemporaryDirectory() as tmp, mock.patch.object(LoadCsvCommand, "_write_record", flaky):
+            path = write_csv(tmp, self.ROWS)
+            call_command("load_festivals_from_csv", path=str(path), batch_size=2, stdout=StringIO())
+
+        self.assertEqual(Festival.objects.count(), 2)
+        run = IngestRun.objects.get()
+        error = run.errors.get()
+        self.assertEqual((error.offset, error.item_key), (1, "둘째축제"))
+        self.assertIn("broken row", error.message)
+
+    def test_api_failure_then_resume_skips_committed_pages(self):
+        pages = [api_page([("1", "하나")], total=3), api_page([], total=3, code="9999")]
+        with mock.patch("festivals.management.commands.fetch_festivals.requests.get", side_effect=pages):
+            with self.assertRaises(CommandError):
+                call_command("fetch_festivals", api_key="k", page_size=1, stdout=StringIO())
+        run = IngestRun.objects.get()
+        self.assertEqual((run.status, run.last_offset), (IngestRun.Status.FAILED, 1))
+
+        pages = [api_page([("2", "둘")], total=3), api_page([("3", "셋")], total=3)]
+        with mock.patch("festivals.management.commands.fetch_festivals.requests.get", side_effect=pages) as get:
+            call_command("fetch_festivals", api_key="k", page_size=1, resume=True, stdout=StringIO())
+        self.assertEqual([c.kwargs["params"]["cPage"] for c in get.call_args_list], [2, 3])
+        self.assertEqual(Festival.objects.count(), 3)
+        run.refresh_from_db()
+        self.assertEqual(run.status, IngestRun.Status.COMPLETED)
+
+
+class ResponseCacheTests(TestCase):
+    GET = "festivals.management.commands.fetch_festivals.requests.get"
+
+    def test_record_then_replay_offline(self):
+        with TemporaryDirectory() as tmp:
+            pages = [api_page([("1", "하나")], total=2), api_page([("2", "둘")], total=2)]
+            with mock.patch(self.GET, side_effect=pages):
+                call_command("fetch_festivals", api_key="secret", page_size=1, cache_dir=tmp, stdout=StringIO())
+            for entry in Path(tmp).glob("*.json"):
+                self.assertNotIn("secret", entry.read_text(encoding="utf-8"))
+            Festival.objects.all().delete()
+
+            with mock.patch(self.GET, side_effect=AssertionError("network used")):
+                call_command("fetch_festivals", api_key=None, page_size=1, replay=tmp, stdout=StringIO())
+        self.assertEqual(Festival.objects.count(), 2)
+
+    def test_replay_missing_page_fails(self):
+        with TemporaryDirectory() as tmp, self.assertRaises(CommandError):
+            call_command("fetch_festivals", api_key=None, replay=tmp, stdout=StringIO())
+
+    def test_revalidate_uses_cached_page_on_304(self):
+        with TemporaryDirectory() as tmp:
+            with mock.patch(self.GET, side_effect=[api_page([("1", "하나")], total=1)]):
+                call_command("fetch_festivals", api_key="k", page_size=1, cache_dir=tmp, stdout=StringIO())
+            with mock.patch(self.GET, return_value=mock.Mock(status_code=304)) as get:
+                call_command(
+                    "fetch_festivals", api_key="k", page_size=1, cache_dir=tmp, revalidate=True, stdout=StringIO()
+                )
+        self.assertEqual(get.call_args.kwargs["headers"], {"If-None-Match": '"1-1"'})
+        self.assertEqual(Festival.objects.count(), 1)
+
+
+class CsvReconcileTests(TestCase):
+    def load(self, lines, **options):
+        with TemporaryDirectory() as tmp:
+            path = write_csv(tmp, lines)
+            out = StringIO()
+            call_command("load_festivals_from_csv", path=str(path), reconcile=True, stdout=out, **options)
+        return out.getvalue()
+
+    def test_reconcile_inserts_updates_and_deactivates(self):
+        self.load(
+            [
+                "봄축제,서울,2024-04-01,2024-04-02,처음,시청,,,,,,도로,,37.1,127.1,2024-10-31",
+                "여름축제,부산,2024-07-01,,,구청,,,,,,,,,,2024-10-31",
+                "가을축제,대구,2024-10-01,,,,,,,,,,,,,2024-10-31",
+            ]
+        )
+        self.assertEqual(Festival.objects.filter(source=Festival.Source.CSV).count(), 3)
+        spring = Festival.objects.get(title="봄축제")
+        self.assertEqual((spring.place_name, spring.organizer_name), ("서울", "시청"))
+        manual = Festival.objects.create(title="수동 등록 축제")
+        untouched_updated_at = Festival.objects.get(title="여름축제").updated_at
+
+        out = self.load(
+            [
+                "봄축제,서울,2024-04-01,2024-04-02,바뀐 내용,도청,,,,,,도로,,37.1,127.1,2024-10-31",
+                "여름축제,부산,2024-07-01,,,구청,,,,,,,,,,2024-10-31",
+                "겨울축제,강릉,2024-12-01,,,,,,,,,,,,,2024-10-31",
+            ]
+        )
+        self.assertIn("추가 1건, 수정 1건, 비활성화 1건, 변경 없음 1건", out)
+        spring.refresh_from_db()
+        self.assertEqual((spring.description, spring.organizer_name), ("바뀐 내용", "도청"))
+        self.assertEqual(Location.objects.filter(name="서울").count(), 1)  # the stored location is reused
+        self.assertEqual(Festival.objects.get(title="여름축제").updated_at, untouched_updated_at)
+        self.assertFalse(Festival.objects.get(title="가을축제").is_active)
+        self.assertTrue(Festival.objects.get(title="겨울축제").is_active)
+        self.assertTrue(Festival.objects.get(pk=manual.pk).is_active)
+
+        resp = self.client.get(reverse("festival_list"))
+        self.assertNotContains(resp, "가을축제")
+
+    def test_dry_run_reports_without_writing(self):
+        Festival.objects.create(external_id="사라진축제-2024-01-01", title="사라진축제", source=Festival.Source.CSV)
+        out = self.load(["새축제,서울,2024-04-01,,,,,,,,,,,,,"], dry_run=True)
+        self.assertIn("추가 1건, 수정 0건, 비활성화 1건", out)
+        self.assertIn("- 사라진축제-2024-01-01", out)
+        self.assertFalse(Festival.objects.filter(title="새축제").exists())
+        self.assertTrue(Festival.objects.get(title="사라진축제").is_active)
+        with TemporaryDirectory() as tmp, self.assertRaises(CommandError):
+            path = write_csv(tmp, ["새축제,서울,2024-04-01,,,,,,,,,,,,,"])
+            call_command("load_festivals_from_csv", path=str(path), dry_run=True, stdout=StringIO())
+        self.assertFalse(Festival.objects.filter(title="새축제").exists())
+
+    def test_limit_is_rejected_with_reconcile(self):
+        self.load(["축제1,서울,2024-04-01,,,,,,,,,,,,,", "축제2,서울,2024-04-02,,,,,,,,,,,,,"])
+        with TemporaryDirectory() as tmp, self.assertRaises(CommandError):
+            path = write_csv(tmp, ["축제1,서울,2024-04-01,,,,,,,,,,,,,", "축제2,서울,2024-04-02,,,,,,,,,,,,,"])
+            call_command("load_festivals_from_csv", path=str(path), reconcile=True, limit=1, stdout=StringIO())
+        self.assertEqual(Festival.objects.filter(is_active=True).count(), 2)
+
+
+class FacetTests(TestCase):
+    def counts(self, facet):
+        return dict(FacetCount.objects.filter(facet=facet).values_list("value", "count"))
+
+    def add_festival(self, title, address, organizer, start):
+        location = Location.objects.create(name=title, address_road=address)
+        festival = Festival.objects.create(title=title, location=location, start_date=start)
+        org, _ = Organization.objects.get_or_create(name=organizer)
+        FestivalOrganization.objects.create(festival=festival, organization=org, role=FestivalOrganization.Role.ORGANIZER)
+        return festival
+
+    def test_split_region(self):
+        self.assertEqual(split_region("인천광역시 연수구 센트럴로 123"), ("인천광역시", "연수구"))
+        self.assertEqual(split_region("서울 종로구 세종대로"), ("서울특별시", "종로구"))
+        self.assertEqual(split_region("세종특별자치시 한누리대로"), ("세종특별자치시", ""))
+        self.assertEqual(split_region("주소 없음"), ("", ""))
+
+    def test_counts_follow_writes(self):
+        today = timezone.localdate()
+        a = self.add_festival("가 축제", "인천광역시 연수구 센트럴로 1", "시청", today + timedelta(days=3))
+        b = self.add_festival("나 축제", "인천광역시 중구 월미로 2", "시청", today - timedelta(days=30))
+        self.assertEqual(self.counts("sido"), {"인천광역시": 2})
+        self.assertEqual(self.counts("organizer"), {"시청": 2})
+        self.assertEqual(self.counts("status"), {"upcoming": 1, "past": 1})
+
+        b.location.address_road = "부산광역시 중구 중앙대로 3"
+        b.location.save()
+        self.assertEqual(self.counts("sido"), {"인천광역시": 1, "부산광역시": 1})
+        self.assertEqual(self.counts("sigungu"), {"인천광역시 연수구": 1, "부산광역시 중구": 1})
+
+        a.is_active = False
+        a.save()
+        self.assertEqual(self.counts("sido"), {"부산광역시": 1})
+        b.delete()
+        self.assertEqual(FacetCount.objects.count(), 0)
+
+    def test_incremental_counts_match_rebuild(self):
+        today = timezone.localdate()
+        for i, address in enumerate(["서울 종로구 1", "서울 중구 2", "부산 중구 3"]):
+            self.add_festival(f"축제 {i}", address, f"기관 {i % 2}", today + timedelta(days=i * 40))
+        FestivalOrganization.objects.filter(festival__title="축제 0").delete()
+        incremental = set(FacetCount.objects.values_list("facet", "value", "count"))
+        rebuild_facets()
+        self.assertEqual(incremental, set(FacetCount.objects.values_list("facet", "value", "count")))
+
+    def test_list_filters_by_facet_and_shows_counts(self):
+        today = timezone.localdate()
+        self.add_festival("인천 축제", "인천광역시 연수구 1", "시청", today)
+        self.add_festival("부산 축제", "부산광역시 중구 2", "구청", today)
+        resp = self.client.get(reverse("festival_list"), {"sido": "부산광역시"})
+        self.assertContains(resp, "부산 축제")
+        self.assertNotContains(resp, "인천 축제")
+        self.assertContains(resp, '인천광역시 <span class="facet__count">1</span>', html=False)
+        resp = self.client.get(reverse("festival_list"), {"status": "ongoing", "organizer": "시청"})
+        self.assertContains(resp, "인천 축제")
+        self.assertNotContains(resp, "부산 축제")
+
+
+class PopularityTests(TestCase):
+    def setUp(self):
+        view_counter.discard()
+        self.old = Festival.objects.create(title="예전 인기 축제")
+        self.new = Festival.objects.create(title="요즘 뜨는 축제")
+
+    def test_recent_hits_outrank_older_bigger_bursts(self):
+        now = timezone.now()
+        apply_views({self.old.pk: 10}, now=now - timedelta(days=30))
+        apply_views({self.new.pk: 3}, now=now)
+        self.old.refresh_from_db()
+        self.new.refresh_from_db()
+        self.assertEqual((self.old.view_count, self.new.view_count), (10, 3))
+        self.assertGreater(self.new.popularity, self.old.popularity)
+        self.assertAlmostEqual(add_hits(add_hits(0, 1, now), 1, now), add_hits(0, 2, now))
+
+        resp = self.client.get(reverse("festival_popular"))
+        self.assertEqual([f.pk for f in resp.context["festivals"]], [self.new.pk, self.old.pk])
+        resp = self.client.get(reverse("festival_popular"), {"sort": "views"})
+        self.assertEqual([f.pk for f in resp.context["festivals"]], [self.old.pk, self.new.pk])
+
+    @override_settings(FESTIVAL_VIEW_FLUSH_SIZE=3, FESTIVAL_VIEW_FLUSH_INTERVAL=3600)
+    def test_detail_hits_are_buffered_then_flushed_in_bulk(self):
+        counter = ViewCounter()
+        with mock.patch("festivals.views.view_counter", counter):
+            url = reverse("festival_detail", args=[self.new.pk])
+            self.client.get(url)
+            self.client.get(url)
+            self.assertEqual(Festival.objects.get(pk=self.new.pk).view_count, 0)
+            self.assertEqual(counter.pending(), 2)
+            with CaptureQueriesContext(connection) as queries:
+                counter.record(self.old.pk)
+        # savepoint, view count UPDATE (takes the write lock), SELECT, popularity UPDATE, release
+        self.assertEqual([q["sql"].split()[0] for q in queries][1:4], ["UPDATE", "SELECT", "UPDATE"])
+        self.assertEqual(len(queries), 5)
+        self.assertEqual(Festival.objects.get(pk=self.new.pk).view_count, 2)
+        self.assertEqual(Festival.objects.get(pk=self.old.pk).view_count, 1)
+
+    @override_settings(FESTIVAL_VIEW_FLUSH_SIZE=1)
+    def test_locked_flush_requeues_hits_without_failing_the_page(self):
+        counter = ViewCounter()
+        locked = OperationalError("database is locked")
+        with mock.patch("festivals.views.view_counter", counter), mock.patch(
+            "festivals.popularity.apply_views", side_effect=locked
+        ), self.assertLogs("festivals.popularity", "WARNING"):
+            self.assertEqual(self.client.get(reverse("festival_detail", args=[self.new.pk])).status_code, 200)
+        self.assertEqual(counter.pending(), 1)
+        counter.flush()
+        self.assertEqual(Festival.objects.get(pk=self.new.pk).view_count, 1)
+
+
+class FestivalCardTests(TestCase):
+    def add(self, title, organizer="", host=""):
+        festival = Festival.objects.create(title=title, location=Location.objects.create(name=f"{title} 장소"))
+        for role, name in ((FestivalOrganization.Role.ORGANIZER, organizer), (FestivalOrganization.Role.HOST, host)):
+            if name:
+                org, _ = Organization.objects.get_or_create(name=name)
+                FestivalOrganization.objects.create(festival=festival, organization=org, role=role)
+        return festival
+
+    def test_cards_carry_place_and_roles(self):
+        festival = self.add("카드 축제", organizer="시청", host="재단")
+        self.add("역할 없는 축제")
+        cards = to_cards(card_rows(Festival.objects.order_by("title")))
+        self.assertTrue(all(isinstance(card, FestivalCard) for card in cards))
+        card = next(card for card in cards if card.pk == festival.pk)
+        self.assertEqual((card.place, card.organizer, card.host), ("카드 축제 장소", "시청", "재단"))
+        self.assertFalse(hasattr(card, "__dict__"))
+
+    def test_list_queries_do_not_grow_with_cards(self):
+        def list_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse("festival_list"))
+            return len(ctx)
+
+        self.add("축제 0", organizer="시청", host="주관단체")
+        few = list_queries()
+        for i in range(1, 10):
+            self.add(f"축제 {i}", organizer="시청", host="주관단체")
+        resp = self.client.get(reverse("festival_list"))
+        self.assertContains(resp, "주관단체", count=10)
+        self.assertEqual(list_queries(), few)
+
+
+class RelatedFestivalTests(TestCase):
+    DESCRIPTION = "송도 달빛축제공원에서 열리는 국내 최대 규모의 록 음악 페스티벌로 국내외 밴드가 출연합니다."
+
+    def build(self):
+        out = StringIO()
+        call_command("build_related_festivals", stdout=out)
+        return out.getvalue()
+
+    def related_titles(self, festival):
+        return list(RelatedFestival.objects.filter(festival=festival).values_list("related__title", flat=True))
+
+    def test_minhash_estimates_jaccard(self):
+        a = shingles("인천 펜타포트 락 페스티벌")
+        self.assertEqual(estimate_similarity(minhash(a), minhash(a)), 1.0)
+        for num_perm in (12, 64):
+            for shingle_set in (set(), {"가나"}, a):  # empty and sparse sets borrow across bins
+                self.assertLess(max(minhash(shingle_set, num_perm=num_perm)), 1 << 64)
+        near = estimate_similarity(minhash(a), minhash(shingles("인천 펜타포트 락 페스티벌 2025")))
+        far = estimate_similarity(minhash(a), minhash(shingles("소래포구 꽃게 축제")))
+        self.assertGreater(near, 0.5)
+        self.assertLess(far, near)
+
+    def test_neighbours_are_precomputed_and_refreshed_incrementally(self):
+        rock = Festival.objects.create(title="인천 펜타포트 락 페스티벌", description=self.DESCRIPTION)
+        rock_next = Festival.objects.create(title="인천 펜타포트 락 페스티벌 2025", description=self.DESCRIPTION)
+        crab = Festival.objects.create(title="소래포구 꽃게 축제", description="소래포구 어시장 일대에서 꽃게를 맛보는 축제")
+        self.assertIn("서명 3건", self.build())
+        self.assertEqual(self.related_titles(rock), [rock_next.title])
+        self.assertEqual(self.related_titles(crab), [])
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("festival_detail", args=[rock.pk]))
+        self.assertContains(resp, "비슷한 축제")
+        sql = [q["sql"] for q in ctx.captured_queries]
+        self.assertEqual(len([q for q in sql if "relatedfestival" in q]), 1)
+        self.assertFalse([q for q in sql if "signature" in q])
+
+        self.assertIn("서명 0건", self.build())
+        crab.title, crab.description = "인천 펜타포트 락 페스티벌 특별공연", self.DESCRIPTION
+        crab.save()
+        self.assertIn("서명 1건", self.build())
+        self.assertIn(crab.title, self.related_titles(rock))
+
+        rock_next.is_active = False
+        rock_next.save()
+        self.assertIn("제외 1건", self.build())
+        self.assertEqual(self.related_titles(rock), [crab.title])
+
+
+class DuplicateFestivalTests(TestCase):
+    def test_blocking_pairs_sources_once_and_respects_dates(self):
+        entries = [
+            Entry(1, "csv", "제10회 인천 펜타포트 락 페스티벌", date(2025, 8, 1), "인천광역시"),
+            Entry(2, "api", "인천 펜타포트 락 페스티벌 2025", date(2025, 8, 1), ""),
+            Entry(3, "csv", "인천 펜타포트 락 페스티벌", date(2024, 8, 2), "인천광역시"),
+            Entry(4, "api", "소래포구 꽃게 축제", None, ""),
+        ]
+        report = find_duplicates(entries)
+        self.assertEqual([[e.pk for e in cluster] for cluster in report.clusters], [[1, 2]])
+
+    def test_merge_moves_comments_and_keeps_duplicate_hidden_on_reload(self):
+        with TemporaryDirectory() as tmp:
+            path = write_csv(
+                tmp,
+                [
+                    "월미 문화축제,월미도,2025-05-01,2025-05-03,,중구청,,,,,,,,,,",
+                    "제3회 월미 문화 축제,,2025-05-02,,바다 축제,,중구문화재단,,,,,,,,,",
+                ],
+            )
+            LoadCsvCommand().handle(path=path, limit=None)
+            survivor, duplicate = Festival.objects.order_by("pk")
+            Comment.objects.create(festival=duplicate, nickname="방문객", content="좋아요")
+            out = StringIO()
+            call_command("find_duplicate_festivals", "--any-source", "--merge", stdout=out)
+            self.assertIn("중복 묶음 1개", out.getvalue())
+
+            survivor.refresh_from_db()
+            duplicate.refresh_from_db()
+            self.assertEqual(duplicate.merged_into, survivor)
+            self.assertFalse(duplicate.is_active)
+            self.assertEqual(survivor.description, "바다 축제")
+            self.assertEqual((survivor.organizer_name, survivor.host_name), ("중구청", "중구문화재단"))
+            self.assertEqual(survivor.comments.count(), 1)
+            resp = self.client.get(reverse("festival_detail", args=[duplicate.pk]))
+            self.assertRedirects(resp, reverse("festival_detail", args=[survivor.pk]), status_code=301)
+
+            LoadCsvCommand().handle(path=path, limit=None)
+            duplicate.refresh_from_db()
+            self.assertFalse(duplicate.is_active)
+            call_command("load_festivals_from_csv", path=str(path), reconcile=True, stdout=StringIO())
+            duplicate.refresh_from_db()
+            self.assertFalse(duplicate.is_active)
+
+
+class ArchiveTests(TestCase):
+    def test_archive_moves_old_festivals_and_keeps_detail_url(self):
+        with TemporaryDirectory() as tmp:
+            path = write_csv(
+                tmp,
+                [
+                    "옛 등불축제,월미도,2020-05-01,2020-05-03,오래된 축제,중구청,중구문화재단,,,,,인천광역시 중구 월미로 1,,,,",
+                    f"새 등불축제,월미도,{timezone.localdate()},,,중구청,,,,,,인천광역시 중구 월미로 1,,,,",
+                ],
+            )
+            LoadCsvCommand().handle(path=path, limit=None)
+            old = Festival.objects.get(title="옛 등불축제")
+            Comment.objects.create(festival=old, nickname="방문객", content="그립네요")
+            self.assertEqual(FacetCount.objects.get(facet="sido", value="인천광역시").count, 2)
+
+            out = StringIO()
+            call_command("archive_festivals", "--dry-run", stdout=out)
+            self.assertIn("보관 대상: 1건", out.getvalue())
+            call_command("archive_festivals", stdout=StringIO())
+
+            self.assertFalse(Festival.objects.filter(pk=old.pk).exists())
+            archived = ArchivedFestival.objects.get(pk=old.pk)
+            self.assertEqual((archived.organizer, archived.host, archived.sido), ("중구청", "중구문화재단", "인천광역시"))
+            self.assertEqual(archived.comments.get().content, "그립네요")
+            self.assertEqual(FacetCount.objects.get(facet="sido", value="인천광역시").count, 1)
+
+            resp = self.client.get(reverse("festival_detail", args=[old.pk]))
+            self.assertContains(resp, "보관된 축제")
+            self.assertContains(resp, "그립네요")
+            self.assertNotContains(self.client.get(reverse("festival_list")), "옛 등불축제")
+            self.assertContains(self.client.get(reverse("festival_archive"), {"q": "등불"}), "옛 등불축제")
+
+            LoadCsvCommand().handle(path=path, limit=None)
+            call_command("load_festivals_from_csv", path=str(path), reconcile=True, stdout=StringIO())
+            self.assertFalse(Festival.objects.filter(title="옛 등불축제").exists())
+            self.assertEqual(Festival.objects.count(), 1)
+
+    def test_recreated_external_id_is_archived_with_suffix(self):
+        old = Festival.objects.create(external_id="fest-old", title="옛 축제", start_date=date(2020, 5, 1))
+        archive_finished(archive_cutoff())
+        again = Festival.objects.create(external_id="fest-old", title="다시 만든 축제", start_date=date(2020, 6, 1))
+        with self.assertLogs("festivals.archive", "WARNING"):
+            self.assertEqual(archive_finished(archive_cutoff()), 1)
+        self.assertEqual(ArchivedFestival.objects.get(pk=old.pk).external_id, "fest-old")
+        self.assertEqual(ArchivedFestival.objects.get(pk=again.pk).external_id, f"fest-old#{again.pk}")
+
+
+class BackfillTests(TestCase):
+    def test_chunks_commit_progress_and_resume_after_failure(self):
+        for i in range(7):
+            Location.objects.create(name=f"장소 {i}", address_road=f"서울 종로구 {i}")
+        Location.objects.update(sido="", sigungu="")
+        seen = []
+
+        def handler(chunk):
+            pks = list(chunk.values_list("pk", flat=True))
+            if len(seen) == 2 and not getattr(handler, "failed", False):
+                handler.failed = True
+                raise RuntimeError("boom")
+            seen.append(pks)
+            chunk.update(sido="서울특별시")
+
+        with self.assertRaises(RuntimeError):
+            run_backfill("regions", Location.objects.all(), handler, chunk_size=3)
+        progress = BackfillProgress.objects.get(name="regions")
+        self.assertEqual((progress.status, progress.processed), (BackfillProgress.Status.FAILED, 6))
+        self.assertEqual(Location.objects.filter(sido="").count(), 1)
+
+        progress = run_backfill("regions", Location.objects.all(), handler, chunk_size=3)
+        self.assertEqual(progress.status, BackfillProgress.Status.COMPLETED)
+        self.assertEqual([len(pks) for pks in seen], [3, 3, 1])
+        self.assertFalse(Location.objects.filter(sido="").exists())
+        run_backfill("regions", Location.objects.all(), handler, chunk_size=3)
+        self.assertEqual(len(seen), 3)
+
+    def test_command_runs_registered_backfill_in_bounded_steps(self):
+        for i in range(5):
+            Location.objects.create(name=f"장소 {i}", address_road=f"인천광역시 중구 {i}")
+        Location.objects.update(sido="", sigungu="")
+        out = StringIO()
+        call_command("backfill", "location_regions", "--chunk-size", "2", "--max-chunks", "1", stdout=out)
+        self.assertIn("중단", out.getvalue())
+        self.assertEqual(Location.objects.filter(sido="인천광역시").count(), 2)
+        with mock.patch("festivals.backfill.request_purge") as purge:
+            call_command("backfill", "location_regions", "--chunk-size", "2", stdout=out)
+        self.assertIn("완료: location_regions (5건 변경)", out.getvalue())
+        self.assertEqual(Location.objects.filter(sigungu="중구").count(), 5)
+        purge.assert_called_with(["festival-list", "festival-detail"])
+        with self.assertRaises(CommandError):
+            call_command("backfill", "nope", stdout=StringIO())
+
+    def test_location_regions_sync_facets(self):
+        location = Location.objects.create(name="광장", address_road="인천광역시 중구 1")
+        Festival.objects.create(title="지역 축제", start_date=date(2024, 5, 1), location=location)
+        Location.objects.update(sido="", sigungu="")
+        rebuild_facets()
+        self.assertFalse(FacetCount.objects.filter(facet="sido", value="인천광역시", count__gt=0).exists())
+        call_command("backfill", "location_regions", stdout=StringIO())
+        self.assertEqual(FacetCount.objects.get(facet="sido", value="인천광역시").count, 1)
+
+
+class MetricsTests(TestCase):
+    def test_exposition_format_and_cross_process_aggregation(self):
+        with TemporaryDirectory() as tmp, override_settings(FESTIVAL_METRICS_DIR=tmp):
+            registry = Registry()
+            hits = registry.counter("demo_hits_total", "Hits.", ("view",))
+            latency = registry.histogram("demo_seconds", "Latency.", buckets=(0.1, 1.0))
+            rate = registry.gauge("demo_rate", "Rate.")
+            hits.inc(view='a"b')
+            latency.observe(0.1)
+            latency.observe(3)
+            rate.set(2.5)
+            # Another worker process's file.
+            (Path(tmp) / "99999.json").write_text(
+                '{"demo_hits_total": [[["a\\"b"], 4]], "demo_seconds": [[[], [1, 0, 0, 0.05]]], "demo_rate": [[[], [1.0, 0]]]}',
+                encoding="utf-8",
+            )
+            text = registry.exposition()
+        self.assertIn("# TYPE demo_hits_total counter", text)
+        self.assertIn('demo_hits_total{view="a\\"b"} 5', text)
+        self.assertIn('demo_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('demo_seconds_bucket{le="1.0"} 2', text)
+        self.assertIn('demo_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("demo_seconds_count 3", text)
+        self.assertIn("demo_rate 2.5", text)
+
+    def test_exited_and_dead_processes_fold_into_the_aggregate(self):
+        with TemporaryDirectory() as tmp, override_settings(FESTIVAL_METRICS_DIR=tmp):
+            worker, scraper = Registry(), Registry()
+            for registry in (worker, scraper):
+                registry.counter("demo_hits_total", "Hits.")
+            worker.metrics["demo_hits_total"].inc(3)
+            worker.flush()
+            self.assertTrue((Path(tmp) / worker.file_name()).exists())
+            worker.retire()
+            worker.metrics["demo_hits_total"].inc()  # after exit handling; never written
+            worker.flush()
+            self.assertEqual(sorted(p.name for p in Path(tmp).glob("*.json")), ["aggregate.json"])
+            # A process killed without running its exit handler (pid above any pid_max).
+            (Path(tmp) / "4194305-1.json").write_text('{"demo_hits_total": [[[], 2]]}', encoding="utf-8")
+            self.assertIn("demo_hits_total 5", scraper.exposition())
+            self.assertFalse((Path(tmp) / "4194305-1.json").exists())
+            self.assertIn("demo_hits_total 5", scraper.exposition())
+
+    @override_settings(FESTIVAL_METRICS_TOKEN="scrape-secret")
+    def test_endpoint_reports_views_and_ingest(self):
+        before = ingest_rows.values.get(("csv",), 0)
+        with TemporaryDirectory() as tmp:
+            LoadCsvCommand().handle(path=write_csv(tmp, ["봄꽃축제,서울,2024-04-01,,,,,,,,,,,,,"]), limit=None)
+        self.assertEqual(ingest_rows.values[("csv",)], before + 1)
+        self.client.get(reverse("festival_list"))
+        resp = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(resp["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        text = resp.content.decode()
+        self.assertIn('festival_http_requests_total{view="festival_list",method="GET",status="200",cache="public"}', text)
+        self.assertIn('festival_http_request_duration_seconds_bucket{view="festival_list",le="+Inf"}', text)
+        self.assertIn('festival_ingest_rows_per_second{source="csv"}', text)
+
+    @override_settings(FESTIVAL_METRICS_TOKEN="scrape-secret", FESTIVAL_METRICS_SCRAPER_IPS=("10.0.0.5",), FESTIVAL_TRUSTED_PROXY_HOPS=1)
+    def test_endpoint_access(self):
+        url = reverse("metrics")
+        for extra in (
+            {},  # 127.0.0.1: a local reverse proxy forwards every visitor from here
+            {"HTTP_X_FORWARDED_FOR": "10.0.0.5"},
+            {"HTTP_AUTHORIZATION": "Bearer wrong"},
+            {"HTTP_AUTHORIZATION": "Bearer 비밀"},
+        ):
+            self.assertEqual(self.client.get(url, **extra).status_code, 403, extra)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.0.5").status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer scrape-secret").status_code, 200)
+        self.client.force_login(User.objects.create_user(username="staff", is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class MapClusterTests(TestCase):
+    def add_festival(self, title, latitude, longitude):
+        location = Location.objects.create(name=title, latitude=latitude, longitude=longitude)
+        return Festival.objects.create(title=title, location=location)
+
+    def snapshot(self):
+        return {
+            (c.zoom, c.tile_x, c.tile_y, c.cell): (c.count, round(c.latitude_sum, 6), round(c.longitude_sum, 6))
+            for c in MapCluster.objects.all()
+        }
+
+    def test_writes_update_only_affected_clusters_and_match_rebuild(self):
+        incheon = self.add_festival("인천 축제", "37.456", "126.705")
+        self.add_festival("부평 축제", "37.507", "126.722")
+        Festival.objects.create(title="좌표 없는 축제")
+        self.assertEqual(MapCluster.objects.filter(zoom=MIN_ZOOM).get().count, 2)
+        self.assertEqual(MapCluster.objects.filter(zoom=MAX_ZOOM).count(), 2)
+
+        incheon.location.latitude, incheon.location.longitude = "35.179", "129.075"  # to Busan
+        with mock.patch("festivals.maptiles.BULK_THRESHOLD", 0):
+            incheon.location.save()
+        self.assertEqual(sorted(MapCluster.objects.filter(zoom=8).values_list("count", flat=True)), [1, 1])
+        incremental = self.snapshot()
+        rebuild_map_clusters()
+        self.assertEqual(incremental, self.snapshot())
+
+        incheon.delete()
+        Festival.objects.filter(title="부평 축제").update(is_active=False)
+        call_command("refresh_facets", stdout=StringIO())
+        self.assertEqual(MapCluster.objects.count(), 0)
+
+    def test_endpoint_serves_bbox_with_one_query(self):
+        self.add_festival("인천 축제", "37.456", "126.705")
+        self.add_festival("부산 축제", "35.179", "129.075")
+        url = reverse("map_clusters")
+        with self.assertNumQueries(1):
+            resp = self.client.get(url, {"bbox": "124,33,132,39", "zoom": "6"})
+        data = resp.json()
+        self.assertEqual(data["zoom"], 6)
+        self.assertEqual(sum(c["count"] for c in data["clusters"]), 2)
+        data = self.client.get(url, {"bbox": "126.70,37.45,126.71,37.46", "zoom": "20"}).json()
+        self.assertEqual((data["zoom"], [c["count"] for c in data["clusters"]]), (MAX_ZOOM, [1]))
+        self.assertEqual(self.client.get(url, {"bbox": "1,2,3", "zoom": "6"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"bbox": "-170,-80,170,80", "zoom": "12"}).status_code, 400)
+        for bbox in ("inf,33,132,39", "124,33,1e309,39", "124,nan,132,39", "124,33,200,39", "124,-91,132,39"):
+            self.assertEqual(self.client.get(url, {"bbox": bbox, "zoom": "6"}).status_code, 400, bbox)
+
+
+class OutboxTests(TestCase):
+    def log(self):
+        return list(ChangeLog.objects.values_list("kind", "action", "festival_id"))
+
+    def test_changes_are_logged_in_the_writing_transaction(self):
+        staff = User.objects.create_user(username="staff", password="pw", is_staff=True)
+        self.client.force_login(staff)
+        self.client.post(reverse("festival_create"), {"title": "새 축제", "organizer": "시청"})
+        festival = Festival.objects.get(title="새 축제")
+        self.assertIn(("festival", "save", festival.pk), self.log())
+        self.assertIn(("role", "save", festival.pk), self.log())
+
+        ChangeLog.objects.all().delete()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Festival.objects.create(title="롤백 축제")
+            raise RuntimeError
+        self.assertEqual(self.log(), [])
+
+        with TemporaryDirectory() as tmp:
+            path = write_csv(tmp, ["봄꽃축제,서울,2024-04-01,,,,,,,,,,,,,"])
+            call_command("load_festivals_from_csv", path=str(path), reconcile=True, stdout=StringIO())
+        spring = Festival.objects.get(title="봄꽃축제").pk
+        self.assertEqual(self.log(), [("festival", "save", spring)])
+        Festival.objects.get(pk=spring).delete()
+        self.assertEqual(self.log()[-1], ("festival", "delete", spring))
+
+    def test_bulk_merge_and_region_fill_are_logged(self):
+        survivor = Festival.objects.create(title="월미 문화축제", start_date=date(2025, 5, 1))
+        loser = Festival.objects.create(title="월미 문화 축제", start_date=date(2025, 5, 1))
+        earlier = Festival.objects.create(title="월미 축제", is_active=False, merged_into=loser)
+        comment = Comment.objects.create(festival=loser, nickname="방문객", content="좋아요")
+        host = Organization.objects.create(name="중구문화재단")
+        FestivalOrganization.objects.create(festival=loser, organization=host, role="host")
+        ChangeLog.objects.all().delete()
+        merge_cluster(
+            [
+                Entry(survivor.pk, "csv", survivor.title, survivor.start_date, ""),
+                Entry(loser.pk, "api", loser.title, loser.start_date, ""),
+            ]
+        )
+        copy = FestivalOrganization.objects.get(festival=survivor, role="host")
+        logged = set(ChangeLog.objects.values_list("kind", "object_id", "festival_id"))
+        expected = {
+            ("festival", loser.pk, loser.pk),
+            ("festival", earlier.pk, earlier.pk),
+            ("comment", comment.pk, survivor.pk),
+            ("role", copy.pk, survivor.pk),
+        }
+        self.assertLessEqual(expected, logged)
+
+        place = Location.objects.create(name="월미도", address_road="인천광역시 중구 월미문화로 1")
+        Location.objects.filter(pk=place.pk).update(sido="", sigungu="")
+        Festival.objects.filter(pk=survivor.pk).update(location=place)
+        ChangeLog.objects.all().delete()
+        call_command("refresh_facets", stdout=StringIO())
+        self.assertEqual(
+            list(ChangeLog.objects.values_list("kind", "object_id", "festival_id")), [("location", place.pk, survivor.pk)]
+        )
+
+    def test_consumer_processes_batches_and_resumes_from_cursor(self):
+        class Collector(OutboxConsumer):
+            name = "collector"
+            kinds = {ChangeLog.Kind.FESTIVAL}
+            batch_size = 2
+            fail = False
+
+            def __init__(self):
+                self.batches = []
+
+            def handle(self, changes):
+                if self.fail:
+                    raise RuntimeError("down")
+                self.batches.append([c.festival_id for c in changes])
+
+        ids = [Festival.objects.create(title=f"축제 {i}").pk for i in range(3)]
+        Comment.objects.create(festival_id=ids[0], nickname="방문객", content="좋아요")
+        collector = Collector()
+        self.assertEqual(consume(collector, max_batches=1), 2)
+        self.assertEqual(consume(collector), 2)
+        self.assertEqual(collector.batches, [ids[:2], ids[2:]])  # the comment row is skipped
+        self.assertEqual(consume(collector), 0)
+
+        position = OutboxCursor.objects.get(name="collector").position
+        Festival.objects.create(title="축제 3")
+        collector.fail = True
+        with self.assertRaises(RuntimeError):
+            consume(collector)
+        self.assertEqual(OutboxCursor.objects.get(name="collector").position, position)
+
+        with mock.patch.dict("festivals.outbox.CONSUMERS", {"collector": collector}, clear=True):
+            self.assertEqual(prune(), 4)
+        self.assertEqual(ChangeLog.objects.count(), 1)
+
+    def test_related_festivals_follow_the_log(self):
+        a = Festival.objects.create(title="인천 펜타포트 락 페스티벌", description="인천 송도 락 음악 축제")
+        b = Festival.objects.create(title="인천 펜타포트 락 페스티벌 2", description="인천 송도 락 음악 축제")
+        out = StringIO()
+        call_command("consume_outbox", "related_festivals", stdout=out)
+        self.assertIn("related_festivals: 변경 2건 처리", out.getvalue())
+        self.assertEqual(list(RelatedFestival.objects.filter(festival=a).values_list("related_id", flat=True)), [b.pk])
+        b.is_active = False
+        b.save()
+        call_command("consume_outbox", "related_festivals", stdout=StringIO())
+        self.assertFalse(RelatedFestival.objects.exists())
+
+
+@override_settings(CACHES=TEST_CACHES)
+class LoadTestTests(TestCase):
+    def setUp(self):
+        caches[settings.FESTIVAL_RATE_LIMIT_CACHE].clear()
+
+    def test_wsgi_client_keeps_cookies_and_posts_comments(self):
+        from config.wsgi import application
+
+        festival = Festival.objects.create(title="부하 축제")
+        client = WsgiClient(application, "10.0.0.1")
+        status, _, error = client.request("GET", reverse("festival_list"))
+        self.assertEqual((status, error), (200, None))
+        status, content, _ = client.request("GET", reverse("csrf_token"))
+        token = json.loads(content)["token"]
+        self.assertIn("csrftoken", client.cookies)
+        url = reverse("festival_detail", args=[festival.pk])
+        data = {"nickname": "부하0", "content": "부하 테스트", "csrfmiddlewaretoken": token}
+        with override_settings(FESTIVAL_COMMENT_FLUSH_INTERVAL=0):
+            status, _, _ = client.request("POST", url, data, headers={"X-CSRFToken": token})
+        self.assertEqual(status, 302)
+        self.assertTrue(Comment.objects.filter(festival=festival, nickname="부하0").exists())
+
+    def test_run_reports_percentiles_and_classifies_errors(self):
+        class FakeClient:
+            def __init__(self):
+                self.calls = 0
+
+            def request(self, method, path, data=None, headers=None):
+                self.calls += 1
+                if self.calls % 4 == 0:
+                    return 500, b"", "OperationalError: database is locked"
+                return 200, b"", None
+
+            def close(self):
+                pass
+
+        result = run(lambda number: FakeClient(), [1], users=2, requests_per_user=8, mix={"detail": 1})
+        self.assertEqual(result["total"]["requests"], 16)
+        self.assertEqual(result["errors"], {"database is locked": 4})
+        self.assertEqual(result["total"]["error_rate"], 0.25)
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile([1, 2, 3, 4], 99), 4)
+
+        stats = Stats()
+        stats.add("comment", 0.01, 429, None)
+        self.assertEqual((stats.rate_limited, stats.summary(1.0)["total"]["errors"]), (1, 0))
+        with self.assertRaises(CommandError):
+            call_command("loadtest", mix="browse=1,upload=2", stdout=StringIO())
+
+
+    def test_real_site_runs_skip_comments_unless_writes_are_allowed(self):
+        with mock.patch("festivals.management.commands.loadtest.run", return_value=Stats().summary(1.0)) as fake:
+            out = StringIO()
+            call_command("loadtest", use_current_db=True, requests=1, stdout=out)
+            self.assertNotIn("comment", fake.call_args.kwargs["mix"])
+            self.assertIn("댓글 시나리오를 제외합니다", out.getvalue())
+
+            err = StringIO()
+            call_command("loadtest", use_current_db=True, allow_writes=True, requests=1, stdout=StringIO(), stderr=err)
+            self.assertEqual(fake.call_args.kwargs["mix"]["comment"], DEFAULT_MIX["comment"])
+            self.assertIn("경고", err.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("loadtest", url="http://127.0.0.1:1", mix="comment=5", stdout=StringIO())
+
+class StaticExportTests(TestCase):
+    def export(self, *args):
+        out = StringIO()
+        call_command("export_static", *args, workers=1, stdout=out)
+        return out.getvalue()
+
+    def test_full_then_incremental_builds(self):
+        a = Festival.objects.create(title="정적 축제", location=Location.objects.create(name="광장"))
+        b = Festival.objects.create(title="사라질 축제")
+        views = view_counter.pending()
+        with TemporaryDirectory() as tmp, override_settings(FESTIVAL_STATIC_EXPORT_DIR=tmp):
+            root = Path(tmp)
+            self.assertIn("완료(전체): 페이지 3개 기록", self.export())
+            self.assertIn("정적 축제", (root / "index.html").read_text(encoding="utf-8"))
+            page = (root / f"festival/{a.pk}/index.html").read_text(encoding="utf-8")
+            self.assertIn("정적 축제", page)
+            self.assertNotIn('name="csrfmiddlewaretoken" value="', page.replace('value=""', ""))
+            self.assertEqual(view_counter.pending(), views)
+
+            Comment.objects.create(festival=a, nickname="방문객", content="미리 만든 페이지")
+            self.assertIn("변경 기록 1건 반영): 페이지 1개 기록", self.export())
+            self.assertIn("미리 만든 페이지", (root / f"festival/{a.pk}/index.html").read_text(encoding="utf-8"))
+
+            b_pk = b.pk
+            b.delete()
+            output = self.export()
+            self.assertIn("1개 삭제", output)
+            self.assertFalse((root / f"festival/{b_pk}/index.html").exists())
+            self.assertIn("완료(변경 기록 0건 반영): 페이지 0개 기록", self.export())
+
+    def test_outbox_consumer_keeps_pages_current(self):
+        festival = Festival.objects.create(title="정적 축제")
+        with TemporaryDirectory() as tmp, override_settings(FESTIVAL_STATIC_EXPORT_DIR=tmp):
+            call_command("consume_outbox", "static_pages", stdout=StringIO())  # nothing exported yet: no-op
+            self.assertFalse((Path(tmp) / "manifest.json").exists())
+            self.export()
+            festival.title = "이름 바뀐 축제"
+            festival.save()
+            with self.captureOnCommitCallbacks() as callbacks:
+                call_command("consume_outbox", "static_pages", stdout=StringIO())
+            # The cursor is saved before anything is rendered.
+            self.assertEqual(OutboxCursor.objects.get(name="static_pages").position, ChangeLog.objects.latest("pk").pk)
+            self.assertNotIn("이름 바뀐 축제", (Path(tmp) / "index.html").read_text(encoding="utf-8"))
+            for callback in callbacks:
+                callback()
+            self.assertIn("이름 바뀐 축제", (Path(tmp) / "index.html").read_text(encoding="utf-8"))
+            self.assertIn("변경 기록 0건", self.export())
+
+
+class ParallelCsvTests(TestCase):
+    LINES = [f'축제 {i},광장,2024-05-{i % 28 + 1:02d},,"첫 줄\n""둘째"" 줄 {i}",시청,,,,,,,,,,' for i in range(30)]
+
+    def test_byte_ranges_end_on_record_boundaries(self):
+        with TemporaryDirectory() as tmp:
+            path = write_csv(tmp, self.LINES)
+            fieldnames, start = read_header(path)
+            ranges = record_ranges(path, start, chunk_bytes=100)
+            self.assertGreater(len(ranges), 5)
+            records = [r for a, b in ranges for r in parse_range(path, fieldnames, a, b)[1]]
+            with open(path, encoding="utf-8-sig") as f:
+                self.assertEqual(records, normalize_rows(list(csv.DictReader(f))))
+        self.assertEqual(records[3]["defaults"]["description"], '첫 줄\n"둘째" 줄 3')
+
+    def test_workers_load_in_file_order(self):
+        with TemporaryDirectory() as tmp, mock.patch("festivals.csv_parallel.CHUNK_BYTES", 300):
+            path = write_csv(tmp, self.LINES + ["축제 0,광장,2024-05-01,,덮어쓴 설명,시청,,,,,,,,,,"])
+            out = StringIO()
+            call_command("load_festivals_from_csv", path=str(path), workers=2, batch_size=7, stdout=out)
+        self.assertIn("완료: 30개 생성, 1개 업데이트", out.getvalue())
+        self.assertEqual(Festival.objects.get(title="축제 0").description, "덮어쓴 설명")  # the later row wins
+        self.assertEqual(IngestRun.objects.get().last_offset, 31)
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN QUERY PLAN of the hot read paths: no full table scans and no temp B-tree sorts."""
+
+    # Location/organizer facet filters select their festivals through an index and
+    # then sort that subset; every other hot query reads in index order. Matched
+    # against each query's SQL, so only the filtered query itself may sort.
+    SORTED_SUBSETS = ('"festivals_location"."sido" = ', '"festivals_organization"."name" = ')
+    # Substring search (title LIKE '%q%') cannot seek any index, so its queries walk
+    # the whole active-list index and test every row. That is the one accepted full
+    # walk; other walks must be ordered reads stopped early by a LIMIT.
+    FULL_WALKS = ('"festivals_festival"."title" LIKE \'%',)
+    # The paginated lists print "page n / N", so their COUNT(*) has to visit every
+    # row; it walks the smallest index (the partial active-list index for festivals).
+    COUNTED_PAGES = ("festival_list", "festival_archive")
+
+    @classmethod
+    def setUpTestData(cls):
+        apply_plan(plan_reconcile([r for r in normalize_rows(synthetic_rows(300)) if r is not None]))
+        cls.festival = Festival.objects.filter(is_active=True).first()
+        Comment.objects.bulk_create([Comment(festival=cls.festival, nickname="방문객", content=f"댓글 {i}") for i in range(20)])
+
+    def plan(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexed(self, sql, params=(), sort_allowed=False, walk_allowed=False):
+        details = self.plan(sql, params)
+        # "SCAN t USING INDEX i" reads every entry of i unless a LIMIT stops the ordered walk.
+        limited = re.search(r"\bORDER BY\b.*\bLIMIT\b", sql, re.S) is not None
+        scans = [
+            d
+            for d in details
+            if d.startswith("SCAN ") and d != "SCAN CONSTANT ROW" and not (" USING " in d and (limited or walk_allowed))
+        ]
+        sorts = [] if sort_allowed else [d for d in details if "TEMP B-TREE" in d]
+        self.assertFalse(scans or sorts, f"{details}\n{sql}")
+
+    def test_hot_views_use_indexes(self):
+        organizer = FestivalOrganization.objects.filter(role=FestivalOrganization.Role.ORGANIZER).first()
+        urls = [
+            reverse("festival_list"),
+            reverse("festival_list") + "?page=3",
+            reverse("festival_list") + "?month=2024-05",
+            reverse("festival_list") + "?status=upcoming",
+            reverse("festival_list") + "?sido=서울특별시",
+            reverse("festival_list") + f"?organizer={organizer.organization.name}",
+            reverse("festival_list") + "?q=벚꽃",
+            reverse("festival_popular"),
+            reverse("festival_popular") + "?sort=views",
+            reverse("festival_detail", args=[self.festival.pk]),
+            reverse("festival_archive"),
+            reverse("map_clusters") + "?bbox=126,37,127,38&zoom=8",
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                selects = [q["sql"] for q in queries if q["sql"].startswith("SELECT")]
+                self.assertTrue(selects)
+                counted = resolve(url.partition("?")[0]).url_name in self.COUNTED_PAGES
+                for sql in selects:
+                    self.assertIndexed(
+                        sql,
+                        sort_allowed=any(predicate in sql for predicate in self.SORTED_SUBSETS),
+                        walk_allowed=any(predicate in sql for predicate in self.FULL_WALKS)
+                        or (counted and sql.startswith('SELECT COUNT(*) AS "__count"')),
+                    )
+
+    def test_hot_querysets_use_indexes(self):
+        organizer = FestivalOrganization.objects.first()
+        querysets = [
+            FestivalOrganization.objects.filter(festival_id__in=[1, 2, 3], role__in=["organizer", "host"]),
+            FestivalOrganization.objects.filter(organization_id=organizer.organization_id, role=organizer.role),
+            self.festival.comments.all(),
+            ChangeLog.objects.filter(pk__gt=10).order_by("pk")[:500],
+            Festival.objects.filter(is_active=True).order_by("start_date", "title")[24:36],
+        ]
+        for queryset in querysets:
+            self.assertIndexed(*queryset.query.sql_with_params())
+
+
+    def test_sitemap_fingerprints_and_pages_read_only_covering_indexes(self):
+        with CaptureQueriesContext(connection) as queries:
+            sitemaps.fingerprint()
+            sitemaps.fingerprint(1)
+            list(sitemaps.entries(1))
+        for query in queries:
+            for detail in self.plan(query["sql"]):
+                self.assertIn("COVERING INDEX", detail, query["sql"])
+
+class ImportJobTests(TestCase):
+    LINES = [f"가져오기 축제 {i},광장,2024-06-{i + 1:02d},,,시청,,,,,,,,,," for i in range(5)]
+
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(FESTIVAL_IMPORT_UPLOAD_DIR=self.tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self):
+        content = write_csv(self.tmp.name, self.LINES, name="upload.csv").read_bytes()
+        return SimpleUploadedFile("festivals.csv", content, content_type="text/csv")
+
+    def test_staff_upload_is_queued_and_run_by_worker(self):
+        self.client.force_login(User.objects.create_user(username="staff", password="pw", is_staff=True))
+        response = self.client.post(reverse("import_jobs"), {"source": "csv", "csv_file": self.upload()})
+        self.assertRedirects(response, reverse("import_jobs"))
+        job = ImportJob.objects.get()
+        self.assertEqual((job.status, job.options), (ImportJob.Status.QUEUED, {"reconcile": False}))
+        self.assertFalse(Festival.objects.exists())  # nothing is imported inside the request
+
+        call_command("run_import_jobs", stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.COMPLETED)
+        self.assertEqual((job.progress, job.total, job.percent), (5, 5, 100))
+        self.assertIn("완료: 5개 생성", job.output)
+        self.assertEqual(Festival.objects.count(), 5)
+        self.assertFalse(Path(job.upload_path).exists())
+        self.assertContains(self.client.get(reverse("import_jobs")), "완료")
+
+        self.client.logout()
+        self.assertEqual(self.client.post(reverse("import_jobs"), {"source": "api"}).status_code, 302)
+        self.assertEqual(ImportJob.objects.count(), 1)  # anonymous users are sent to the login page
+
+    def test_cancel_stops_running_job_after_committed_batch(self):
+        path = write_csv(self.tmp.name, self.LINES)
+        job = enqueue(IngestRun.Source.CSV, {"batch_size": 2}, str(path))
+        job = claim()
+        ImportJob.objects.filter(pk=job.pk).update(cancel_requested=True)
+        job = run_job(job)
+        self.assertEqual(job.status, ImportJob.Status.CANCELLED)
+        self.assertEqual((job.progress, Festival.objects.count()), (2, 2))
+
+    def test_one_running_job_per_source(self):
+        first = enqueue(IngestRun.Source.CSV, upload_path="a.csv")
+        second = enqueue(IngestRun.Source.CSV, upload_path="b.csv")
+        api = enqueue(IngestRun.Source.API)
+        self.assertEqual(claim().pk, first.pk)
+        self.assertEqual(claim().pk, api.pk)  # the second CSV job waits for the first
+        self.assertIsNone(claim())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ImportJob.objects.filter(pk=second.pk).update(status=ImportJob.Status.RUNNING)
+
+        self.client.force_login(User.objects.create_user(username="staff", password="pw", is_staff=True))
+        self.client.post(reverse("import_job_cancel", args=[second.pk]))
+        self.client.post(reverse("import_job_cancel", args=[first.pk]))
+        second.refresh_from_db()
+        first.refresh_from_db()
+        self.assertEqual(second.status, ImportJob.Status.CANCELLED)
+        self.assertEqual((first.status, first.cancel_requested), (ImportJob.Status.RUNNING, True))
+
+    def test_uploads_are_removed_on_cancel_and_after_retention(self):
+        queued = enqueue(IngestRun.Source.CSV, upload_path=store_upload(self.upload()))
+        self.assertTrue(cancel(queued))
+        self.assertFalse(Path(queued.upload_path).exists())
+
+        failed = Path(store_upload(self.upload()))
+        waiting = enqueue(IngestRun.Source.CSV, upload_path=store_upload(self.upload()))
+        old = time.time() - 8 * 86400
+        for path in (failed, Path(waiting.upload_path)):
+            os.utime(path, (old, old))
+        self.assertEqual(sweep_uploads(), 1)
+        self.assertFalse(failed.exists())
+        self.assertTrue(Path(waiting.upload_path).exists())  # still queued
+
+
+@override_settings(FESTIVAL_SITEMAP_SIZE=10)
+class SitemapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for pk in (3, 7, 12, 25):
+            Festival.objects.create(pk=pk, title=f"축제 {pk}")
+        Festival.objects.create(pk=8, title="병합된 축제", merged_into_id=3, is_active=False)
+        now = timezone.now()
+        ArchivedFestival.objects.create(pk=15, external_id="옛축제", title="옛 축제", created_at=now, updated_at=now)
+
+    def test_index_and_id_range_children(self):
+        index = self.client.get(reverse("sitemap_index")).content.decode()
+        self.assertEqual(re.findall(r"sitemap-(\d+)\.xml", index), ["1", "2", "3"])
+        first = b"".join(self.client.get(reverse("sitemap_section", args=[1])).streaming_content).decode()
+        self.assertEqual(re.findall(r"/festival/(\d+)/", first), ["3", "7"])  # the merged festival 8 is left out
+        self.assertIn(f"<lastmod>{timezone.now().date().isoformat()}</lastmod>", first)
+        second = b"".join(self.client.get(reverse("sitemap_section", args=[2])).streaming_content).decode()
+        self.assertEqual(re.findall(r"/festival/(\d+)/", second), ["12", "15"])  # archived pages stay crawlable
+        self.assertEqual(self.client.get(reverse("sitemap_section", args=[4])).status_code, 404)
+
+    def test_child_is_cached_until_its_range_changes(self):
+        def fetch(section):
+            return b"".join(self.client.get(reverse("sitemap_section", args=[section])).streaming_content)
+
+        first, second = fetch(1), fetch(2)
+        with self.assertNumQueries(2):  # the range fingerprint only
+            self.assertEqual(fetch(1), first)
+        Festival.objects.filter(pk=7).update(updated_at=timezone.now() + timedelta(days=3))
+        with self.assertNumQueries(2):
+            self.assertEqual(fetch(2), second)
+        self.assertNotEqual(fetch(1), first)
+        Festival.objects.get(pk=12).delete()
+        self.assertNotIn(b"/festival/12/", fetch(2))
+
+    def test_index_is_cached_until_a_festival_changes(self):
+        index = self.client.get(reverse("sitemap_index")).content
+        with self.assertNumQueries(2):  # the whole-table fingerprint only
+            self.assertEqual(self.client.get(reverse("sitemap_index")).content, index)
+        Festival.objects.create(pk=31, title="새 축제")
+        self.assertIn(b"sitemap-4.xml", self.client.get(reverse("sitemap_index")).content)
+
+
+class TemplateRenderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        apply_plan(plan_reconcile([r for r in normalize_rows(synthetic_rows(40)) if r is not None]))
+        cls.festival = Festival.objects.filter(is_active=True, location__isnull=False).first()
+        Comment.objects.create(festival=cls.festival, nickname="방문객", content="첫 줄\n<b>둘째</b> 줄")
+        other = Festival.objects.exclude(pk=cls.festival.pk).first()
+        RelatedFestival.objects.create(festival=cls.festival, related=other, rank=1, score=0.5)
+
+    def test_detail_template_runs_no_queries(self):
+        festival = detail_queryset().get(pk=self.festival.pk)
+        context = detail_context(festival, CommentForm())
+        with CaptureQueriesContext(connection) as queries:
+            html = get_template("festivals/festival_detail.html").render(context)
+        self.assertEqual(len(queries), 0)
+        self.assertIn(f"주최: {self.festival.organizer}", html)
+
+    def test_jinja2_pages_match_django(self):
+        sido = FacetCount.objects.filter(facet="sido").values_list("value", flat=True).first()
+        urls = [
+            reverse("festival_list"),
+            reverse("festival_list") + "?page=2&q=축제",
+            reverse("festival_list") + f"?sido={sido}",
+            reverse("festival_detail", args=[self.festival.pk]),
+        ]
+        expected = [self.client.get(url).content for url in urls]
+        with override_settings(TEMPLATES=[settings.FESTIVAL_JINJA2_TEMPLATES, *settings.TEMPLATES]):
+            self.assertEqual(get_template("festivals/festival_list.html").backend.name, "jinja2")
+            self.assertEqual(get_template("festivals/festival_archive.html").backend.name, "django")
+            for url, html in zip(urls, expected):
+                self.assertEqual(self.client.get(url).content.decode(), html.decode(), url)
+
+
+@override_settings(FESTIVAL_COMMENT_FLUSH_INTERVAL=0, CACHES=TEST_CACHES)
+class PublicCacheTests(TestCase):
+    def setUp(self):
+        caches[settings.FESTIVAL_RATE_LIMIT_CACHE].clear()
+        self.festival = Festival.objects.create(title="캐시 축제", location=Location.objects.create(name="부평"))
+
+    def test_anonymous_pages_are_shared_cacheable(self):
+        for url, key in (
+            (reverse("festival_list"), "festival-list"),
+            (reverse("festival_detail", args=[self.festival.pk]), f"festival-{self.festival.pk}"),
+        ):
+            resp = self.client.get(url)
+            self.assertEqual(resp.cookies, {})
+            self.assertNotIn("Cookie", resp.get("Vary", ""))
+            self.assertIn("s-maxage=300", resp["Cache-Control"])
+            self.assertIn("public", resp["Cache-Control"])
+            self.assertIn(key, resp["Surrogate-Key"].split())
+        self.assertContains(resp, 'name="csrfmiddlewaretoken" value=""')
+
+    def test_csrf_endpoint_supplies_comment_token(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        token = client.get(reverse("csrf_token")).json()["token"]
+        url = reverse("festival_detail", args=[self.festival.pk])
+        resp = client.post(url, {"nickname": "익명", "content": "좋아요", "csrfmiddlewaretoken": token})
+        self.assertRedirects(resp, f"{url}?commented=1#comments", fetch_redirect_response=False)
+        self.assertNotIn("sessionid", resp.cookies)
+
+    def test_logged_in_pages_stay_private(self):
+        User.objects.create_user(username="staff", password="pw", is_staff=True)
+        self.client.login(username="staff", password="pw")
+        resp = self.client.get(reverse("festival_detail", args=[self.festival.pk]))
+        self.assertIn("private", resp["Cache-Control"])
+        self.assertNotIn("Surrogate-Key", resp)
+        self.assertContains(resp, "수정")
+
+
+class SurrogatePurgeTests(TestCase):
+    @override_settings(FESTIVAL_PURGE_URL="http://cache.local/purge")
+    def test_writes_purge_surrogate_keys_once_after_commit(self):
+        with mock.patch("festivals.edge_cache.requests.request") as purge:
+            with self.captureOnCommitCallbacks(execute=True):
+                festival = Festival.objects.create(title="캐시 축제")
+                Comment.objects.create(festival=festival, nickname="a", content="b")
+                festival.title = "바뀐 축제"
+                festival.save()
+            self.assertEqual(purge.call_count, 1)
+        keys = purge.call_args.kwargs["headers"]["Surrogate-Key"].split()
+        self.assertEqual(sorted(keys), [f"festival-{festival.pk}", "festival-list"])
+
+
+@override_settings(FESTIVAL_COMMENT_FLUSH_INTERVAL=0, CACHES=TEST_CACHES)
 class CommentFlowTests(TestCase):
     def setUp(self):
+        cache.clear()
+        caches[settings.FESTIVAL_RATE_LIMIT_CACHE].clear()
         loc = Location.objects.create(name="인천")
         self.festival = Festival.objects.create(external_id="fest-1", title="벚꽃 축제", location=loc)
 
@@ -103,6 +1379,131 @@ class CommentFlowTests(TestCase):
         self.assertEqual(Comment.objects.count(), 0)
 
 
+@override_settings(FESTIVAL_COMMENT_FLUSH_INTERVAL=60, FESTIVAL_COMMENT_RATE=(2, 60), CACHES=TEST_CACHES)
+class CommentPipelineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches[settings.FESTIVAL_RATE_LIMIT_CACHE].clear()
+        self.festival = Festival.objects.create(title="댓글 축제")
+        self.url = reverse("festival_detail", args=[self.festival.pk])
+        worker = mock.patch.object(comment_buffer, "_ensure_worker")
+        worker.start()
+        self.addCleanup(worker.stop)
+        self.addCleanup(comment_buffer.discard)
+
+    def test_token_bucket_refills(self):
+        bucket = TokenBucket("test", capacity=2, period=10)
+        self.assertEqual([bucket.take("a", now=100) for _ in range(3)], [True, True, False])
+        self.assertTrue(bucket.take("b", now=100))
+        self.assertTrue(bucket.take("a", now=105))
+        self.assertFalse(bucket.take("a", now=105))
+
+    def test_queued_comment_is_visible_then_bulk_written(self):
+        resp = self.client.post(self.url, {"nickname": "홍길동", "content": "대기 중 댓글"})
+        self.assertEqual(resp.status_code, 302)
+        self.assertFalse(Comment.objects.exists())
+        self.assertContains(self.client.get(self.url), "대기 중 댓글")
+        self.client.post(self.url, {"nickname": "임꺽정", "content": "두 번째"})
+        with self.assertNumQueries(4):  # savepoint, INSERT, change log INSERT, release
+            self.assertEqual(comment_buffer.flush(), 2)
+        self.assertEqual(Comment.objects.filter(festival=self.festival).count(), 2)
+        self.assertEqual(comment_buffer.pending_for(self.festival.pk), [])
+
+    def test_rate_limit_per_ip_and_nickname(self):
+        for nickname in ("하나", "둘째"):
+            self.assertEqual(self.client.post(self.url, {"nickname": nickname, "content": "x"}).status_code, 302)
+        resp = self.client.post(self.url, {"nickname": "셋째", "content": "x"})
+        self.assertEqual(resp.status_code, 429)
+        other_ip = {"REMOTE_ADDR": "10.0.0.9"}
+        self.assertEqual(self.client.post(self.url, {"nickname": "하나", "content": "x"}, **other_ip).status_code, 302)
+        self.assertEqual(self.client.post(self.url, {"nickname": "하나", "content": "x"}, **other_ip).status_code, 429)
+        self.assertEqual(comment_buffer.pending(), 3)
+
+    @override_settings(FESTIVAL_TRUSTED_PROXY_HOPS=1)
+    def test_client_ip_ignores_client_supplied_forwarded_entries(self):
+        for forwarded in ("9.9.9.9", "1.2.3.4, 9.9.9.9", "5.6.7.8, 9.9.9.9"):
+            request = RequestFactory().get("/", HTTP_X_FORWARDED_FOR=forwarded, REMOTE_ADDR="127.0.0.1")
+            self.assertEqual(client_ip(request), "9.9.9.9")
+        self.assertEqual(client_ip(RequestFactory().get("/", REMOTE_ADDR="10.0.0.9")), "10.0.0.9")
+
+
+@override_settings(FESTIVAL_LIVE_POLL_INTERVAL=0.01, CACHES=TEST_CACHES)
+class LiveCommentTests(TestCase):
+    async def test_hub_fetches_once_for_all_listeners(self):
+        festival = await Festival.objects.acreate(title="라이브 축제")
+        other = await Festival.objects.acreate(title="다른 축제")
+        local_hub = CommentHub()
+        queues = [local_hub.subscribe(festival.pk) for _ in range(3)]
+        other_queue = local_hub.subscribe(other.pk)
+        local_hub._task.cancel()
+        await local_hub.poll_once()
+        await Comment.objects.acreate(festival=festival, nickname="aa", content="하나")
+        await Comment.objects.acreate(festival=other, nickname="bb", content="둘")
+        with mock.patch.object(local_hub, "_fetch", wraps=local_hub._fetch) as fetch:
+            self.assertEqual(await local_hub.poll_once(), 4)
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual([q.get_nowait()["content"] for q in queues], ["하나"] * 3)
+        self.assertEqual(other_queue.get_nowait()["content"], "둘")
+
+    async def test_stream_over_asgi(self):
+        from config.asgi import application
+
+        festival = await Festival.objects.acreate(title="라이브 축제")
+        first = await Comment.objects.acreate(festival=festival, nickname="aa", content="놓친 댓글")
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        await inbox.put({"type": "http.request", "body": b"", "more_body": False})
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": stream_url(festival.pk),
+            "query_string": f"after={first.pk - 1}".encode(),
+            "headers": [],
+        }
+        task = asyncio.ensure_future(application(scope, inbox.get, outbox.put))
+        start = await asyncio.wait_for(outbox.get(), 2)
+        self.assertEqual(start["status"], 200)
+        self.assertEqual((await asyncio.wait_for(outbox.get(), 2))["body"], b": connected\n\n")
+        self.assertIn("놓친 댓글", (await asyncio.wait_for(outbox.get(), 2))["body"].decode())
+        while hub._cursor is None:
+            await asyncio.sleep(0.01)
+        second = await Comment.objects.acreate(festival=festival, nickname="bb", content="새 댓글")
+        body = (await asyncio.wait_for(outbox.get(), 2))["body"].decode()
+        self.assertTrue(body.startswith(f"id: {second.pk}\nevent: comment\n"))
+        self.assertIn("새 댓글", body)
+        await inbox.put({"type": "http.disconnect"})
+        await asyncio.wait_for(task, 2)
+        await asyncio.wait_for(hub._task, 2)
+        self.assertEqual(hub.listeners(), 0)
+
+    async def test_unknown_festival_is_404(self):
+        from config.asgi import application
+
+        sent = []
+        scope = {"type": "http", "method": "GET", "path": stream_url(999999), "query_string": b"", "headers": []}
+        await application(scope, None, lambda message: asyncio.sleep(0, sent.append(message)))
+        self.assertEqual(sent[0]["status"], 404)
+
+    def test_detail_page_loads_stream_only_when_enabled(self):
+        cache.clear()
+        caches[settings.FESTIVAL_RATE_LIMIT_CACHE].clear()
+        festival = Festival.objects.create(title="라이브 축제")
+        url = reverse("festival_detail", args=[festival.pk])
+        with mock.patch.object(comment_buffer, "_ensure_worker"):
+            self.addCleanup(comment_buffer.discard)
+            self.client.post(url, {"nickname": "홍길동", "content": "대기 중\r\n댓글"})
+        with override_settings(FESTIVAL_LIVE_COMMENTS=False):
+            resp = self.client.get(url)
+        self.assertNotContains(resp, "data-stream-url")
+        self.assertNotContains(resp, "live-comments.js")
+        cache.clear()
+        with override_settings(FESTIVAL_LIVE_COMMENTS=True):
+            resp = self.client.get(url)
+        self.assertContains(resp, f'data-stream-url="{stream_url(festival.pk)}" data-last-id="0"')
+        self.assertContains(resp, "live-comments.js")
+        # The queued comment has no id yet; the script matches it to the streamed row by these.
+        self.assertContains(resp, 'data-pending-nickname="홍길동" data-pending-content="대기 중\r\n댓글"')
+
+
 class StaffAccessTests(TestCase):
     def setUp(self):
         self.staff = User.objects.create_user(username="staff", password="pw", is_staff=True)
@@ -121,3 +1522,9 @@ class StaffAccessTests(TestCase):
         )
         self.assertEqual(resp.status_code, 200)
         self.assertTrue(Festival.objects.filter(title="새 축제").exists())
+
+
+def tearDownModule():
+    # Views and comments buffered by request tests must not be flushed into the real database at exit.
+    view_counter.discard()
+    comment_buffer.discard()
@@ -4,8 +4,17 @@ from . import views
 
 urlpatterns = [
     path("", views.festival_list, name="festival_list"),
+    path("popular/", views.festival_popular, name="festival_popular"),
+    path("archive/", views.festival_archive, name="festival_archive"),
     path("festival/<int:pk>/", views.festival_detail, name="festival_detail"),
+    path("map/clusters/", views.map_clusters, name="map_clusters"),
+    path("sitemap.xml", views.sitemap_index, name="sitemap_index"),
+    path("sitemap-<int:section>.xml", views.sitemap_section, name="sitemap_section"),
+    path("csrf/", views.csrf_token, name="csrf_token"),
+    path("metrics", views.metrics, name="metrics"),
     path("festival/new/", views.festival_create, name="festival_create"),
     path("festival/<int:pk>/edit/", views.festival_update, name="festival_update"),
     path("festival/<int:pk>/delete/", views.festival_delete, name="festival_delete"),
+    path("imports/", views.import_jobs, name="import_jobs"),
+    path("imports/<int:pk>/cancel/", views.import_job_cancel, name="import_job_cancel"),
 ]
@@ -1,65 +1,209 @@
+import hmac
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.views.decorators.cache import never_cache
+
+from .cards import card_rows, to_cards
+from .comments import comment_allowed, comment_buffer
+from .edge_cache import DETAIL_KEY, LIST_KEY, festival_key, public_cache
+from .facets import apply_facet_filters, facet_counts
+from .forms import CommentForm, FestivalForm, ImportJobForm
+from .jobs import cancel, enqueue, store_upload
+from .live import stream_url
+from .maptiles import clusters_in
+from .metrics import CONTENT_TYPE, registry
+from .models import ArchivedFestival, Festival, FestivalOrganization, ImportJob
+from .popularity import view_counter
+from .sitemaps import cached_index, cached_section
 
-from .forms import CommentForm, FestivalForm
-from .models import Festival
+POPULAR_LIMIT = 24
 
 
+@public_cache(lambda request: [LIST_KEY])
 def festival_list(request):
+    return render(request, "festivals/festival_list.html", list_context(request))
+
+
+def list_context(request) -> dict:
+    """Everything the list template reads, fully loaded (``benchmark render`` reuses it)."""
     query = request.GET.get("q", "").strip()
 
-    festivals = Festival.objects.all().order_by("start_date", "title")
+    festivals = Festival.objects.filter(is_active=True).order_by("start_date", "title")
     if query:
         festivals = festivals.filter(title__icontains=query)
+    festivals, selected = apply_facet_filters(festivals, request.GET)
 
-    paginator = Paginator(festivals, 12)
+    paginator = Paginator(card_rows(festivals), 12)
+    # Counting the card rows would join every festival's location; the bare queryset doesn't.
+    paginator.count = festivals.count()
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = to_cards(page_obj.object_list)
 
-    context = {
+    return {
         "page_obj": page_obj,
         "query": query,
+        "selected": selected,
+        "facets": facet_counts(selected["sido"]),
     }
-    return render(request, "festivals/festival_list.html", context)
 
 
+@public_cache(lambda request: [LIST_KEY])
+def festival_popular(request):
+    sort = "views" if request.GET.get("sort") == "views" else "trending"
+    column = "view_count" if sort == "views" else "popularity"
+    festivals = Festival.objects.filter(is_active=True, **{f"{column}__gt": 0}).order_by(f"-{column}")
+    festivals = to_cards(card_rows(festivals)[:POPULAR_LIMIT])
+    return render(request, "festivals/festival_popular.html", {"festivals": festivals, "sort": sort})
+
+
+@public_cache(lambda request: [LIST_KEY])
+def festival_archive(request):
+    query = request.GET.get("q", "").strip()
+    festivals = ArchivedFestival.objects.defer("description", "extra_info")
+    if query:
+        festivals = festivals.filter(title__icontains=query)
+    page_obj = Paginator(festivals, 12).get_page(request.GET.get("page"))
+    return render(request, "festivals/festival_archive.html", {"page_obj": page_obj, "query": query})
+
+
+def _archived_detail(request, pk: int):
+    archived = get_object_or_404(ArchivedFestival, pk=pk)
+    return render(
+        request,
+        "festivals/archived_detail.html",
+        {"festival": archived, "comments": archived.comments.all()},
+    )
+
+
+@public_cache(lambda request, pk: [festival_key(pk), DETAIL_KEY])
 def festival_detail(request, pk: int):
-    festival = get_object_or_404(Festival, pk=pk)
-    comments = festival.comments.all()
+    festival = detail_queryset().filter(pk=pk).first()
+    if festival is None:
+        # Ids are never reused, so a missing festival may have been moved to the archive.
+        return _archived_detail(request, pk)
+    if festival.merged_into_id:
+        return redirect("festival_detail", pk=festival.merged_into_id, permanent=True)
+    status = 200
+    if request.method == "GET" and not getattr(request, "prerender", False):
+        view_counter.record(festival.pk)
 
     if request.method == "POST":
         form = CommentForm(request.POST)
-        if form.is_valid():
+        if form.is_valid() and not comment_allowed(request, form.cleaned_data["nickname"]):
+            form.add_error(None, "댓글을 너무 자주 등록하고 있습니다. 잠시 후 다시 시도해 주세요.")
+            status = 429
+        elif form.is_valid():
             comment = form.save(commit=False)
             comment.festival = festival
-            comment.save()
+            comment_buffer.submit(comment)
+            url = reverse("festival_detail", args=[festival.id])
+            if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+                # Keep anonymous visitors session-free; the page shows the notice itself.
+                return redirect(f"{url}?commented=1#comments")
             messages.success(request, "댓글이 등록되었습니다.")
-            return redirect(f"{reverse('festival_detail', args=[festival.id])}#comments")
-        messages.error(request, "입력값을 확인해주세요.")
+            return redirect(f"{url}#comments")
+        if status == 200 and settings.SESSION_COOKIE_NAME in request.COOKIES:
+            messages.error(request, "입력값을 확인해주세요.")
     else:
         form = CommentForm()
 
-    return render(
-        request,
-        "festivals/festival_detail.html",
-        {"festival": festival, "comments": comments, "form": form},
+    return render(request, "festivals/festival_detail.html", detail_context(festival, form), status=status)
+
+
+def detail_queryset():
+    """Festivals with location and roles loaded up front, so the template runs no queries."""
+    roles = FestivalOrganization.objects.select_related("organization")
+    return Festival.objects.select_related("location").prefetch_related(Prefetch("organizations", queryset=roles))
+
+
+def detail_context(festival: Festival, form) -> dict:
+    comments = comment_buffer.pending_for(festival.pk) + list(festival.comments.all())
+    related = to_cards(
+        card_rows(Festival.objects.filter(related_from__festival=festival, is_active=True).order_by("related_from__rank"))
     )
+    return {
+        "festival": festival,
+        "comments": comments,
+        "related": related,
+        "form": form,
+        # Only ASGI deployments route the stream; elsewhere the page gets no script to 404 on.
+        "stream_url": stream_url(festival.pk) if getattr(settings, "FESTIVAL_LIVE_COMMENTS", False) else "",
+        "last_comment_id": max((c.pk for c in comments if c.pk), default=0),
+    }
+
+
+@public_cache(lambda request: [LIST_KEY])
+def map_clusters(request):
+    """Precomputed clusters for ``?bbox=west,south,east,north&zoom=N`` (one indexed query)."""
+    try:
+        west, south, east, north = (float(value) for value in request.GET.get("bbox", "").split(","))
+        zoom, clusters = clusters_in(west, south, east, north, int(request.GET.get("zoom", "")))
+    except ValueError as exc:
+        return JsonResponse({"error": f"bbox=서,남,동,북 좌표와 zoom이 필요합니다 ({exc})"}, status=400)
+    return JsonResponse({"zoom": zoom, "clusters": clusters})
+
+
+@public_cache(lambda request: [LIST_KEY])
+def sitemap_index(request):
+    base_url = request.build_absolute_uri("/").rstrip("/")
+    return HttpResponse(cached_index(base_url), content_type="application/xml")
+
+
+@public_cache(lambda request, section: [LIST_KEY])
+def sitemap_section(request, section: int):
+    """One id range of detail pages; streamed while rendered, then served from the cache."""
+    chunks = cached_section(section, request.build_absolute_uri("/").rstrip("/")) if section > 0 else None
+    if chunks is None:
+        raise Http404
+    return StreamingHttpResponse(chunks, content_type="application/xml")
+
+
+@never_cache
+def csrf_token(request):
+    """Token for the comment form on shared-cache pages, which are rendered without one."""
+    return JsonResponse({"token": get_token(request)})
+
+
+@never_cache
+def metrics(request):
+    """Prometheus scrape target; open to staff, the bearer token and FESTIVAL_METRICS_SCRAPER_IPS."""
+    if not (_is_scraper(request) or _is_staff(request.user)):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.exposition(), content_type=CONTENT_TYPE)
 
 
 def _is_staff(user):
     return user.is_authenticated and user.is_staff
 
 
+def _is_scraper(request):
+    # The socket address only: forwarded headers are client-controlled, and behind a
+    # local proxy every request comes from 127.0.0.1.
+    if request.META.get("REMOTE_ADDR") in getattr(settings, "FESTIVAL_METRICS_SCRAPER_IPS", ()):
+        return True
+    token = getattr(settings, "FESTIVAL_METRICS_TOKEN", "")
+    scheme, _, credentials = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip().encode(), token.encode())
+
+
 @login_required
 @user_passes_test(_is_staff)
 def festival_create(request):
     if request.method == "POST":
         form = FestivalForm(request.POST)
         if form.is_valid():
-            festival = form.save()
+            with transaction.atomic():  # the save and its change log commit together
+                festival = form.save()
             messages.success(request, "축제가 생성되었습니다.")
             return redirect("festival_detail", pk=festival.pk)
     else:
@@ -74,7 +218,8 @@ def festival_update(request, pk: int):
     if request.method == "POST":
         form = FestivalForm(request.POST, instance=festival)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                form.save()
             messages.success(request, "축제 정보가 수정되었습니다.")
             return redirect("festival_detail", pk=festival.pk)
     else:
@@ -87,7 +232,39 @@ def festival_update(request, pk: int):
 def festival_delete(request, pk: int):
     festival = get_object_or_404(Festival, pk=pk)
     if request.method == "POST":
-        festival.delete()
+        with transaction.atomic():
+            festival.delete()
         messages.success(request, "축제가 삭제되었습니다.")
         return redirect("festival_list")
     return render(request, "festivals/festival_confirm_delete.html", {"festival": festival})
+
+
+@login_required
+@user_passes_test(_is_staff)
+def import_jobs(request):
+    """Queue a CSV upload or an API fetch for the ``run_import_jobs`` worker and list recent jobs."""
+    if request.method == "POST":
+        form = ImportJobForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data.get("csv_file")
+            upload_path = store_upload(upload) if upload else ""
+            job = enqueue(form.cleaned_data["source"], form.job_options(), upload_path, request.user)
+            messages.success(request, f"가져오기 작업 #{job.pk}을(를) 대기열에 추가했습니다.")
+            return redirect("import_jobs")
+    else:
+        form = ImportJobForm()
+    jobs = ImportJob.objects.select_related("requested_by")[:30]
+    active = any(job.status in (ImportJob.Status.QUEUED, ImportJob.Status.RUNNING) for job in jobs)
+    return render(request, "festivals/import_jobs.html", {"form": form, "jobs": jobs, "active": active})
+
+
+@login_required
+@user_passes_test(_is_staff)
+def import_job_cancel(request, pk: int):
+    job = get_object_or_404(ImportJob, pk=pk)
+    if request.method == "POST":
+        if cancel(job):
+            messages.success(request, f"작업 #{job.pk} 취소를 요청했습니다.")
+        else:
+            messages.error(request, f"작업 #{job.pk}은(는) 이미 끝났습니다.")
+    return redirect("import_jobs")
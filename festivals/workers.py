@@ -0,0 +1,19 @@
+"""Process pools for CPU-bound work (static page rendering, CSV parsing).
+
+Workers are spawned rather than forked so each opens its own database
+connection instead of sharing the parent's. A spawned worker imports the module
+of its task function to unpickle it, so such modules must not import models at
+module level; ``init_worker`` sets Django up before the first task runs.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def init_worker():
+    import django
+
+    django.setup()
+
+
+def spawn_pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"), initializer=init_worker)
@@ -0,0 +1,35 @@
+// Cached anonymous pages carry no CSRF token; fetch one just before the form is used.
+(function () {
+    function cookieToken() {
+        var match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+        return match ? decodeURIComponent(match[1]) : "";
+    }
+
+    document.querySelectorAll("input[data-csrf-url]").forEach(function (input) {
+        var form = input.form;
+        var pending = null;
+
+        function ensureToken() {
+            if (input.value) {
+                return Promise.resolve();
+            }
+            input.value = cookieToken();
+            if (input.value) {
+                return Promise.resolve();
+            }
+            pending = pending || fetch(input.dataset.csrfUrl, { credentials: "same-origin" })
+                .then(function (response) { return response.json(); })
+                .then(function (data) { input.value = data.token; });
+            return pending;
+        }
+
+        form.addEventListener("focusin", ensureToken, { once: true });
+        form.addEventListener("submit", function (event) {
+            if (input.value) {
+                return;
+            }
+            event.preventDefault();
+            ensureToken().then(function () { form.submit(); });
+        });
+    });
+})();
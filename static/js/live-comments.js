@@ -0,0 +1,47 @@
+// Appends comments pushed over the festival's SSE stream (ASGI deployments only).
+(function () {
+    var section = document.getElementById("comments");
+    if (!section || !window.EventSource) {
+        return;
+    }
+    var list = document.getElementById("comment-list");
+    var url = section.dataset.streamUrl + "?after=" + section.dataset.lastId;
+    var source = new EventSource(url);
+
+    source.addEventListener("comment", function (event) {
+        var data = JSON.parse(event.data);
+        if (document.getElementById("comment-" + data.id)) {
+            return;
+        }
+        // The poster's own comment was shown from this process's queue before it had an id.
+        var content = data.content.replace(/\r\n?/g, "\n");
+        var pending = list.querySelectorAll("li[data-pending-nickname]");
+        for (var i = 0; i < pending.length; i++) {
+            if (pending[i].dataset.pendingNickname === data.nickname && pending[i].dataset.pendingContent === content) {
+                pending[i].remove();
+                break;
+            }
+        }
+        var item = document.createElement("li");
+        item.className = "comment";
+        item.id = "comment-" + data.id;
+        var meta = document.createElement("div");
+        meta.className = "comment__meta";
+        var name = document.createElement("strong");
+        name.textContent = data.nickname;
+        var time = document.createElement("span");
+        time.className = "muted";
+        time.textContent = data.created_at;
+        meta.append(name, " ", time);
+        var body = document.createElement("p");
+        body.style.whiteSpace = "pre-line";
+        body.textContent = data.content;
+        item.append(meta, body);
+        list.prepend(item);
+        list.hidden = false;
+        var empty = document.getElementById("comment-empty");
+        if (empty) {
+            empty.remove();
+        }
+    });
+})();